@@ -0,0 +1,461 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+"""Flashflood benchmark suite
+
+Usage::
+
+    python3 benchmark/run.py [--sizes 1000,10000,100000] [--cases REGEX]
+                             [--repeat N] [--output FILE]
+
+Each case runs in a fresh subprocess, so that peak RSS is measured per case.
+Results are written as JSON lines (one object per case and size)::
+
+    {"case": "func_chain", "size": 100000, "seconds": 0.31,
+     "records_per_sec": 322580.6, "peak_rss_kb": 41234, ...}
+
+Cases which take too long at large sizes have a maximum size and are
+reported with ``"skipped": true`` beyond it.
+"""
+
+import argparse
+import collections
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from chorus.demo import MOL
+from tornado.ioloop import IOLoop
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flashflood import static  # noqa: E402
+from flashflood.core.concurrent import ConcurrentNode  # noqa: E402
+from flashflood.core.container import Container  # noqa: E402
+from flashflood.core.node import (  # noqa: E402
+    IterNode, FuncNode, AsyncNode)
+from flashflood.core import workerpool  # noqa: E402
+from flashflood.core.task import Task  # noqa: E402
+from flashflood.core.workflow import Workflow  # noqa: E402
+from flashflood.lod import ListOfDict, IndexedListOfDict  # noqa: E402
+from flashflood.node.aggregate.first import AggFirst  # noqa: E402
+from flashflood.node.aggregate.groupby import GroupBy  # noqa: E402
+from flashflood.node.aggregate.list import AggList  # noqa: E402
+from flashflood.node.aggregate.sum import AggSum, BatchAggSum  # noqa: E402
+from flashflood.node.aggregate.uniqlist import AggUniqList  # noqa: E402
+from flashflood.node.aggregate.update import AggUpdate  # noqa: E402
+from flashflood.node.field.concat import ConcatFields  # noqa: E402
+from flashflood.node.field.constant import (  # noqa: E402
+    ConstantField, BatchConstantField)
+from flashflood.node.field.extend import Extend  # noqa: E402
+from flashflood.node.field.remove import (  # noqa: E402
+    RemoveFields, BatchRemoveFields)
+from flashflood.node.field.split import SplitField  # noqa: E402
+from flashflood.node.field.update import UpdateFields  # noqa: E402
+from flashflood.node.reader.iterinput import IterInput  # noqa: E402
+from flashflood.node.reader.sdfile import (  # noqa: E402
+    SDFileReader, SDFileIndexReader)
+from flashflood.node.record.numericfilter import (  # noqa: E402
+    NumericFilter, BatchNumericFilter)
+from flashflood.node.record.sort import NumericSort  # noqa: E402
+from flashflood.node.reader.sqlite import SQLiteReader  # noqa: E402
+from flashflood.node.transform.join import LeftJoin  # noqa: E402
+from flashflood.node.writer.container import ContainerWriter  # noqa: E402
+from flashflood.node.writer.sqlite import SQLiteWriter  # noqa: E402
+
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5)
+
+FIELDS = [
+    {"key": "id", "name": "ID", "format": "numeric"},
+    {"key": "category", "name": "Category", "format": "numeric"},
+    {"key": "value", "name": "Value", "format": "numeric"}
+]
+
+CASES = collections.OrderedDict()
+
+
+def case(name, max_size=None):
+    """Registers a benchmark case.
+
+    The decorated function takes the number of records, prepares data and
+    returns a function to be timed.
+    """
+    def _register(func):
+        CASES[name] = (func, max_size)
+        return func
+    return _register
+
+
+def records(n, groups=100):
+    return [{"id": i, "category": i % groups, "value": float(i)}
+            for i in range(n)]
+
+
+def twice(rcd):
+    return dict(rcd, value=rcd["value"] * 2)
+
+
+def execute(wf):
+    IOLoop.current().run_sync(Task(wf).execute)
+
+
+def chain(source, nodes):
+    def run():
+        wf = Workflow()
+        wf.append(IterInput(source))
+        for node in nodes():
+            wf.append(node)
+        wf.append(ContainerWriter(Container()))
+        execute(wf)
+    return run
+
+
+@case("iter_chain")
+def iter_chain(n):
+    return chain(records(n), lambda: [IterNode() for _ in range(3)])
+
+
+@case("func_chain")
+def func_chain(n):
+    return chain(records(n), lambda: [FuncNode(twice) for _ in range(3)])
+
+
+@case("async_chain")
+def async_chain(n):
+    return chain(records(n), lambda: [AsyncNode() for _ in range(3)])
+
+
+@case("field_chain")
+def field_chain(n):
+    return chain(records(n), lambda: [
+        Extend("value2", "value", float), ConstantField("flag", "a-b"),
+        SplitField("flag", ["a", "b"], "-"), ConcatFields(["a", "b"], "ab"),
+        UpdateFields({"ab": "label"}), RemoveFields(["category"])])
+
+
+@case("concurrent_chunk1", max_size=10 ** 5)
+def concurrent_chunk1(n):
+    return chain(records(n), lambda: [ConcurrentNode(twice)])
+
+
+@case("concurrent_chunk100")
+def concurrent_chunk100(n):
+    return chain(records(n), lambda: [ConcurrentNode(twice, chunksize=100)])
+
+
+@case("concurrent_auto")
+def concurrent_auto(n):
+    return chain(
+        records(n), lambda: [ConcurrentNode(twice, chunksize="auto")])
+
+
+@case("sqlite_roundtrip")
+def sqlite_roundtrip(n):
+    rcds = records(n)
+
+    def run():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, "bench.sqlite3")
+            wf = Workflow()
+            wf.append(IterInput(
+                rcds, fields=FIELDS,
+                params={"sqlite_schema": {"table": "bench"}}))
+            wf.append(SQLiteWriter(
+                dest, primary_key="id", create_index=["category"],
+                notice_per_records=float("inf")))
+            execute(wf)
+            wf = Workflow()
+            wf.append(SQLiteReader([(dest, "bench")]))
+            wf.append(ContainerWriter(Container()))
+            execute(wf)
+    return run
+
+
+def sdf_file(n, tmpdir):
+    path = os.path.join(tmpdir, "bench.sdf")
+    with open(path, "w") as f:
+        for i in range(n):
+            f.write("{}> <id>\n{}\n\n$$$$\n".format(MOL["demo"], i))
+    return path
+
+
+@case("sdfile_parse", max_size=10 ** 4)
+def sdfile_parse(n):
+    """Parses all the records sequentially"""
+    tmpdir = tempfile.TemporaryDirectory()
+    path = sdf_file(n, tmpdir.name)
+
+    def run(tmpdir=tmpdir):  # the directory is removed with the closure
+        wf = Workflow()
+        wf.append(SDFileReader(path, sdf_options=["id"]))
+        wf.append(ContainerWriter(Container()))
+        execute(wf)
+    return run
+
+
+@case("sdfile_index_tail")
+def sdfile_index_tail(n):
+    """Reads the last 10 records by the offset index"""
+    tmpdir = tempfile.TemporaryDirectory()
+    path = sdf_file(n, tmpdir.name)
+
+    def run(tmpdir=tmpdir):
+        wf = Workflow()
+        wf.append(SDFileIndexReader(
+            path, rows=slice(-10, None), sdf_options=["id"]))
+        wf.append(ContainerWriter(Container()))
+        execute(wf)
+    return run
+
+
+@case("left_join")
+def left_join(n):
+    left = records(n)
+    right = [{"id": i, "label": "rcd{}".format(i)} for i in range(0, n, 2)]
+
+    def run():
+        wf = Workflow()
+        join = LeftJoin("id", "id")
+        wf.connect(IterInput(left), join, down_port=0)
+        wf.connect(IterInput(right), join, down_port=1)
+        wf.connect(join, ContainerWriter(Container()))
+        execute(wf)
+    return run
+
+
+@case("left_join_grace")
+def left_join_grace(n):
+    left = records(n)
+    right = [{"id": i, "label": "rcd{}".format(i)} for i in range(0, n, 2)]
+
+    def run():
+        wf = Workflow()
+        join = LeftJoin("id", "id", memory_budget=max(1, n // 20))
+        wf.connect(IterInput(left), join, down_port=0)
+        wf.connect(IterInput(right), join, down_port=1)
+        wf.connect(join, ContainerWriter(Container()))
+        execute(wf)
+    return run
+
+
+@case("agg_sum")
+def agg_sum(n):
+    return chain(records(n), lambda: [AggSum("category", "value")])
+
+
+@case("agg_sum_batch")
+def agg_sum_batch(n):
+    return chain(records(n), lambda: [BatchAggSum("category", "value")])
+
+
+@case("field_ops")
+def field_ops(n):
+    return chain(records(n), lambda: [
+        NumericFilter("value", n / 2, "<"), ConstantField("flag", 1),
+        RemoveFields(["category"])])
+
+
+@case("field_ops_batch")
+def field_ops_batch(n):
+    return chain(records(n), lambda: [
+        BatchNumericFilter("value", n / 2, "<"), BatchConstantField("flag", 1),
+        BatchRemoveFields(["category"])])
+
+
+@case("sort")
+def sort(n):
+    return chain(records(n)[::-1], lambda: [
+        NumericSort([("category", True), ("value", False)])])
+
+
+@case("sort_external")
+def sort_external(n):
+    return chain(records(n)[::-1], lambda: [
+        NumericSort([("category", True), ("value", False)],
+                    run_size=max(1, n // 10))])
+
+
+GROUPBY_AGGS = [("sum", "sum", "value"), ("count", "count", None),
+                ("mean", "mean", "value"), ("max", "max", "id")]
+
+
+@case("groupby")
+def groupby(n):
+    return chain(records(n), lambda: [GroupBy("category", GROUPBY_AGGS)])
+
+
+@case("groupby_spill")
+def groupby_spill(n):
+    return chain(records(n, groups=n // 2), lambda: [
+        GroupBy("category", GROUPBY_AGGS, max_groups=max(1, n // 20))])
+
+
+@case("groupby_parallel")
+def groupby_parallel(n):
+    return chain(records(n), lambda: [
+        GroupBy("category", GROUPBY_AGGS, parallel=True)])
+
+
+@case("agg_first")
+def agg_first(n):
+    return chain(records(n), lambda: [AggFirst("category")])
+
+
+@case("agg_list")
+def agg_list(n):
+    return chain(records(n), lambda: [AggList("category", "value")])
+
+
+@case("agg_uniqlist")
+def agg_uniqlist(n):
+    return chain(records(n), lambda: [AggUniqList("category", "value")])
+
+
+@case("agg_update")
+def agg_update(n):
+    return chain(records(n), lambda: [AggUpdate("category")])
+
+
+@case("lod_merge")
+def lod_merge(n):
+    left = records(n)
+    right = records(n, groups=1)
+
+    def run():
+        ListOfDict(left).merge(right, key="id", dupkey="update")
+    return run
+
+
+@case("lod_reduce")
+def lod_reduce(n):
+    rcds = records(n)
+
+    def run():
+        ListOfDict(rcds).reduce(key="category")
+    return run
+
+
+@case("lod_indexed_find")
+def lod_indexed_find(n):
+    rcds = records(n)
+
+    def run():
+        lod = IndexedListOfDict(rcds, key="id")
+        for i in range(n):
+            lod.find("id", i)
+    return run
+
+
+@case("lod_find", max_size=10 ** 4)
+def lod_find(n):
+    lod = ListOfDict(records(n))
+
+    def run():
+        for i in range(n):
+            lod.find("id", i)
+    return run
+
+
+def peak_rss_kb():
+    """Peak RSS of this process and its (terminated) child processes"""
+    self_ = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macOS
+        self_, children = self_ // 1024, children // 1024
+    return max(self_, children)
+
+
+def run_case(name, size, repeat):
+    """Runs a case in this process and returns the result dict"""
+    func, _ = CASES[name]
+    run = func(size)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    seconds = min(times)
+    # Terminated workers are counted in RUSAGE_CHILDREN
+    workerpool.shared_pool().shutdown(wait=True)
+    return {
+        "case": name,
+        "size": size,
+        "seconds": round(seconds, 6),
+        "records_per_sec": round(size / seconds, 1) if seconds else None,
+        "peak_rss_kb": peak_rss_kb()
+    }
+
+
+def spawn(name, size, repeat, timeout):
+    """Runs a case in a subprocess"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--run", name,
+           "--sizes", str(size), "--repeat", str(repeat)]
+    try:
+        proc = subprocess.run(
+            cmd, stdout=subprocess.PIPE, universal_newlines=True,
+            timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"case": name, "size": size, "error": "timeout"}
+    if proc.returncode:
+        return {"case": name, "size": size, "error": proc.returncode}
+    # Nodes may print progress messages before the result
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flashflood benchmark")
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="comma separated numbers of records (ex. 1000,10000000)")
+    parser.add_argument(
+        "--cases", default=".*", help="regex to select cases")
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="runs per case (min is taken)")
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="timeout per case (sec)")
+    parser.add_argument("--output", help="output file (default: stdout)")
+    parser.add_argument("--list", action="store_true", help="list cases")
+    parser.add_argument("--run", help=argparse.SUPPRESS)  # worker mode
+    args = parser.parse_args()
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    if args.list:
+        for name, (_, max_size) in CASES.items():
+            print(name, "" if max_size is None else max_size)
+        return
+    if args.run:
+        print(json.dumps(run_case(args.run, sizes[0], args.repeat)))
+        return
+    env = {
+        "python": platform.python_version(),
+        "flashflood": static.VERSION,
+        "processes": static.PROCESSES
+    }
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for name, (_, max_size) in CASES.items():
+            if not re.search(args.cases, name):
+                continue
+            for size in sizes:
+                if max_size is not None and size > max_size:
+                    result = {"case": name, "size": size, "skipped": True}
+                else:
+                    result = spawn(name, size, args.repeat, args.timeout)
+                result.update(env)
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
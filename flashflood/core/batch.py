@@ -0,0 +1,301 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import collections
+import itertools
+import operator
+
+from flashflood import functional
+from flashflood import sort
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Comparison operators applicable to whole columns
+COLUMN_OPS = {
+    "=": operator.eq,
+    "eq": operator.eq,
+    "<": operator.lt,
+    "lt": operator.lt,
+    "<=": operator.le,
+    "le": operator.le,
+    ">": operator.gt,
+    "gt": operator.gt,
+    ">=": operator.ge,
+    "ge": operator.ge
+}
+
+
+def _is_array(column):
+    return NUMPY_AVAILABLE and isinstance(column, numpy.ndarray)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RecordBatch(object):
+    """Columnar batch of records
+
+    Each column is a list or a numpy array (if numpy is available) of the
+    field values. Records which do not have the field have None in the
+    column, and their positions are kept in ``missing`` so that records
+    generated from the batch do not have the field either. Operations return
+    a new batch which shares unchanged columns with the original one, so
+    that records are not copied field by field.
+
+    Args:
+        columns (dict): column values by field key. All columns should have
+            the same length.
+        size (int): number of records. This is required only if the batch
+            has no column.
+        missing (dict): positions of records which do not have the field by
+            field key
+
+    Attributes:
+        columns (collections.OrderedDict): column values by field key
+        size (int): number of records
+        missing (dict): set of positions of records which do not have the
+            field by field key (only fields missing in some records)
+    """
+    def __init__(self, columns=None, size=None, missing=None):
+        self.columns = collections.OrderedDict(columns or {})
+        if size is None:
+            size = len(next(iter(self.columns.values()), ()))
+        self.size = size
+        self.missing = {k: set(v) for k, v in (missing or {}).items() if v}
+
+    @classmethod
+    def from_records(cls, rcds):
+        """Builds a batch from records
+
+        Args:
+            rcds (iterable): records
+
+        Returns:
+            RecordBatch: batch (columns are in order of appearance)
+        """
+        rcds = list(rcds)
+        # Counts of the keys in order of appearance
+        keys = collections.Counter(itertools.chain.from_iterable(rcds))
+        columns = collections.OrderedDict()
+        missing = {}
+        for k, cnt in keys.items():
+            col = list(map(dict.get, rcds, itertools.repeat(k)))
+            if cnt < len(rcds):
+                missing[k] = {i for i, r in enumerate(rcds) if k not in r}
+            columns[k] = col
+        return cls(columns, len(rcds), missing)
+
+    def __len__(self):
+        return self.size
+
+    def keys(self):
+        return list(self.columns.keys())
+
+    def column(self, key):
+        """Returns the column of the field"""
+        return self.columns[key]
+
+    def records(self):
+        """Generates records of the batch
+
+        numpy values are converted into Python objects.
+        """
+        keys = list(self.columns.keys())
+        if not keys:
+            for _ in range(self.size):
+                yield {}
+            return
+        cols = [c.tolist() if _is_array(c) else c
+                for c in self.columns.values()]
+        rcds = map(dict, map(zip, itertools.repeat(keys), zip(*cols)))
+        if not self.missing:
+            yield from rcds
+            return
+        absent = collections.defaultdict(list)
+        for k, rows in self.missing.items():
+            for i in rows:
+                absent[i].append(k)
+        for i, rcd in enumerate(rcds):
+            for k in absent.get(i, ()):
+                del rcd[k]
+            yield rcd
+
+    def _missing_at(self, indices):
+        """Returns missing positions of the records at the indices"""
+        if not self.missing:
+            return None
+        return {k: {i for i, j in enumerate(indices) if j in rows}
+                for k, rows in self.missing.items()}
+
+    def numeric_compare(self, key, value, op="="):
+        """Returns a boolean mask of the numeric comparison
+        ``float(column) <op> value``
+
+        Values which cannot be converted into float are not matched.
+        """
+        nums = self.numeric(key)
+        if _is_array(nums):
+            return COLUMN_OPS[op](nums, value)
+        func = sort.op_to_func[op]
+        return [v is not None and func(v, value) for v in nums]
+
+    def numeric(self, key):
+        """Returns the column converted into float values
+
+        Returns:
+            numpy.ndarray: float array whose invalid values are NaN
+                (if numpy is available)
+            list: list of float values whose invalid values are None
+        """
+        col = self.columns[key]
+        if NUMPY_AVAILABLE:
+            try:
+                return numpy.asarray(col, dtype=float)
+            except (TypeError, ValueError):
+                return numpy.array(
+                    [numpy.nan if v is None else v
+                     for v in map(_to_float, col)], dtype=float)
+        return [_to_float(v) for v in col]
+
+    def compare(self, key, value, op="="):
+        """Returns a boolean mask of the comparison ``column <op> value``
+
+        Numeric columns compared with a numeric value are processed by numpy
+        (if available). Other columns are compared by `flashflood.sort`
+        functions.
+        """
+        col = self.columns[key]
+        if NUMPY_AVAILABLE and isinstance(value, (int, float)) \
+                and not isinstance(value, bool):
+            arr = col if _is_array(col) else numpy.asarray(col)
+            if arr.dtype.kind in "iuf":
+                return COLUMN_OPS[op](arr, value)
+        func = COLUMN_OPS[op]
+        if func is operator.eq:
+            return [v == value for v in col]
+        # The key of the value is computed only once
+        key = sort.sort_key(value)
+        return [func(k, key) for k in map(sort.sort_key, col)]
+
+    def take(self, mask):
+        """Returns a batch of records whose mask values are True
+
+        Args:
+            mask (list or numpy.ndarray): boolean mask
+        """
+        if _is_array(mask):
+            mask_arr, mask_list = mask.astype(bool), mask.tolist()
+        else:
+            mask_arr, mask_list = None, mask
+        columns = collections.OrderedDict()
+        for k, col in self.columns.items():
+            if _is_array(col):
+                if mask_arr is None:
+                    mask_arr = numpy.asarray(mask, dtype=bool)
+                columns[k] = col[mask_arr]
+            else:
+                columns[k] = list(itertools.compress(col, mask_list))
+        kept = list(itertools.compress(range(self.size), mask_list))
+        return RecordBatch(columns, len(kept), self._missing_at(kept))
+
+    def select(self, indices):
+        """Returns a batch of records at the indices
+
+        Args:
+            indices (list or numpy.ndarray): record positions
+        """
+        idx_list = indices.tolist() if _is_array(indices) else indices
+        columns = collections.OrderedDict()
+        for k, col in self.columns.items():
+            if _is_array(col):
+                columns[k] = col[numpy.asarray(indices, dtype=int)]
+            else:
+                columns[k] = [col[i] for i in idx_list]
+        return RecordBatch(
+            columns, len(idx_list), self._missing_at(idx_list))
+
+    def assign(self, key, values):
+        """Returns a batch with the column replaced or appended"""
+        columns = self.columns.copy()
+        columns[key] = values
+        missing = {k: v for k, v in self.missing.items() if k != key}
+        return RecordBatch(columns, self.size, missing)
+
+    def drop(self, keys):
+        """Returns a batch without the columns
+
+        Raises:
+            KeyError: if the batch does not have the column
+        """
+        columns = self.columns.copy()
+        for k in keys:
+            del columns[k]
+        missing = {k: v for k, v in self.missing.items() if k in columns}
+        return RecordBatch(columns, self.size, missing)
+
+    def rename(self, updates):
+        """Returns a batch with renamed columns
+
+        Args:
+            updates (dict): new field keys by old field keys
+        """
+        columns = collections.OrderedDict()
+        for k, col in self.columns.items():
+            columns[updates.get(k, k)] = col
+        missing = {updates.get(k, k): v for k, v in self.missing.items()}
+        return RecordBatch(columns, self.size, missing)
+
+
+def batched(rcds, size):
+    """Splits records into `RecordBatch` of the given size"""
+    for chunk in functional.chunked(rcds, size):
+        yield RecordBatch.from_records(chunk)
+
+
+def unbatched(batches):
+    """Generates records of the batches"""
+    for b in batches:
+        yield from b.records()
+
+
+def concat(batches):
+    """Concatenates batches into one `RecordBatch`
+
+    Columns are converted into lists if they have different types.
+    """
+    batches = [b for b in batches if len(b)]
+    if len(batches) == 1:
+        return batches[0]
+    keys = collections.OrderedDict()
+    for b in batches:
+        for k in b.columns:
+            keys[k] = None
+    columns = collections.OrderedDict()
+    missing = collections.defaultdict(set)
+    for k in keys:
+        cols = [b.columns.get(k, [None] * len(b)) for b in batches]
+        if all(_is_array(c) for c in cols):
+            columns[k] = numpy.concatenate(cols)
+        else:
+            columns[k] = list(itertools.chain.from_iterable(
+                c.tolist() if _is_array(c) else c for c in cols))
+        offset = 0
+        for b in batches:
+            if k not in b.columns:
+                missing[k].update(range(offset, offset + len(b)))
+            else:
+                missing[k].update(offset + i for i in b.missing.get(k, ()))
+            offset += len(b)
+    return RecordBatch(columns, sum(len(b) for b in batches), missing)
@@ -0,0 +1,392 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import collections
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import types
+
+from tornado import gen
+
+from flashflood.core.container import Container, Counter, Sampler
+from flashflood.core.task import Task, TaskSpecs
+from flashflood.core.workerpool import WorkerPool
+from flashflood.lod import ListOfDict
+
+
+# Workflow attributes which are built from the nodes or do not affect results
+IGNORED_ATTRS = ("nodes", "tasks", "succs", "interval", "verbose",
+                 "queue_capacity", "node_num")
+
+# Objects which receive outputs or run tasks but do not affect results
+NEUTRAL_TYPES = (Container, Counter, Sampler, WorkerPool)
+
+
+def _canonical(obj):
+    """Converts an object into a hashable description"""
+    if obj is None or isinstance(obj, (bool, int, float, bytes)):
+        return obj
+    if isinstance(obj, str):
+        if os.path.isfile(obj):
+            # Results depend on the content of the input files
+            st = os.stat(obj)
+            return ("file", obj, st.st_mtime_ns, st.st_size)
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return (type(obj).__name__, tuple(_canonical(e) for e in obj))
+    if isinstance(obj, range):
+        return ("range", obj.start, obj.stop, obj.step)
+    if isinstance(obj, (set, frozenset)):
+        return ("set", tuple(sorted(repr(_canonical(e)) for e in obj)))
+    if isinstance(obj, dict):
+        return ("dict", tuple(sorted(
+            (repr(k), _canonical(v)) for k, v in obj.items())))
+    if isinstance(obj, functools.partial):
+        return ("partial", _canonical(obj.func), _canonical(obj.args),
+                _canonical(obj.keywords))
+    if isinstance(obj, types.MethodType):
+        # Results of bound methods may depend on the instance state
+        return ("method", _canonical(obj.__func__),
+                _canonical(obj.__self__))
+    if isinstance(obj, types.FunctionType):
+        # Functions with the same name (ex. lambdas) are distinguished by
+        # their code, default arguments and closure values
+        return ("function", obj.__module__, obj.__qualname__,
+                _code(obj.__code__), _canonical(obj.__defaults__),
+                _canonical(tuple(
+                    c.cell_contents for c in obj.__closure__ or ())))
+    if isinstance(obj, TaskSpecs):
+        attrs = {k: v for k, v in vars(obj).items()
+                 if not k.startswith("_") and k not in IGNORED_ATTRS}
+        if "preds" in attrs:  # Workflow
+            attrs["nodes"] = obj.nodes
+        return (type(obj).__module__, type(obj).__qualname__,
+                _canonical(attrs))
+    if hasattr(obj, "__next__"):
+        # Contents of iterators cannot be identified without consuming them
+        raise ValueError("Iterator {} is not cacheable".format(obj))
+    if callable(obj) and hasattr(obj, "__qualname__"):
+        return ("callable", getattr(obj, "__module__", None),
+                obj.__qualname__)
+    if isinstance(obj, NEUTRAL_TYPES):
+        return ("object", type(obj).__module__, type(obj).__qualname__)
+    if hasattr(obj, "__dict__"):
+        # Other objects are identified by their state
+        return (type(obj).__module__, type(obj).__qualname__,
+                _canonical(vars(obj)))
+    raise ValueError("Object {} is not cacheable".format(obj))
+
+
+def _code(code):
+    consts = tuple(
+        _code(c) if isinstance(c, types.CodeType) else repr(c)
+        for c in code.co_consts)
+    return (code.co_code, consts, code.co_names)
+
+
+def cache_key(workflow):
+    """Computes the cache key of the workflow
+
+    The key is derived from the workflow class, attributes of the workflow
+    and its nodes (including functions, nested workflows and the state of
+    other objects such as instances of bound methods), the workflow graph and
+    modification time of input files referred by the attributes.
+
+    Args:
+        workflow (flashflood.core.task.TaskSpecs): workflow
+
+    Returns:
+        str: cache key (SHA-256 hex digest)
+
+    Raises:
+        ValueError: if the workflow has iterators as inputs or objects whose
+            state cannot be identified (ex. objects without ``__dict__`` or
+            with circular references)
+    """
+    try:
+        desc = repr(_canonical(workflow)).encode("utf-8")
+    except RecursionError:
+        raise ValueError("Workflow {} is not cacheable".format(workflow))
+    return hashlib.sha256(desc).hexdigest()
+
+
+def output_containers(workflow):
+    """Returns output containers of the workflow in order of the nodes"""
+    containers = []
+    for node in getattr(workflow, "nodes", ()):
+        if isinstance(getattr(node, "container", None), Container):
+            containers.append(node.container)
+        containers.extend(output_containers(node))
+    return containers
+
+
+def sink_nodes(workflow):
+    """Returns nodes which have no downstream nodes in order of the nodes
+
+    Exits of sub workflows send records to the parent workflow, so they are
+    not regarded as sinks.
+    """
+    sinks = []
+    exit_ = getattr(workflow, "_exit", None)
+    for node in getattr(workflow, "nodes", ()):
+        if hasattr(node, "nodes"):
+            sinks.extend(sink_nodes(node))
+        elif not workflow.succs.get(node.node_num) \
+                and node.node_num != exit_:
+            sinks.append(node)
+    return sinks
+
+
+def cacheable_outputs(workflow):
+    """Returns whether all sinks of the workflow are output containers
+
+    Sinks with side effects (ex. file writers) would be skipped on cache
+    hits, so such workflows should not be cached.
+    """
+    return all(isinstance(getattr(n, "container", None), Container)
+               for n in sink_nodes(workflow))
+
+
+class ResultCache(object):
+    """LRU cache of workflow outputs
+
+    Outputs are stored as pickled bytes, so that cached results are never
+    modified by consumers and the memory usage can be measured. If
+    ``cache_dir`` is given, outputs are also written to the directory and
+    entries evicted from the memory can be loaded from the disk.
+
+    The on-disk cache is bounded by ``max_disk_bytes``. When a new entry
+    exceeds the budget, least recently used files (by modification time,
+    which is updated on disk hits) are removed.
+
+    Args:
+        max_entries (int): maximum number of entries in the memory
+        max_bytes (int): maximum total size of entries in the memory.
+            If None, the size is not limited.
+        cache_dir (str): directory of on-disk cache. If None, results are
+            cached only in the memory.
+        max_disk_bytes (int): maximum total size of files in ``cache_dir``.
+            If None, the size is not limited.
+
+    Attributes:
+        hits (int): number of cache hits
+        disk_hits (int): number of cache hits loaded from the disk
+        misses (int): number of cache misses
+        evictions (int): number of entries evicted from the memory
+        disk_evictions (int): number of files removed from ``cache_dir``
+    """
+    def __init__(self, max_entries=128, max_bytes=None, cache_dir=None,
+                 max_disk_bytes=2 ** 30):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key):
+        """Returns cached outputs
+
+        Args:
+            key (str): cache key
+
+        Returns:
+            list: list of (records, fields, params) of output containers
+            None: if not cached
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pickle.loads(data)
+        data = self._load(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, data)
+        return pickle.loads(data)
+
+    def put(self, key, outputs):
+        """Stores outputs
+
+        Args:
+            key (str): cache key
+            outputs (list): list of (records, fields, params) of output
+                containers
+
+        Returns:
+            bool: False if the outputs could not be pickled
+        """
+        try:
+            data = pickle.dumps(outputs, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        with self._lock:
+            self._store(key, data)
+        if self.cache_dir is not None:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+            self._prune_disk(key)
+        return True
+
+    def clear(self):
+        """Removes all entries (including on-disk entries)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.cache_dir is not None:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pickle"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self):
+        """Returns cache metrics"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes
+            }
+
+    def _store(self, key, data):
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        self._entries[key] = data
+        self._bytes += len(data)
+        while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+                and len(self._entries) > 1):
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= len(old)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pickle")
+
+    def _load(self, key):
+        if self.cache_dir is None:
+            return
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            # Marks as recently used
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return
+        return data
+
+    def _prune_disk(self, latest):
+        """Removes least recently used files over the disk budget"""
+        if self.max_disk_bytes is None:
+            return
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pickle"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(f[1] for f in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            if path == self._path(latest):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self.disk_evictions += 1
+
+
+class CachedTask(Task):
+    """Task whose outputs are cached
+
+    If the same workflow was already done, outputs of the workflow
+    (containers of `flashflood.node.writer.container.ContainerWriter`) are
+    restored from the cache without running the workflow. Outputs of
+    aborted tasks and workflows which cannot be identified by `cache_key`
+    are not cached.
+
+    Only workflows whose sinks are all ContainerWriters are cached. Other
+    sinks (ex. CsvWriter, SDFileWriter and SQLiteWriter) have side effects
+    which cannot be restored from the cache, so workflows including them
+    always run without the cache.
+
+    Args:
+        specs (TaskSpecs): task implementation object
+        cache (ResultCache): result cache
+        **kwargs: kwargs
+
+    Attributes:
+        cache_key (str): cache key computed when the task started
+        cache_hit (bool): whether the outputs were restored from the cache
+    """
+    def __init__(self, specs, cache, **kwargs):
+        super().__init__(specs, **kwargs)
+        self.cache = cache
+        self.cache_key = None
+        self.cache_hit = False
+
+    @gen.coroutine
+    def run(self):
+        if not cacheable_outputs(self.specs):
+            yield super().run()
+            return
+        try:
+            self.cache_key = cache_key(self.specs)
+        except ValueError:
+            yield super().run()
+            return
+        outputs = self.cache.get(self.cache_key)
+        if outputs is None:
+            yield super().run()
+            return
+        self.on_start()
+        containers = output_containers(self.specs)
+        for container, (records, fields, params) in zip(containers, outputs):
+            container.records = records
+            container.fields = ListOfDict(fields)
+            container.params = params
+        self.cache_hit = True
+        self.on_finish()
+
+    def on_finish(self):
+        if self.cache_key is not None and not self.cache_hit:
+            self.cache.put(self.cache_key, [
+                (list(c.records), list(c.fields), c.params)
+                for c in output_containers(self.specs)
+            ])
+        super().on_finish()
@@ -4,7 +4,6 @@
 # http://opensource.org/licenses/MIT
 #
 
-from concurrent import futures as cf
 import functools
 import pickle
 # import threading
@@ -13,12 +12,16 @@ from tornado import gen
 from tornado.queues import Queue
 
 from flashflood import functional
-from flashflood import static
+from flashflood.core import workerpool
 from flashflood.core.edge import AsyncEdge
 from flashflood.core.node import Node
 from flashflood.core.task import InvalidOperationError
 
 
+def map_chunk(func, chunk):
+    return [func(a) for a in chunk]
+
+
 class ConcurrentNode(Node):
     """Concurrent node
 
@@ -29,23 +32,56 @@ class ConcurrentNode(Node):
 
     ConcurrentNode has AsyncEdge as an outgoing edge. Parallel job results are
     sent to downstream using multiprocess queue. This does not guarantee same
-    record order as the original one.
+    record order as the original one unless ``ordered`` is True. In the
+    ordered mode, results are sent in order of submission as soon as the
+    earliest pending result is ready.
+
+    At most ``window`` worker tasks are in flight in both modes. In the
+    ordered mode, the window is also the size of the reorder buffer.
 
     ConcurrentNode can be used as a part of SubWorkflow
 
+    Worker processes are provided by the server-wide
+    `flashflood.core.workerpool.WorkerPool` unless a specific pool is given,
+    so that processes are reused across tasks.
+
+    Records are sent to workers in chunks of ``chunksize`` records to reduce
+    IPC overhead of cheap functions. If chunksize is ``auto``, it will be
+    determined by the number of records and worker processes.
+
     Args:
         func(function): function to be applied
         sampler(core.container.Sampler): Sampler object
+        pool(core.workerpool.WorkerPool): worker pool (default: shared pool)
+        chunksize(int or str): number of records per worker task or ``auto``
+        ordered(bool): if True, keep the original record order
+        window(int): maximum number of pending worker tasks
+            (default: twice the number of processes of the pool)
+        capacity(int): queue capacity of the outgoing AsyncEdge
 
     Attributes:
         func(function): function to be applied
         queue(tornado.queues.Queue): multiprocess worker queue
+        pool(core.workerpool.WorkerPool): worker pool
+        chunksize(int or str): number of records per worker task or ``auto``
+        ordered(bool): if True, keep the original record order
+        window(int): maximum number of pending worker tasks
     """
-    def __init__(self, func=None, sampler=None, **kwargs):
+    def __init__(self, func=None, sampler=None, pool=None, chunksize=1,
+                 ordered=False, window=None, capacity=None, **kwargs):
         super().__init__(**kwargs)
         self.func = func
-        self.queue = Queue(static.PROCESSES * 2)
-        self._out_edge = AsyncEdge(sampler)
+        self.pool = pool
+        if chunksize != "auto" and (
+                not isinstance(chunksize, int) or isinstance(chunksize, bool)
+                or chunksize < 1):
+            raise InvalidOperationError(
+                "chunksize should be a positive integer or 'auto'")
+        self.chunksize = chunksize
+        self.ordered = ordered
+        self.window = window
+        self.queue = None
+        self._out_edge = AsyncEdge(sampler, capacity)
         self._interrupted = False
         self._cfunc = None
         self._cargs = None
@@ -60,36 +96,37 @@ class ConcurrentNode(Node):
     def run(self, on_finish, on_abort):
         if self.edge_type(self._in_edge) == "AsyncEdge":
             self.synchronizer()
-        while 1:
-            if self._in_edge.status == "aborted":
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "FuncEdge":
+            if self.func is None:
+                self._cfunc = self._in_edge.func
+            else:
+                self._cfunc = functional.fuse(
+                    self.func, self._in_edge.func)
+        else:
+            self._cfunc = self.func
+        if self.edge_type(self._in_edge) != "AsyncEdge":
+            self._cargs = self._in_edge.records
+        pool = self.pool or workerpool.shared_pool()
+        self.queue = Queue(self.window or pool.processes * 2)
+        # The queue works as a reorder buffer if only one consumer pulls
+        # futures in order of submission.
+        for p in range(1 if self.ordered else pool.processes):
+            self.consumer()
+        cfunc = functools.partial(map_chunk, self._cfunc)
+        for chunk in functional.chunked(
+                self._cargs, self.resolve_chunksize(pool)):
+            yield self.queue.put(pool.submit(cfunc, chunk))
+            if self._interrupted:
+                yield self.queue.join()
+                yield self._out_edge.abort()
                 on_abort()
                 return
-            if self._in_edge.status == "done":
-                if self.edge_type(self._in_edge) == "FuncEdge":
-                    if self.func is None:
-                        self._cfunc = self._in_edge.func
-                    else:
-                        self._cfunc = functional.compose(
-                            self.func, self._in_edge.func)
-                else:
-                    self._cfunc = self.func
-                if self.edge_type(self._in_edge) != "AsyncEdge":
-                    self._cargs = self._in_edge.records
-                break
-            yield gen.sleep(self.interval)
-        with cf.ThreadPoolExecutor(static.PROCESSES) as tp:
-            for p in range(static.PROCESSES):
-                tp.submit(self.consumer())
-            with cf.ProcessPoolExecutor(static.PROCESSES) as pp:
-                for a in self._cargs:
-                    yield self.queue.put(pp.submit(self._cfunc, a))
-                    if self._interrupted:
-                        yield self.queue.join()
-                        yield self._out_edge.abort()
-                        on_abort()
-                        return
-                yield self.queue.join()
-            yield self._out_edge.done()
+        yield self.queue.join()
+        yield self._out_edge.done()
         on_finish()
 
     def interrupt(self):
@@ -100,6 +137,19 @@ class ConcurrentNode(Node):
         if self.func is None and self.edge_type(self._in_edge) != "FuncEdge":
             raise InvalidOperationError("No concurrent function")
 
+    def resolve_chunksize(self, pool):
+        """Returns the number of records per worker task"""
+        if self.chunksize != "auto":
+            return self.chunksize
+        try:
+            n = len(self._cargs)
+        except TypeError:
+            # Size of the iterator is unknown
+            return 100
+        # Same as multiprocessing.Pool.map but with an upper limit
+        size, extra = divmod(n, pool.processes * 4)
+        return max(1, min(size + bool(extra), 1000))
+
     @gen.coroutine
     def on_task_done(self, record):
         yield self._out_edge.put(record)
@@ -108,8 +158,9 @@ class ConcurrentNode(Node):
     def synchronizer(self):
         self._cargs = []
         while 1:
-            in_ = yield self._in_edge.get()
-            self._cargs.append(in_)
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self._cargs.extend(in_)
+            self._in_edge.task_done(len(in_))
 
     @gen.coroutine
     def consumer(self):
@@ -118,7 +169,8 @@ class ConcurrentNode(Node):
             res = yield f
             # TODO: threading.Lock may be unnecessary
             # with threading.Lock():
-            self.on_task_done(res)
+            for r in res:
+                yield self.on_task_done(r)
             self.queue.task_done()
 
 
@@ -5,6 +5,7 @@
 #
 
 import copy
+import random
 
 from flashflood.lod import ListOfDict
 
@@ -24,28 +25,62 @@ class Counter(object):
 
 
 class Sampler(object):
-    """Data sampler"""
-    def __init__(self, size=5, frequency=1, deep_copy=False):
+    """Data sampler
+
+    By default, the sampler takes the first ``size`` records (every
+    ``frequency``-th record) and ignores the rest. In reservoir mode, the
+    sampler keeps a uniform random sample of ``size`` records of the whole
+    stream (reservoir sampling), so that the memory usage is bounded
+    regardless of the number of records.
+
+    Args:
+        size (int): number of sample records
+        frequency (int): sampling interval (ignored in reservoir mode)
+        deep_copy (bool): if True, sample records are deep copied
+        reservoir (bool): reservoir sampling mode
+        seed: random seed for reservoir sampling
+
+    Attributes:
+        records (list): sample records
+        done (bool): whether the sampler takes no more records
+    """
+    def __init__(self, size=5, frequency=1, deep_copy=False, reservoir=False,
+                 seed=None):
         self.records = []
         self.size = size
         self.frequency = frequency
         self.deep_copy = deep_copy
+        self.reservoir = reservoir
         self.done = False
         self._source_count = 0
+        self._random = random.Random(seed)
+
+    def _copy(self, record):
+        if self.deep_copy:
+            return copy.deepcopy(record)
+        return copy.copy(record)
 
     def put(self, record):
+        if self.reservoir:
+            self._put_reservoir(record)
+            return
         if self.done:
             return
         if len(self.records) >= self.size:
             self.done = True
             return
         if not self._source_count % self.frequency:
-            if self.deep_copy:
-                copied = copy.deepcopy(record)
-            else:
-                copied = copy.copy(record)
-            self.records.append(copied)
+            self.records.append(self._copy(record))
+        self._source_count += 1
+
+    def _put_reservoir(self, record):
         self._source_count += 1
+        if len(self.records) < self.size:
+            self.records.append(self._copy(record))
+            return
+        i = self._random.randrange(self._source_count)
+        if i < self.size:
+            self.records[i] = self._copy(record)
 
     def put_from_list(self, records):
         if not isinstance(records, list):
@@ -57,3 +92,23 @@ class Sampler(object):
             except StopIteration:
                 return
             self.put(s)
+
+    def sampled(self, records):
+        """Generates records passed through the sampler
+
+        Records are sampled lazily as the downstream consumes them, so the
+        records are not materialized.
+
+        Args:
+            records (iterable): source records
+
+        Returns:
+            iterable: records
+        """
+        it = iter(records)
+        for rcd in it:
+            self.put(rcd)
+            yield rcd
+            if self.done:
+                break
+        yield from it
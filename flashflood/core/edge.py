@@ -4,29 +4,94 @@
 # http://opensource.org/licenses/MIT
 #
 
+import collections.abc
+import time
+
 from tornado import gen
-from tornado.queues import Queue
+from tornado.locks import Event
+from tornado.queues import Queue, QueueEmpty, QueueFull
 
 from flashflood import functional
+from flashflood.core import batch
 from flashflood.lod import ListOfDict
 
 
-class IterEdge(object):
-    """Synchronous data flow edge
+class Edge(object):
+    """Data flow edge base class
+
+    Downstream nodes do not need to poll the edge status. `Edge.wait` returns
+    a future which will be resolved as soon as the status turns into ``done``
+    or ``aborted``.
 
     Attributes:
         status (text): ``ready``, ``done`` or ``aborted``
-        records (iterable): records store
         fields (flashflood.lod.ListOfDict): data fields
         params (dict): optional parameters which will be sent to downstream
         sampler (flashflood.core.container.Sampler): data sampler object
+        count (int): number of records passed through the edge
     """
     def __init__(self, sampler=None):
-        self.status = "ready"
-        self.records = None
+        self._status = "ready"
+        self._closed = Event()
         self.fields = ListOfDict()
         self.params = {}
         self.sampler = sampler
+        self.count = 0
+
+    def _counted(self, rcds):
+        """Counts records sent to the downstream.
+
+        Sized records are counted at once. Iterators are counted lazily as
+        the downstream consumes them.
+        """
+        if isinstance(rcds, collections.abc.Sized):
+            self.count += len(rcds)
+            return rcds
+        return self._count_iter(rcds)
+
+    def _count_iter(self, rcds):
+        for rcd in rcds:
+            self.count += 1
+            yield rcd
+
+    def metrics(self):
+        """Returns runtime metrics of the edge"""
+        return {"count": self.count}
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        if value in ("done", "aborted"):
+            self._closed.set()
+
+    @gen.coroutine
+    def wait(self):
+        """Waits until the upstream node emits done or abort signal.
+
+        Returns:
+            str: edge status (``done`` or ``aborted``)
+        """
+        yield self._closed.wait()
+        return self._status
+
+
+class IterEdge(Edge):
+    """Synchronous data flow edge
+
+    Attributes:
+        status (text): ``ready``, ``done`` or ``aborted``
+        records (iterable): records store
+        fields (flashflood.lod.ListOfDict): data fields
+        params (dict): optional parameters which will be sent to downstream
+        sampler (flashflood.core.container.Sampler): data sampler object
+    """
+    def __init__(self, sampler=None):
+        super().__init__(sampler)
+        self.records = None
 
     def send(self, rcds):
         """Send records to the downstream.
@@ -38,10 +103,9 @@ class IterEdge(object):
             rcds(iterable): iterator to be sent to the downstream
         """
         if self.sampler is None:
-            self.records = rcds
+            self.records = self._counted(rcds)
         else:
-            self.records = list(rcds)
-            self.sampler.put_from_list(self.records)
+            self.records = self._counted(self.sampler.sampled(rcds))
         self.status = "done"
 
     def abort(self):
@@ -51,7 +115,7 @@ class IterEdge(object):
         self.status = "aborted"
 
 
-class FuncEdge(object):
+class FuncEdge(Edge):
     """Function data flow edge
 
     Attributes:
@@ -62,12 +126,9 @@ class FuncEdge(object):
         sampler (flashflood.core.container.Sampler): data sampler object
     """
     def __init__(self, sampler=None):
-        self.status = "ready"
+        super().__init__(sampler)
         self.func = None
         self.records = None
-        self.fields = ListOfDict()
-        self.params = {}
-        self.sampler = sampler
 
     def send(self, func, rcds):
         """Send func and args to the downstream.
@@ -81,11 +142,12 @@ class FuncEdge(object):
         """
         if self.sampler is None:
             self.func = func
-            self.records = rcds
+            self.records = self._counted(rcds)
         else:
+            # Records are sampled after the function is applied
             self.func = functional.identity
-            self.records = list(map(func, rcds))
-            self.sampler.put_from_list(self.records)
+            self.records = self._counted(
+                self.sampler.sampled(map(func, rcds)))
         self.status = "done"
 
     def abort(self):
@@ -95,15 +157,82 @@ class FuncEdge(object):
         self.status = "aborted"
 
 
-class AsyncEdge(object):
+class BatchEdge(IterEdge):
+    """Synchronous data flow edge which carries columnar record batches
+
+    BatchEdge sends iterator of `flashflood.core.batch.RecordBatch` to the
+    downstream. Batch-aware nodes (ex. `flashflood.core.node.BatchNode`)
+    refer to BatchEdge.batches. Other nodes regard BatchEdge as IterEdge and
+    refer to BatchEdge.records, which generates records of the batches.
+
+    Attributes:
+        status (text): ``ready``, ``done`` or ``aborted``
+        batches (iterable): record batches store
+        records (iterable): records generated from the batches
+        fields (flashflood.lod.ListOfDict): data fields
+        params (dict): optional parameters which will be sent to downstream
+        sampler (flashflood.core.container.Sampler): data sampler object
+        count (int): number of records passed through the edge
+    """
+    def __init__(self, sampler=None):
+        super(IterEdge, self).__init__(sampler)
+        self.batches = None
+
+    @property
+    def records(self):
+        if self.batches is None:
+            return
+        return batch.unbatched(self.batches)
+
+    def send(self, batches):
+        """Send record batches to the downstream.
+
+        Args:
+            batches(iterable): iterator of
+                `flashflood.core.batch.RecordBatch` to be sent to the
+                downstream
+        """
+        if self.sampler is None:
+            self.batches = self._count_batches(batches)
+        else:
+            self.batches = self._count_batches(self._sampled(batches))
+        self.status = "done"
+
+    def _count_batches(self, batches):
+        for b in batches:
+            self.count += len(b)
+            yield b
+
+    def _sampled(self, batches):
+        for b in batches:
+            for rcd in b.records():
+                if self.sampler.done:
+                    break
+                self.sampler.put(rcd)
+            yield b
+
+
+class AsyncEdge(Edge):
     """Asynchronous data flow edge
 
+    Args:
+        sampler (flashflood.core.container.Sampler): data sampler object
+        capacity (int): queue capacity. If None, the default capacity (20)
+            or the workflow default will be applied. 0 means unlimited.
+
     Attributes:
         status (str): edge status
         queue (tornado.queues.Queue): data queue
+        capacity (int): queue capacity explicitly set
         fields (flashflood.lod.ListOfDict): edge status
         params (dict): optional parameters which will be sent to downstream
         sampler (flashflood.core.container.Sampler): data sampler object
+        count (int): number of records passed through the edge
+        put_wait (float): time (in second) the upstream node was blocked by
+            the full queue
+        get_wait (float): time (in second) the downstream node waited for
+            records
+        peak_size (int): peak number of records in the queue
 
     Status value is either of the items below
 
@@ -113,12 +242,23 @@ class AsyncEdge(object):
           in the edge is sent to the target node
 
     """
-    def __init__(self, sampler=None):
-        self.status = "ready"
-        self.queue = Queue(20)
-        self.fields = ListOfDict()
-        self.params = {}
-        self.sampler = sampler
+    def __init__(self, sampler=None, capacity=None):
+        super().__init__(sampler)
+        self.capacity = capacity
+        self.queue = Queue(20 if capacity is None else capacity)
+        self.put_wait = 0
+        self.get_wait = 0
+        self.peak_size = 0
+
+    def resize(self, capacity):
+        """Changes queue capacity.
+
+        This should be called before the upstream node starts to put records.
+        """
+        if self.queue.qsize():
+            raise ValueError("The queue is already in use")
+        self.capacity = capacity
+        self.queue = Queue(capacity)
 
     @gen.coroutine
     def put(self, record):
@@ -127,17 +267,106 @@ class AsyncEdge(object):
         This should be called by an upstream node."""
         if self.sampler is not None:
             self.sampler.put(record)
-        yield self.queue.put(record)
+        try:
+            self.queue.put_nowait(record)
+        except QueueFull:
+            yield self._wait_put(record)
+        self._on_put()
+
+    @gen.coroutine
+    def put_many(self, records):
+        """Puts records to the queue.
+
+        This waits only when the queue is full. This should be called by an
+        upstream node."""
+        for record in records:
+            if self.sampler is not None:
+                self.sampler.put(record)
+            try:
+                self.queue.put_nowait(record)
+            except QueueFull:
+                yield self._wait_put(record)
+            self._on_put()
 
     @gen.coroutine
     def get(self):
         """Gets record to the queue.
 
         This should be called by a downstream node."""
-        res = yield self.queue.get()
+        res = yield self._wait_get()
         self.queue.task_done()
         return res
 
+    @gen.coroutine
+    def get_many(self, max_size=None, task_done=True):
+        """Gets records available in the queue.
+
+        This waits until at least one record arrives. This should be called
+        by a downstream node.
+
+        Args:
+            max_size (int): maximum number of records
+                (default: queue capacity)
+            task_done (bool): if False, records are not marked as processed
+                and the downstream node should call `AsyncEdge.task_done`
+                after it sent the results to its own downstream. This
+                prevents the done signal from being emitted while the records
+                are in process.
+
+        Returns:
+            list: records
+        """
+        limit = max_size or self.queue.maxsize or float("inf")
+        res = yield self._wait_get()
+        rcds = [res]
+        while len(rcds) < limit:
+            try:
+                res = self.queue.get_nowait()
+            except QueueEmpty:
+                break
+            rcds.append(res)
+        if task_done:
+            self.task_done(len(rcds))
+        return rcds
+
+    @gen.coroutine
+    def _wait_put(self, record):
+        start = time.perf_counter()
+        yield self.queue.put(record)
+        self.put_wait += time.perf_counter() - start
+
+    def _on_put(self):
+        self.count += 1
+        if self.queue.qsize() > self.peak_size:
+            self.peak_size = self.queue.qsize()
+
+    @gen.coroutine
+    def _wait_get(self):
+        try:
+            return self.queue.get_nowait()
+        except QueueEmpty:
+            start = time.perf_counter()
+            res = yield self.queue.get()
+            self.get_wait += time.perf_counter() - start
+            return res
+
+    def metrics(self):
+        return {
+            "count": self.count,
+            "put_wait": self.put_wait,
+            "get_wait": self.get_wait,
+            "peak_size": self.peak_size
+        }
+
+    def task_done(self, count=1):
+        """Marks records got from the queue as processed.
+
+        Args:
+            count (int): number of records
+        """
+        for _ in range(count):
+            self.queue.task_done()
+
     @gen.coroutine
     def done(self):
         """Waits until all records are sent to its downstream node and then
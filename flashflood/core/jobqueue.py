@@ -4,24 +4,79 @@
 # http://opensource.org/licenses/MIT
 #
 
+import collections
 import time
 
 from tornado import gen
-from tornado.queues import Queue
+from tornado.ioloop import IOLoop
+from tornado.locks import Condition
+
+
+PRIORITIES = ("interactive", "batch")
 
 
 class JobQueue(object):
-    def __init__(self):
-        self.queue = Queue(20)
+    """Task queue which runs tasks concurrently in a limited number of slots
+
+    Tasks are classified into priority classes (``interactive`` and
+    ``batch`` by default). Tasks of the same class are dispatched in FIFO
+    order. Classes share the slots by stride scheduling weighted by
+    ``weights``, so that each class gets slots in proportion to its weight
+    and no class starves. Slots reserved for a class cannot be used by the
+    other classes, which keeps short interactive jobs from waiting behind
+    long-running batch jobs.
+
+    Args:
+        slots (int): number of tasks run concurrently
+        reserved (dict): number of slots reserved for each class
+            (ex. ``{"interactive": 1}``)
+        weights (dict): share of slots of each class
+            (default: 4 for interactive, 1 for batch)
+        maxsize (int): maximum number of queued tasks. `JobQueue.put` waits
+            if the queue is full.
+        priorities (tuple): priority classes in the order of precedence
+
+    Attributes:
+        alive (dict): queued and running tasks by task ID
+    """
+    def __init__(self, slots=1, reserved=None, weights=None, maxsize=20,
+                 priorities=PRIORITIES):
+        self.slots = slots
+        self.reserved = dict(reserved or {})
+        self.weights = {"interactive": 4, "batch": 1}
+        self.weights.update(weights or {})
+        self.maxsize = maxsize
+        self.priorities = priorities
+        if sum(self.reserved.values()) > slots:
+            raise ValueError("Reserved slots exceed the number of slots")
         self.alive = {}
-        self._dispatcher()
+        self._queues = collections.OrderedDict(
+            (p, collections.deque()) for p in priorities)
+        self._running = {p: 0 for p in priorities}
+        self._pass = {p: 0 for p in priorities}
+        self._vtime = 0
+        self._dispatching = False
+        self._not_full = Condition()
 
     @gen.coroutine
-    def put(self, task, now=time.time()):
-        """ Put a job to the queue """
+    def put(self, task, now=time.time(), priority="interactive"):
+        """ Put a job to the queue
+
+        Args:
+            task (flashflood.core.task.Task): task
+            priority (str): priority class of the task
+        """
+        if priority not in self._queues:
+            raise ValueError("Unknown priority {}".format(priority))
+        while self.maxsize and self.qsize() >= self.maxsize:
+            yield self._not_full.wait()
         self.alive[task.id] = task
         task.on_submit()
-        yield self.queue.put(task)
+        if not self._queues[priority]:
+            # Idle class does not accumulate credits
+            self._pass[priority] = max(self._pass[priority], self._vtime)
+        self._queues[priority].append(task)
+        IOLoop.current().add_callback(self._dispatch)
 
     def get(self, id_):
         try:
@@ -36,14 +91,64 @@ class JobQueue(object):
         if task.status == "ready":
             task.status = "cancelled"
 
-    @gen.coroutine
-    def _dispatcher(self):
+    def qsize(self):
+        """Returns the number of queued tasks"""
+        return sum(len(q) for q in self._queues.values())
+
+    def status(self):
+        """Returns the numbers of running and queued tasks of each class"""
+        return {
+            p: {"running": self._running[p], "queued": len(self._queues[p])}
+            for p in self.priorities
+        }
+
+    def _available(self, priority):
+        """Whether a task of the class can be started now"""
+        running = sum(self._running.values())
+        if running >= self.slots:
+            return False
+        # Slots reserved for the other classes and not in use
+        keep = sum(
+            max(0, n - self._running[p]) for p, n in self.reserved.items()
+            if p != priority)
+        return running + keep < self.slots
+
+    def _dispatch(self):
+        if self._dispatching:
+            return  # tasks finished synchronously are handled by the loop
+        self._dispatching = True
+        try:
+            self._dispatch_loop()
+        finally:
+            self._dispatching = False
+
+    def _dispatch_loop(self):
         while 1:
-            task = yield self.queue.get()
+            candidates = [
+                p for p, q in self._queues.items()
+                if q and self._available(p)]
+            if not candidates:
+                return
+            # min() returns the first one of the tie (higher priority)
+            priority = min(candidates, key=lambda p: self._pass[p])
+            task = self._queues[priority].popleft()
+            self._not_full.notify()
             if task.status == "cancelled":
+                del self.alive[task.id]
                 continue
+            self._vtime = self._pass[priority]
+            self._pass[priority] += 1 / self.weights[priority]
+            self._run(task, priority)
+
+    @gen.coroutine
+    def _run(self, task, priority):
+        self._running[priority] += 1
+        try:
             yield task.run()
+        finally:
+            self._running[priority] -= 1
             del self.alive[task.id]
+            self._dispatch()
 
     def tasks_iter(self):
         return self.alive.values()
@@ -9,7 +9,8 @@ import pickle
 from tornado import gen
 
 from flashflood import functional
-from flashflood.core.edge import IterEdge, FuncEdge, AsyncEdge
+from flashflood.core import batch
+from flashflood.core.edge import IterEdge, FuncEdge, AsyncEdge, BatchEdge
 from flashflood.core.task import TaskSpecs, InvalidOperationError
 from flashflood.lod import ListOfDict
 
@@ -26,7 +27,8 @@ class Node(TaskSpecs):
             `flashflood.core.workflow.Workflow`
         fields (flashflood.lod.ListOfDict): data fields
         params (dict): workflow variable dict
-        interval (float): worker thread loop interval time (in second)
+        interval (float): deprecated. Nodes no longer poll edges, so this
+            is not used. Kept for compatibility with existing workflows.
     """
     def __init__(self, fields=None, params=None):
         self.node_num = None
@@ -78,7 +80,13 @@ class Node(TaskSpecs):
         return self._out_edge
 
     def edge_type(self, edge):
-        """Returns edge type of the given Edge object"""
+        """Returns edge type of the given Edge object
+
+        BatchEdge is regarded as IterEdge, so that nodes which do not support
+        record batches can read records from it.
+        """
+        if isinstance(edge, BatchEdge):
+            return "IterEdge"
         return type(edge).__name__
 
     def merge_fields(self):
@@ -118,29 +126,27 @@ class IterNode(Node):
     def run(self, on_finish, on_abort):
         if self.edge_type(self._in_edge) == "AsyncEdge":
             self.synchronizer()
-        while 1:
-            if self._in_edge.status == "aborted":
-                yield self._out_edge.abort()
-                on_abort()
-                break
-            if self._in_edge.status == "done":
-                if self.edge_type(self._in_edge) == "IterEdge":
-                    self._out_edge.send(self.processor(self._in_edge.records))
-                elif self.edge_type(self._in_edge) == "FuncEdge":
-                    self._out_edge.send(self.processor(
-                        map(self._in_edge.func, self._in_edge.records)))
-                else:
-                    self._out_edge.send(self.processor(self._rcds_tmp))
-                on_finish()
-                break
-            yield gen.sleep(self.interval)
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "IterEdge":
+            self._out_edge.send(self.processor(self._in_edge.records))
+        elif self.edge_type(self._in_edge) == "FuncEdge":
+            self._out_edge.send(self.processor(
+                map(self._in_edge.func, self._in_edge.records)))
+        else:
+            self._out_edge.send(self.processor(self._rcds_tmp))
+        on_finish()
 
     @gen.coroutine
     def synchronizer(self):
         self._rcds_tmp = []
         while 1:
-            in_ = yield self._in_edge.get()
-            self._rcds_tmp.append(in_)
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self._rcds_tmp.extend(in_)
+            self._in_edge.task_done(len(in_))
 
     def processor(self, rcds):
         for r in rcds:
@@ -155,6 +161,9 @@ class FuncNode(Node):
     function to the downstream. FuncNode.func should be picklable to be
     compatible with multiprocess computing (see ConcurrentNode).
 
+    Functions of a FuncEdge chain are fused by `flashflood.functional.fuse`,
+    so that built-in field operations copy each record only once.
+
     Args:
         func: function to be applied.
         sampler (flashflood.core.container.Sampler): record sampler
@@ -174,29 +183,27 @@ class FuncNode(Node):
     def run(self, on_finish, on_abort):
         if self.edge_type(self._in_edge) == "AsyncEdge":
             self.synchronizer()
-        while 1:
-            if self._in_edge.status == "aborted":
-                yield self._out_edge.abort()
-                on_abort()
-                break
-            if self._in_edge.status == "done":
-                if self.edge_type(self._in_edge) == "IterEdge":
-                    self._out_edge.send(self.func, self._in_edge.records)
-                elif self.edge_type(self._in_edge) == "FuncEdge":
-                    func = functional.compose(self.func, self._in_edge.func)
-                    self._out_edge.send(func, self._in_edge.records)
-                else:
-                    self._out_edge.send(self.func, self._rcds_tmp)
-                on_finish()
-                break
-            yield gen.sleep(self.interval)
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "IterEdge":
+            self._out_edge.send(self.func, self._in_edge.records)
+        elif self.edge_type(self._in_edge) == "FuncEdge":
+            func = functional.fuse(self.func, self._in_edge.func)
+            self._out_edge.send(func, self._in_edge.records)
+        else:
+            self._out_edge.send(self.func, self._rcds_tmp)
+        on_finish()
 
     @gen.coroutine
     def synchronizer(self):
         self._rcds_tmp = []
         while 1:
-            in_ = yield self._in_edge.get()
-            self._rcds_tmp.append(in_)
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self._rcds_tmp.extend(in_)
+            self._in_edge.task_done(len(in_))
 
 
 class AsyncNode(Node):
@@ -215,30 +222,28 @@ class AsyncNode(Node):
 
     Args:
         sampler (flashflood.core.container.Sampler): record sampler
+        capacity (int): queue capacity of the outgoing AsyncEdge
         **kwargs: kwargs
     """
-    def __init__(self, sampler=None, **kwargs):
+    def __init__(self, sampler=None, capacity=None, **kwargs):
         super().__init__(**kwargs)
-        self._out_edge = AsyncEdge(sampler)
+        self._out_edge = AsyncEdge(sampler, capacity)
         self._interrupted = False
 
     @gen.coroutine
     def run(self, on_finish, on_abort):
         if self.edge_type(self._in_edge) == "AsyncEdge":
             self.async_loop()
-        while 1:
-            if self._in_edge.status == "aborted":
-                yield self._out_edge.abort()
-                on_abort()
-                break
-            if self._in_edge.status == "done":
-                if self.edge_type(self._in_edge) == "AsyncEdge":
-                    yield self._out_edge.done()
-                    on_finish()
-                else:
-                    yield self.asynchronizer(on_finish, on_abort)
-                break
-            yield gen.sleep(self.interval)
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            yield self._out_edge.done()
+            on_finish()
+        else:
+            yield self.asynchronizer(on_finish, on_abort)
 
     def interrupt(self):
         self._interrupted = True
@@ -246,8 +251,10 @@ class AsyncNode(Node):
     @gen.coroutine
     def async_loop(self):
         while 1:
-            in_ = yield self._in_edge.get()
-            yield self._out_edge.put(self.process_record(in_))
+            in_ = yield self._in_edge.get_many(task_done=False)
+            yield self._out_edge.put_many(
+                [self.process_record(r) for r in in_])
+            self._in_edge.task_done(len(in_))
 
     @gen.coroutine
     def asynchronizer(self, on_finish, on_abort):
@@ -266,3 +273,65 @@ class AsyncNode(Node):
 
     def process_record(self, rcd):
         return rcd
+
+
+class BatchNode(Node):
+    """Columnar batch worker node class
+
+    BatchNode has BatchEdge as the outgoing edge and sends iterator of
+    `flashflood.core.batch.RecordBatch` to the downstream. Records from
+    IterEdge, FuncEdge and AsyncEdge are split into batches of
+    ``batch_size``, so BatchNode can be used to start a chain of batch nodes.
+    Downstream nodes which are not batch-aware receive records.
+
+    BatchNode itself does not change contents of data records. Overriding
+    BatchNode.process_batch method may be a good practice to implement
+    vectorized operations on whole columns.
+
+    Args:
+        batch_size (int): number of records in a batch
+        sampler (flashflood.core.container.Sampler): record sampler
+        **kwargs: kwargs
+    """
+    def __init__(self, batch_size=10000, sampler=None, **kwargs):
+        super().__init__(**kwargs)
+        self._out_edge = BatchEdge(sampler)
+        self.batch_size = batch_size
+        self._rcds_tmp = None
+
+    @gen.coroutine
+    def run(self, on_finish, on_abort):
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            self.synchronizer()
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        if isinstance(self._in_edge, BatchEdge):
+            batches = self._in_edge.batches
+        elif self.edge_type(self._in_edge) == "IterEdge":
+            batches = batch.batched(self._in_edge.records, self.batch_size)
+        elif self.edge_type(self._in_edge) == "FuncEdge":
+            batches = batch.batched(
+                map(self._in_edge.func, self._in_edge.records),
+                self.batch_size)
+        else:
+            batches = batch.batched(self._rcds_tmp, self.batch_size)
+        self._out_edge.send(self.processor(batches))
+        on_finish()
+
+    @gen.coroutine
+    def synchronizer(self):
+        self._rcds_tmp = []
+        while 1:
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self._rcds_tmp.extend(in_)
+            self._in_edge.task_done(len(in_))
+
+    def processor(self, batches):
+        for b in batches:
+            yield self.process_batch(b)
+
+    def process_batch(self, batch):
+        return batch
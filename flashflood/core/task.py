@@ -9,6 +9,7 @@ import uuid
 import warnings
 
 from tornado import gen
+from tornado.locks import Event
 
 from flashflood import debug
 
@@ -53,6 +54,7 @@ class Task(object):
         self.start_time = None
         self.finish_time = None
         self.verbose = verbose
+        self._closed = Event()
         if self.verbose:
             self.specs.verbose = True
 
@@ -92,6 +94,7 @@ class Task(object):
         self.finish_time = round(time.time() - self.start_time, 3)
         self.specs.on_finish()
         self.status = "done"
+        self._closed.set()
         if self.verbose:
             print("Finished task: {}".format(self.name))
 
@@ -112,9 +115,29 @@ class Task(object):
         self.finish_time = round(time.time() - self.start_time, 3)
         self.specs.on_abort()
         self.status = "aborted"
+        self._closed.set()
         if self.verbose:
             print("Aborted task: {}".format(self.name))
 
+    @gen.coroutine
+    def wait(self):
+        """Waits until the task is done or aborted"""
+        yield self._closed.wait()
+
+    def metrics(self):
+        """Runtime metrics of the task
+
+        Returns:
+            dict: task status, execution time and metrics of each node
+            (see `flashflood.core.workflow.Workflow.node_metrics`)
+        """
+        return {
+            "name": self.name,
+            "status": self.status,
+            "execution_time": self.execution_time(),
+            "nodes": self.specs.node_metrics()
+        }
+
     def size(self):
         """Total size of objects which are bound to the task"""
         return debug.total_size(self)
@@ -158,3 +181,7 @@ class TaskSpecs(object):
     def on_abort(self):
         """Implementation of Task.on_abort"""
         raise NotImplementedError()
+
+    def node_metrics(self):
+        """Implementation of Task.metrics"""
+        return []
@@ -0,0 +1,156 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+from concurrent import futures as cf
+import threading
+
+from flashflood import functional
+from flashflood import static
+
+
+class WorkerPool(object):
+    """Managed process pool shared by concurrent nodes
+
+    WorkerPool keeps worker processes alive across tasks, so that concurrent
+    nodes do not pay process startup and module import costs on every run.
+    The underlying executor is replaced with a fresh one after
+    ``processes * max_tasks_per_worker`` tasks to release memory held by
+    long-lived workers.
+
+    Args:
+        processes (int): number of worker processes
+        max_tasks_per_worker (int): tasks per worker before recycling the
+            workers. If None, workers are never recycled.
+
+    Attributes:
+        processes (int): number of worker processes
+        max_tasks_per_worker (int): tasks per worker before recycling
+        submitted (int): number of submitted tasks
+        completed (int): number of completed tasks
+        recycled (int): number of executor recycling
+    """
+    def __init__(self, processes=static.PROCESSES, max_tasks_per_worker=None):
+        self.processes = processes
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.submitted = 0
+        self.completed = 0
+        self.recycled = 0
+        self._executor = None
+        self._executor_tasks = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Spawns worker processes and waits until they are ready"""
+        with self._lock:
+            executor = self._get_executor()
+        fs = [executor.submit(functional.identity, i)
+              for i in range(self.processes)]
+        cf.wait(fs)
+
+    def submit(self, func, *args):
+        """Submits a task to the worker processes
+
+        Args:
+            func (callable): picklable function to be applied
+            *args: picklable arguments
+
+        Returns:
+            concurrent.futures.Future: result future
+        """
+        with self._lock:
+            executor = self._get_executor()
+            self._executor_tasks += 1
+            self._pending += 1
+            self.submitted += 1
+            future = executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def shutdown(self, wait=True):
+        """Shuts down worker processes"""
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self._executor_tasks = 0
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def status(self):
+        """Returns pool usage summary
+
+        Returns:
+            dict: ``queued`` is the number of tasks waiting for an idle
+            worker and ``utilization`` is the ratio of busy workers
+        """
+        with self._lock:
+            running = min(self._pending, self.processes)
+            return {
+                "processes": self.processes,
+                "running": running,
+                "queued": self._pending - running,
+                "utilization": running / self.processes,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "recycled": self.recycled
+            }
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = cf.ProcessPoolExecutor(self.processes)
+            self._executor_tasks = 0
+        elif self.max_tasks_per_worker is not None and \
+                self._executor_tasks >= \
+                self.processes * self.max_tasks_per_worker:
+            # Pending tasks of the old executor are still processed
+            self._executor.shutdown(wait=False)
+            self._executor = cf.ProcessPoolExecutor(self.processes)
+            self._executor_tasks = 0
+            self.recycled += 1
+        return self._executor
+
+    def _on_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+
+_shared_pool = None
+
+
+def shared_pool():
+    """Returns the server-wide WorkerPool.
+
+    The pool will be created with default settings and warmed up by
+    `WorkerPool.start` at the first call if `set_shared_pool` was not called
+    in advance. Servers should call this (or `set_shared_pool`) on startup,
+    so that the first job does not pay process startup and module import
+    costs.
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = WorkerPool()
+        _shared_pool.start()
+    return _shared_pool
+
+
+def set_shared_pool(pool, start=True):
+    """Replaces the server-wide WorkerPool
+
+    This should be called on server startup (ex. to change pool size).
+    The previous pool will be shut down after its pending tasks are done.
+
+    Args:
+        pool (WorkerPool): new worker pool
+        start (bool): if True, worker processes are spawned and warmed up
+            before returning
+    """
+    global _shared_pool
+    if _shared_pool is not None and _shared_pool is not pool:
+        _shared_pool.shutdown(wait=False)
+    _shared_pool = pool
+    if start:
+        pool.start()
@@ -7,6 +7,7 @@
 from tornado import gen
 
 from flashflood import graph
+from flashflood.core.edge import AsyncEdge
 from flashflood.core.task import Task, TaskSpecs, InvalidOperationError
 
 
@@ -19,7 +20,10 @@ class Workflow(TaskSpecs):
         tasks (list): list of tasks in order of execution
         preds (dict): workflow graph connection (predecessors)
         succs (dict): workflow graph connection (successors)
-        interval (float): worker thread loop interval time (in second)
+        interval (float): deprecated. Nodes no longer poll edges, so this
+            is not used. It is still passed to the nodes for compatibility.
+        queue_capacity (int): default capacity of AsyncEdge queues. This will
+            be applied to AsyncEdges whose capacity is not set explicitly.
         verbose (bool): if verbose output is generated or not
     """
     def __init__(self):
@@ -28,26 +32,19 @@ class Workflow(TaskSpecs):
         self.preds = {}
         self.succs = {}
         self.interval = 0.5
+        self.queue_capacity = None
         self.verbose = False
         self._interrupted = False
-        self._aborting = False
 
     @gen.coroutine
     def run(self, on_finish, on_abort):
         for task in self.tasks:
             task.run()
-        while 1:
-            if self._interrupted and not self._aborting:
-                for n in self.nodes:
-                    n.interrupt()
-                self._aborting = True
-            if all(t.status != "running" for t in self.tasks):
-                if self._aborting:
-                    on_abort()
-                else:
-                    on_finish()
-                return
-            yield gen.sleep(self.interval)
+        yield [t.wait() for t in self.tasks]
+        if self._interrupted:
+            on_abort()
+        else:
+            on_finish()
 
     def on_submit(self):
         self.build_workflow()
@@ -60,10 +57,66 @@ class Workflow(TaskSpecs):
 
     def interrupt(self):
         self._interrupted = True
+        for n in self.nodes:
+            n.interrupt()
 
     def on_abort(self):
         pass
 
+    def node_metrics(self):
+        """Runtime metrics of each node
+
+        Records are counted on the edges. Note that records of IterEdge and
+        FuncEdge are processed lazily by the downstream node, so the wall
+        time of the computation is attributed to the node which consumes
+        them (typically AsyncNode or writer nodes).
+
+        Returns:
+            list: dict for each node in order of execution
+
+            * node_num (int): node number
+            * name (str): node class name
+            * status (str): task status of the node
+            * wall_time (float): wall time (in second)
+            * records_in (int): records received from the upstream
+            * records_out (int): records sent to the downstream
+              (None for output nodes)
+            * blocked_upstream (float): time (in second) waiting for records
+              from the upstream AsyncEdge
+            * blocked_downstream (float): time (in second) blocked by the
+              full downstream AsyncEdge
+            * peak_queue (int): peak occupancy of the downstream AsyncEdge
+            * nodes (list): metrics of the nodes of the sub workflow
+        """
+        edges = []
+        for up in self.succs:
+            for down in self.succs[up]:
+                edge = self.nodes[up].out_edge(self.preds[down][up])
+                edges.append((up, down, edge))
+        result = []
+        for task in self.tasks:
+            node = task.specs
+            in_ = [e.metrics() for u, d, e in edges if d == node.node_num]
+            out = {id(e): e.metrics() for u, d, e in edges
+                   if u == node.node_num}
+            out = list(out.values())
+            result.append({
+                "node_num": node.node_num,
+                "name": type(node).__name__,
+                "status": task.status,
+                "wall_time": task.execution_time(),
+                "records_in": sum(m["count"] for m in in_),
+                "records_out": sum(m["count"] for m in out) if out else None,
+                "blocked_upstream": sum(m.get("get_wait", 0) for m in in_),
+                "blocked_downstream": sum(
+                    m.get("put_wait", 0) for m in out),
+                "peak_queue": max(
+                    [m["peak_size"] for m in out if "peak_size" in m],
+                    default=None),
+                "nodes": node.node_metrics()
+            })
+        return result
+
     def connect(self, up, down, up_port=0, down_port=0):
         """Adds a workflow connection
 
@@ -121,13 +174,20 @@ class Workflow(TaskSpecs):
             order = graph.topological_sort(self.succs, self.preds)
             for up in order:
                 self.nodes[up].interval = self.interval
+                if isinstance(self.nodes[up], Workflow) and \
+                        self.nodes[up].queue_capacity is None:
+                    self.nodes[up].queue_capacity = self.queue_capacity
                 task = Task(self.nodes[up], verbose=self.verbose)
                 self.tasks.append(task)
                 task.on_submit()
                 for down, dport in self.succs[up].items():
                     uport = self.preds[down][up]
-                    self.nodes[down].add_in_edge(
-                        self.nodes[up].out_edge(uport), dport)
+                    edge = self.nodes[up].out_edge(uport)
+                    if self.queue_capacity is not None and \
+                            isinstance(edge, AsyncEdge) and \
+                            edge.capacity is None:
+                        edge.resize(self.queue_capacity)
+                    self.nodes[down].add_in_edge(edge, dport)
 
 
 class SubWorkflow(Workflow):
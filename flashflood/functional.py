@@ -5,6 +5,7 @@
 #
 
 import functools
+import itertools
 
 
 def identity(x):
@@ -22,3 +23,111 @@ def _compose2(f, g):
 def compose(*funcs):
     """Function composition"""
     return functools.reduce(_compose2, funcs, identity)
+
+
+# Record functions which can be fused by `fuse`
+_INPLACE = {}  # copying function -> in-place variant
+_COPYING = {}  # in-place variant -> copying function
+_BUILDERS = set()  # functions which return a newly built record
+
+
+def register_inplace(func, inplace_func):
+    """Registers the in-place variant of a record function
+
+    Args:
+        func: record function which returns a modified copy of the record
+            (the record should be the last argument)
+        inplace_func: function which takes the same arguments, modifies the
+            record in place and returns it
+    """
+    _INPLACE[func] = inplace_func
+    _COPYING[inplace_func] = func
+
+
+def register_builder(func):
+    """Registers a record function which returns a newly built record
+
+    Records returned by the function can be modified in place by the
+    following fused functions without copying.
+    """
+    _BUILDERS.add(func)
+
+
+def _base(func):
+    return func.func if isinstance(func, functools.partial) else func
+
+
+def _swap(func, table):
+    """Replaces the function (or the function of the partial object)"""
+    if isinstance(func, functools.partial):
+        return functools.partial(
+            table[func.func], *func.args, **func.keywords)
+    return table[func]
+
+
+def _flatten(func):
+    """Returns composed functions in order of application"""
+    if func is identity:
+        return []
+    if isinstance(func, functools.partial):
+        if func.func is _compose3:
+            f, g = func.args
+            return _flatten(g) + _flatten(f)
+        if func.func is _apply_fused:
+            return [_swap(f, _COPYING) if _base(f) in _COPYING else f
+                    for f in func.args[0] if f is not dict.copy]
+    return [func]
+
+
+def _apply_fused(funcs, row):
+    for f in funcs:
+        row = f(row)
+    return row
+
+
+def fuse(*funcs):
+    """Composes record functions with the fewest record copies
+
+    This works like `compose`, but registered copying record functions
+    (see `register_inplace`) are replaced with their in-place variants.
+    The record is copied only once before the first in-place function,
+    and again only after an unregistered function which may return the
+    record it received. The fused function is picklable if the given
+    functions are picklable.
+
+    Args:
+        *funcs: functions (applied from the last one like `compose`)
+
+    Returns:
+        callable: fused function
+    """
+    flat = []
+    for f in reversed(funcs):
+        flat.extend(_flatten(f))
+    if not flat:
+        return identity
+    if len(flat) == 1:
+        return flat[0]
+    steps = []
+    owned = False
+    for f in flat:
+        base = _base(f)
+        if base in _INPLACE:
+            if not owned:
+                steps.append(dict.copy)
+                owned = True
+            steps.append(_swap(f, _INPLACE))
+        else:
+            steps.append(f)
+            owned = base in _BUILDERS
+    return functools.partial(_apply_fused, tuple(steps))
+
+
+def chunked(iterable, size):
+    """Splits iterable into lists of the given size"""
+    it = iter(iterable)
+    while 1:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
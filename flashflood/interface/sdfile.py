@@ -0,0 +1,225 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import array
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+
+from chorus import v2000reader
+
+
+# Sidecar index file: header (magic, file size, file mtime_ns, number of
+# records) followed by record offsets in little-endian uint64
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"FFSDFIX1"
+INDEX_HEADER = struct.Struct("<8sQQQ")
+
+RECORD_END = re.compile(rb"^\$\$\$\$[^\n]*(?:\n|$)", re.MULTILINE)
+
+
+def scan_offsets(buf):
+    """Returns offsets of the records delimited by ``$$$$`` lines
+
+    Args:
+        buf (bytes-like): SDFile contents (ex. mmap.mmap)
+
+    Returns:
+        array.array: start offsets of the records followed by the end offset
+        of the last record. Trailing text without ``$$$$`` is regarded as a
+        record unless it is blank.
+    """
+    offsets = array.array("Q", [0])
+    for m in RECORD_END.finditer(buf):
+        offsets.append(m.end())
+    if buf[offsets[-1]:].strip():
+        offsets.append(len(buf))
+    return offsets
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class SDFileIndex(object):
+    """Record offset index of a memory-mapped SDFile
+
+    The index is persisted as a sidecar file (``<path>.idx`` by default) and
+    reused unless the SDFile was modified, so that records can be accessed
+    randomly without parsing the records before them. The index is not
+    persisted if the sidecar file cannot be written.
+
+    Args:
+        path (str): SDFile path
+        index_path (str): sidecar index file path
+        persist (bool): if False, the index is neither loaded nor saved
+
+    Attributes:
+        path (str): SDFile path
+        index_path (str): sidecar index file path
+        offsets (array.array): start offsets of the records followed by the
+            end offset of the last record
+    """
+    def __init__(self, path, index_path=None, persist=True):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.persist = persist
+        with open(path, "rb") as f:
+            # Empty files cannot be mapped
+            if os.fstat(f.fileno()).st_size:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mm = b""
+        self.offsets = self.load() if persist else None
+        if self.offsets is None:
+            self.offsets = scan_offsets(self._mm)
+            if persist:
+                self.save()
+
+    def load(self):
+        """Returns offsets in the sidecar file (None if missing or stale)"""
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                magic, size, mtime, count = INDEX_HEADER.unpack(header)
+                if magic != INDEX_MAGIC \
+                        or (size, mtime) != _signature(self.path):
+                    return
+                offsets = array.array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, struct.error, ValueError):
+            return
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        if len(offsets) != count + 1:
+            return
+        return offsets
+
+    def save(self):
+        """Writes the offsets to the sidecar file
+
+        Returns:
+            bool: False if the file cannot be written
+        """
+        size, mtime = _signature(self.path)
+        offsets = array.array("Q", self.offsets)
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        dirname = os.path.dirname(os.path.abspath(self.index_path))
+        try:
+            fd, tmp = tempfile.mkstemp(dir=dirname)
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(INDEX_HEADER.pack(
+                    INDEX_MAGIC, size, mtime, len(self.offsets) - 1))
+                f.write(offsets.tobytes())
+            # Readers never see a partially written index
+            os.replace(tmp, self.index_path)
+        except OSError:
+            os.remove(tmp)
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, key):
+        """Returns the record text (bytes) or a list of them (slicing)"""
+        if isinstance(key, slice):
+            return [self[i] for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("record index out of range")
+        return self._mm[self.offsets[key]:self.offsets[key + 1]]
+
+    def byte_range(self, start, stop=None):
+        """Returns the byte range (begin, end) of the records
+
+        Args:
+            start (int): index of the first record
+            stop (int): index after the last record (default: start + 1)
+        """
+        if start < 0:
+            start += len(self)
+        if stop is None:
+            stop = start + 1
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        return self.offsets[start], self.offsets[stop]
+
+    def shards(self, n):
+        """Splits the file into byte ranges of nearly equal number of records
+
+        Args:
+            n (int): number of shards
+
+        Returns:
+            list: (begin, end) byte ranges (empty shards are omitted)
+        """
+        size, extra = divmod(len(self), n)
+        ranges = []
+        start = 0
+        for i in range(n):
+            stop = start + size + (i < extra)
+            if stop > start:
+                ranges.append(self.byte_range(start, stop))
+            start = stop
+        return ranges
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Memory maps opened by read_range (kept per process for worker processes)
+_MAPPED = {}
+_MAPPED_LOCK = threading.Lock()
+
+
+def read_range(path, begin, end):
+    """Returns bytes in the range of the file
+
+    The file is memory-mapped once per process and remapped if it was
+    modified, so that workers can read byte ranges cheaply.
+    """
+    if begin >= end:
+        return b""
+    sig = _signature(path)
+    with _MAPPED_LOCK:
+        found = _MAPPED.get(path)
+        if found is None or found[0] != sig:
+            if found is not None:
+                found[1].close()
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            found = _MAPPED[path] = (sig, mm)
+        return found[1][begin:end]
+
+
+def mols_from_range(path, begin, end, no_halt=True, assign_descriptors=True):
+    """Generates molecules in the byte range of the SDFile
+
+    The range should start and end at record boundaries
+    (see `SDFileIndex.byte_range` and `SDFileIndex.shards`).
+    """
+    text = read_range(path, begin, end)
+    if text:
+        yield from v2000reader.mols_from_text(
+            text, no_halt, assign_descriptors)
@@ -4,30 +4,160 @@
 # http://opensource.org/licenses/MIT
 #
 
+import collections
+import os
 import sqlite3
+import threading
+from urllib.request import pathname2url
 
+from flashflood import functional
 
-class Connection(object):
-    def __init__(self, path):
-        con = sqlite3.connect(path)
+
+# SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds
+MAX_VARIABLES = 999
+
+
+class ConnectionPool(object):
+    """Pool of SQLite connections keyed by database file path
+
+    Opened connections are kept and reused by later `Connection` objects to
+    skip file open and schema parsing costs. As sqlite3 connections cannot
+    be shared among threads, each thread has its own set of connections and
+    ``max_size`` bounds the number of files kept open by each thread. The
+    least recently used connection is released from the pool if the bound
+    is exceeded. A connection is reopened if the file was replaced or
+    modified (ex. rebuilt by SQLiteWriter).
+
+    Released connections are not closed explicitly, as lazy query
+    generators (ex. `Connection.rows_iter`) may still use them. They are
+    closed by the garbage collector when no longer referenced.
+
+    Args:
+        max_size (int): maximum number of open files per thread
+        read_only (bool): if True, open files in read-only URI mode
+        mmap_size (int): PRAGMA mmap_size in bytes. If None, the SQLite
+            default is used.
+        cache_size (int): PRAGMA cache_size (number of pages if positive,
+            size in KiB if negative). If None, the SQLite default is used.
+    """
+    def __init__(self, max_size=16, read_only=True, mmap_size=None,
+                 cache_size=None):
+        self.max_size = max_size
+        self.read_only = read_only
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self._local = threading.local()
+
+    def connect(self, path):
+        """Returns a pooled sqlite3 connection of the current thread
+
+        Args:
+            path (str): database file path
+
+        Returns:
+            sqlite3.Connection: connection with sqlite3.Row row factory
+        """
+        path = os.path.abspath(path)
+        conns = self._connections()
+        stat = os.stat(path)
+        signature = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        if path in conns:
+            con, sig = conns[path]
+            if sig == signature:
+                conns.move_to_end(path)
+                return con
+            # The old connection may still be used by generators
+            del conns[path]
+        con = self._open(path)
+        conns[path] = (con, signature)
+        while len(conns) > self.max_size:
+            conns.popitem(last=False)
+        return con
+
+    def close_all(self):
+        """Releases all connections of the current thread
+
+        Connections are closed when they are no longer referenced.
+        """
+        self._connections().clear()
+
+    def _connections(self):
+        if not hasattr(self._local, "conns"):
+            self._local.conns = collections.OrderedDict()
+        return self._local.conns
+
+    def _open(self, path):
+        if self.read_only:
+            uri = "file:{}?mode=ro".format(pathname2url(path))
+            con = sqlite3.connect(uri, uri=True)
+        else:
+            con = sqlite3.connect(path)
         con.row_factory = sqlite3.Row
-        self._cursor = con.cursor()
+        if self.mmap_size is not None:
+            con.execute("PRAGMA mmap_size = {:d}".format(self.mmap_size))
+        if self.cache_size is not None:
+            con.execute("PRAGMA cache_size = {:d}".format(self.cache_size))
+        return con
+
+
+_shared_pool = None
+
+
+def shared_pool():
+    """Returns the process-wide ConnectionPool.
+
+    The pool will be created with default settings at the first call if
+    `set_shared_pool` was not called in advance.
+    """
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = ConnectionPool()
+    return _shared_pool
+
+
+def set_shared_pool(pool):
+    """Replaces the process-wide ConnectionPool
+
+    This should be called on server startup (ex. to change mmap_size).
+
+    Args:
+        pool (ConnectionPool): new connection pool
+    """
+    global _shared_pool
+    _shared_pool = pool
+
+
+class Connection(object):
+    """SQLite database connection
+
+    Args:
+        path (str): database file path
+        pool (ConnectionPool): if given, reuse the connection of the pool
+            instead of opening a new one
+    """
+    def __init__(self, path, pool=None):
+        if pool is not None:
+            self._con = pool.connect(path)
+        else:
+            self._con = sqlite3.connect(path)
+            self._con.row_factory = sqlite3.Row
 
     def columns(self, table):
         """Returns list of columns"""
         return [
-            row["name"] for row in self._cursor.execute(
+            row["name"] for row in self._con.execute(
                 "pragma table_info('{}')".format(table)
             )
         ]
 
     def fetch_iter(self, query, values=(), arraysize=1000):
         """Execute custom fetch query"""
-        self._cursor.execute(query, values)
+        # Each query has its own cursor as the connection may be shared
+        cur = self._con.execute(query, values)
         while True:
             # successive fetchmany(arraysize) instead of fetchAll()
             # improved performance and memory consumption
-            rows = self._cursor.fetchmany(arraysize)
+            rows = cur.fetchmany(arraysize)
             if not rows:
                 break
             for row in rows:
@@ -35,8 +165,7 @@ class Connection(object):
 
     def fetch_one(self, query, values=()):
         """Execute custom fetch query"""
-        self._cursor.execute(query, values)
-        row = self._cursor.fetchone()
+        row = self._con.execute(query, values).fetchone()
         if row is not None:
             return dict(row)
 
@@ -73,3 +202,31 @@ class Connection(object):
         return self.fetch_one(
             "SELECT * FROM {} WHERE {} = ?".format(table, key), values=(value,)
         )
+
+    def find_many(self, table, key, values, chunksize=MAX_VARIABLES // 2):
+        """find records matching any of the values
+
+        Values are queried in chunks of ``chunksize`` with one query per
+        chunk. Matching is done in the same manner as `find_first`
+        (including column affinity conversion of the values).
+
+        Args:
+            table (str): table name
+            key (str): column name
+            values (iterable): values to find
+            chunksize (int): number of values per query
+
+        Yields:
+            tuple: (position of the matched value in ``values``, row dict)
+        """
+        for i, chunk in enumerate(functional.chunked(values, chunksize)):
+            offset = i * chunksize
+            query = (
+                "WITH q(pos, val) AS (VALUES {}) "
+                "SELECT q.pos, t.* FROM q JOIN {} AS t ON t.{} = q.val"
+            ).format(", ".join(["(?, ?)"] * len(chunk)), table, key)
+            params = []
+            for j, v in enumerate(chunk):
+                params.extend((offset + j, v))
+            for row in self._con.execute(query, params).fetchall():
+                yield row[0], dict(zip(row.keys()[1:], tuple(row)[1:]))
@@ -50,10 +50,47 @@ class ListOfDict(list):
                     return
         self.append(rcd)
 
+    def _positions(self, key):
+        """Returns dict of key value -> position of the first record
+
+        Unhashable key values are not indexed.
+        """
+        idx = {}
+        for i, r in enumerate(self):
+            try:
+                idx.setdefault(r[key], i)
+            except TypeError:
+                continue
+        return idx
+
+    def _add(self, rcd, key, dupkey, idx):
+        """Same as add but uses the position index (see _positions)"""
+        v = rcd[key]
+        try:
+            found = v in idx
+        except TypeError:
+            # Unhashable key values (ex. list) are compared one by one
+            ListOfDict.add(self, rcd, key, dupkey)
+            return
+        if found:
+            i = idx[v]
+            if dupkey == "skip":
+                return
+            if dupkey == "update":
+                self[i].update(rcd)
+                return
+            if dupkey == "replace":
+                self[i] = rcd
+                return
+        else:
+            idx[v] = len(self)
+        self.append(rcd)
+
     def reduce(self, key="key", dupkey="update"):
         """Removes records with duplicated key
 
-        Not appropriate for large data - worst case: O(n^2)
+        Records are looked up by a hash index of the key values. Unhashable
+        key values (ex. list) are compared linearly as `ListOfDict.add` does.
 
         Duplicate key (dupkey) operations
 
@@ -65,8 +102,9 @@ class ListOfDict(list):
             dupkey (str): Type of duplicate key operation
         """
         new = ListOfDict()
+        idx = {}
         for r in self:
-            new.add(r, key=key, dupkey=dupkey)
+            new._add(r, key, dupkey, idx)
         self.clear()
         self.extend(new)
 
@@ -77,14 +115,18 @@ class ListOfDict(list):
     def merge(self, rcds, key="key", dupkey="replace"):
         """Adds list of records
 
+        Records are looked up by a hash index of the key values. Unhashable
+        key values (ex. list) are compared linearly as `ListOfDict.add` does.
+
         Args:
             rcds (list): List of dict records to be added
             key (str): Record key
             dupkey (str): Type of duplicate key operation
                 (see `ListOfDict.add`)
         """
+        idx = self._positions(key)
         for r in rcds:
-            self.add(r, key=key, dupkey=dupkey)
+            self._add(r, key, dupkey, idx)
 
     def join(self, rcds, key, full_join=False):
         """Left join records
@@ -135,6 +177,103 @@ LOD = ListOfDict
 """
 
 
+class IndexedListOfDict(ListOfDict):
+    """ListOfDict with a hash index of the record key
+
+    find, add and merge by the indexed key take O(1) per record. Operations
+    by other keys fall back to ListOfDict methods. The index is maintained
+    on append and extend, and rebuilt lazily after other list operations.
+
+    Note:
+        Values of the indexed key should be hashable and should not be
+        changed in place.
+
+    Args:
+        rcds (iterable): records
+        key (str): key to be indexed
+    """
+    _index = None
+
+    def __init__(self, rcds=(), key="key"):
+        super().__init__(rcds)
+        self.key = key
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = self._positions(self.key)
+        return self._index
+
+    def index_of(self, value):
+        """Returns position of the first record with the given key value.
+        if not found, return None
+        """
+        return self._get_index().get(value)
+
+    def find(self, key, value):
+        if key != self.key:
+            return super().find(key, value)
+        i = self.index_of(value)
+        if i is not None:
+            return self[i]
+
+    def add(self, rcd, key=None, dupkey="replace"):
+        if key not in (None, self.key):
+            return super().add(rcd, key=key, dupkey=dupkey)
+        self._add(rcd, self.key, dupkey, self._get_index())
+
+    def merge(self, rcds, key=None, dupkey="replace"):
+        if key not in (None, self.key):
+            return super().merge(rcds, key=key, dupkey=dupkey)
+        idx = self._get_index()
+        for r in rcds:
+            self._add(r, self.key, dupkey, idx)
+
+    def reduce(self, key=None, dupkey="update"):
+        super().reduce(key=key or self.key, dupkey=dupkey)
+
+    def unique(self, key=None):
+        return self.reduce(key, dupkey="skip")
+
+    def append(self, rcd):
+        if self._index is not None:
+            self._index.setdefault(rcd[self.key], len(self))
+        super().append(rcd)
+
+    def extend(self, rcds):
+        for r in rcds:
+            self.append(r)
+
+    def __iadd__(self, rcds):
+        self.extend(rcds)
+        return self
+
+    def __setitem__(self, i, rcd):
+        if self._index is not None and not (
+                isinstance(i, int) and rcd[self.key] == self[i][self.key]):
+            self._index = None
+        super().__setitem__(i, rcd)
+
+    def _invalidate(method):
+        def _f(self, *args, **kwargs):
+            self._index = None
+            return method(self, *args, **kwargs)
+        return _f
+
+    __delitem__ = _invalidate(list.__delitem__)
+    clear = _invalidate(list.clear)
+    insert = _invalidate(list.insert)
+    pop = _invalidate(list.pop)
+    remove = _invalidate(list.remove)
+    reverse = _invalidate(list.reverse)
+    sort = _invalidate(list.sort)
+    del _invalidate
+
+
+IndexedLOD = IndexedListOfDict
+"""Shorthand of IndexedListOfDict
+"""
+
+
 def valuelist(lod, key):
     """Returns list of values which are assigned to the key.
 
@@ -1,6 +1,7 @@
 from flashflood.node.aggregate.first import AggFirst
+from flashflood.node.aggregate.groupby import GroupBy, AsyncGroupBy
 from flashflood.node.aggregate.list import AggList
-from flashflood.node.aggregate.sum import AggSum
+from flashflood.node.aggregate.sum import AggSum, BatchAggSum
 from flashflood.node.aggregate.uniqlist import AggUniqList
 from flashflood.node.aggregate.update import AggUpdate
 
@@ -10,43 +11,53 @@ from flashflood.node.chem.molecule import (
     PickleMolecule, UnpickleMolecule
 )
 from flashflood.node.control.filter import Filter, AsyncFilter
-from flashflood.node.control.replicate import Replicate
+from flashflood.node.control.replicate import Replicate, AsyncReplicate
 
 from flashflood.node.field.concat import ConcatFields
-from flashflood.node.field.constant import ConstantField, AsyncConstantField
+from flashflood.node.field.constant import (
+    ConstantField, AsyncConstantField, BatchConstantField
+)
 from flashflood.node.field.extend import Extend, AsyncExtend
 from flashflood.node.field.extract import Extract, AsyncExtract
 from flashflood.node.field.httpbatchrequest import AsyncHttpBatchRequest
 from flashflood.node.field.number import Number, AsyncNumber
 from flashflood.node.field.remove import (
-    RemoveField, RemoveFields, RetainFields
+    RemoveField, RemoveFields, BatchRemoveFields, RetainFields
 )
 from flashflood.node.field.split import SplitField
-from flashflood.node.field.update import UpdateFields, AsyncUpdateFields
+from flashflood.node.field.update import (
+    UpdateFields, AsyncUpdateFields, BatchUpdateFields
+)
 
 from flashflood.node.monitor.count import CountRows, AsyncCountRows
 from flashflood.node.monitor.stdout import StdoutMonitor, AsyncStdoutMonitor
 
 from flashflood.node.reader.csv import CsvReader
-from flashflood.node.reader.httpfetch import HttpFetchInput
+from flashflood.node.reader.httpfetch import (
+    HttpFetchInput, AsyncHttpFetchInput
+)
 from flashflood.node.reader.iterinput import IterInput
-from flashflood.node.reader.sdfile import SDFileReader, SDFileLinesInput
+from flashflood.node.reader.sdfile import (
+    SDFileReader, SDFileLinesInput, SDFileIndexReader, SDFileRangeInput
+)
 from flashflood.node.reader.sqlite import (
     SQLiteReader, SQLiteReaderFilter, SQLiteReaderSearch
 )
 
 from flashflood.node.record.excludes import Excludes, AsyncExcludes
-from flashflood.node.record.filter import FilterRecords, AsyncFilterRecords
+from flashflood.node.record.filter import (
+    FilterRecords, AsyncFilterRecords, BatchFilterRecords
+)
 from flashflood.node.record.includes import Includes, AsyncIncludes
 from flashflood.node.record.merge import MergeRecords, AsyncMergeRecords
 from flashflood.node.record.numericfilter import (
-    NumericFilter, AsyncNumericFilter
+    NumericFilter, AsyncNumericFilter, BatchNumericFilter
 )
 from flashflood.node.record.sort import NumericSort
 from flashflood.node.record.startswith import StartsWith, AsyncStartsWith
 
 from flashflood.node.transform.combination import Combination
-from flashflood.node.transform.join import LeftJoin
+from flashflood.node.transform.join import Join, LeftJoin
 from flashflood.node.transform.stack import Stack
 from flashflood.node.transform.unpack import Unpack
 from flashflood.node.transform.unstack import Unstack
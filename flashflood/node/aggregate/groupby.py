@@ -0,0 +1,497 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import operator
+
+from tornado import gen
+
+from flashflood import functional
+from flashflood.core import workerpool
+from flashflood.core.edge import AsyncEdge
+from flashflood.core.node import IterNode
+from flashflood.spill import SpillFile
+
+
+class Reducer(object):
+    """Aggregate function which folds values of a group into a state
+
+    Partial states of the same group (aggregated in worker processes or
+    spilled to temporary files) are combined by ``merge``. Functions should
+    be picklable (ex. module-level functions) to be used in worker
+    processes.
+
+    Args:
+        init (callable): returns the state of the first value
+        step (callable): ``step(state, value)`` returns the state updated
+            by the value. The state can be modified in place.
+        merge (callable): ``merge(state, other)`` returns the state combined
+            with the other state of the later records. If None, the reducer
+            cannot be used in the parallel mode and the spill mode.
+        result (callable): returns the aggregated value of the state
+        skip_none (bool): if True, None values are ignored and the
+            aggregated value of the group which has no value is None.
+            States of such reducers should not be None.
+        inplace (bool): if True, ``step`` modifies the state in place and
+            its return value is ignored (ex. ``list.append``)
+    """
+    def __init__(self, init, step, merge=None, result=functional.identity,
+                 skip_none=True, inplace=False):
+        self.init = init
+        self.step = step
+        self.merge = merge
+        self.result = result
+        self.skip_none = skip_none
+        self.inplace = inplace
+
+
+def _one(value):
+    return 1
+
+
+def _increment(state, value):
+    return state + 1
+
+
+def _keep(state, value):
+    return state
+
+
+def _replace(state, value):
+    return value
+
+
+def _mean_init(value):
+    return [value, 1]
+
+
+def _mean_step(state, value):
+    state[0] += value
+    state[1] += 1
+    return state
+
+
+def _mean_merge(state, other):
+    state[0] += other[0]
+    state[1] += other[1]
+    return state
+
+
+def _mean_result(state):
+    return state[0] / state[1]
+
+
+def _list_init(value):
+    return [value]
+
+
+def _extend(state, other):
+    state.extend(other)
+    return state
+
+
+def _uniq_init(value):
+    return {value: None}
+
+
+def _update(state, other):
+    state.update(other)
+    return state
+
+
+# Built-in reducers by name
+REDUCERS = {
+    "sum": Reducer(functional.identity, operator.add, operator.add),
+    "count": Reducer(_one, _increment, operator.add),
+    "min": Reducer(functional.identity, min, min),
+    "max": Reducer(functional.identity, max, max),
+    "mean": Reducer(_mean_init, _mean_step, _mean_merge, _mean_result),
+    "first": Reducer(functional.identity, _keep, _keep, skip_none=False),
+    "last": Reducer(functional.identity, _replace, _replace, skip_none=False),
+    "list": Reducer(_list_init, list.append, _extend, skip_none=False,
+                    inplace=True),
+    # dict.setdefault sets None to the new key
+    "uniq": Reducer(_uniq_init, dict.setdefault, _update, list,
+                    skip_none=False, inplace=True),
+    # Missing values cannot be merged into the dict
+    "update": Reducer(dict, dict.update, _update, inplace=True)
+}
+
+
+def register_reducer(name, reducer):
+    """Registers a reducer which can be specified by the name
+
+    Args:
+        name (str): reducer name
+        reducer (Reducer): reducer
+    """
+    REDUCERS[name] = reducer
+
+
+def get_reducer(reducer):
+    """Returns the `Reducer` of the name (or the reducer itself)
+
+    Raises:
+        ValueError: unknown reducer name
+    """
+    if isinstance(reducer, Reducer):
+        return reducer
+    try:
+        return REDUCERS[reducer]
+    except KeyError:
+        raise ValueError("Unknown reducer {}".format(reducer))
+
+
+class GroupTable(object):
+    """Hash table of aggregation states of groups
+
+    Each group is stored as a list of the first record (if
+    ``carry_fields`` is True, otherwise None) and states of the reducers.
+    Groups are in order of their first appearance.
+
+    If the number of groups exceeds ``max_groups``, all the groups are
+    hash-partitioned into temporary files and the table is cleared. Spilled
+    groups are merged partition by partition at the end, so that groups
+    are generated in order of partitions in that case.
+
+    Args:
+        key (str or list): group key. A list of keys is regarded as a
+            composite key.
+        aggs (list): list of (output key, reducer, value key) tuples. The
+            reducer is a `Reducer` or a name in `REDUCERS`. If the value key
+            is None, the record itself is the value.
+        carry_fields (bool): if True, the first record of each group is kept
+        max_groups (int): maximum number of groups held in the memory.
+            If None, groups are never spilled.
+        partitions (int): number of spill partitions
+        tmpdir (str): directory of temporary files
+    """
+    def __init__(self, key, aggs, carry_fields=False, max_groups=None,
+                 partitions=16, tmpdir=None):
+        if isinstance(key, (list, tuple)):
+            keys = tuple(key)
+            self.key_func = lambda r: tuple(map(r.get, keys))
+        else:
+            self.key_func = operator.methodcaller("get", key)
+        self.specs = [(vkey, get_reducer(red)) for _, red, vkey in aggs]
+        self.carry_fields = carry_fields
+        self.max_groups = max_groups
+        self.partitions = partitions
+        self.tmpdir = tmpdir
+        self._table = {}
+        self._parts = None
+
+    def add(self, rcd):
+        """Aggregates the record"""
+        self.add_many((rcd,))
+
+    def add_many(self, rcds):
+        """Aggregates the records"""
+        table = self._table
+        keyf = self.key_func
+        # Attributes are looked up once
+        steps = [(i, vkey, red.init, red.step, red.skip_none, red.inplace)
+                 for i, (vkey, red) in enumerate(self.specs, 1)]
+        for rcd in rcds:
+            k = keyf(rcd)
+            group = table.get(k)
+            if group is None:
+                self._add_group(k, rcd)
+                continue
+            for i, vkey, init, step, skip_none, inplace in steps:
+                v = rcd if vkey is None else rcd.get(vkey)
+                if v is None:
+                    if skip_none:
+                        continue
+                elif skip_none and group[i] is None:
+                    group[i] = init(v)
+                    continue
+                if inplace:
+                    step(group[i], v)
+                else:
+                    group[i] = step(group[i], v)
+
+    def _add_group(self, k, rcd):
+        group = [rcd if self.carry_fields else None]
+        for vkey, red in self.specs:
+            v = rcd if vkey is None else rcd.get(vkey)
+            if v is None and red.skip_none:
+                group.append(None)
+            else:
+                group.append(red.init(v))
+        self._table[k] = group
+        if self.max_groups is not None and len(self._table) > self.max_groups:
+            self.spill()
+
+    def merge(self, groups):
+        """Merges (key, group) pairs of partial aggregation of the later
+        records"""
+        for k, group in groups:
+            found = self._table.get(k)
+            if found is None:
+                self._table[k] = group
+                if self.max_groups is not None \
+                        and len(self._table) > self.max_groups:
+                    self.spill()
+            else:
+                self._merge_group(found, group)
+
+    def _merge_group(self, group, other):
+        for i, (_, red) in enumerate(self.specs, 1):
+            if other[i] is None and red.skip_none:
+                continue
+            if group[i] is None and red.skip_none:
+                group[i] = other[i]
+            else:
+                group[i] = red.merge(group[i], other[i])
+
+    def partial(self):
+        """Returns (key, group) pairs of the groups in the memory"""
+        return list(self._table.items())
+
+    def spill(self):
+        """Writes groups in the memory to the partition files"""
+        if self._parts is None:
+            self._parts = [SpillFile(dir=self.tmpdir)
+                           for _ in range(self.partitions)]
+        for k, group in self._table.items():
+            self._parts[hash(k) % self.partitions].write((k, group))
+        self._table.clear()
+
+    def groups(self):
+        """Generates (key, first record, aggregated values) of the groups
+
+        The table is cleared and temporary files are removed afterwards.
+        """
+        try:
+            if self._parts is None:
+                yield from self._results(self._table)
+                return
+            self.spill()
+            for part in self._parts:
+                # Partitions are not spilled again
+                table = {}
+                for k, group in part.read():
+                    found = table.get(k)
+                    if found is None:
+                        table[k] = group
+                    else:
+                        self._merge_group(found, group)
+                part.close()
+                yield from self._results(table)
+        finally:
+            self.close()
+
+    def _results(self, table):
+        for k, group in table.items():
+            values = []
+            for (_, red), state in zip(self.specs, group[1:]):
+                if state is None and red.skip_none:
+                    values.append(None)
+                else:
+                    values.append(red.result(state))
+            yield k, group[0], values
+
+    def close(self):
+        self._table.clear()
+        if self._parts is not None:
+            for part in self._parts:
+                part.close()
+            self._parts = None
+
+
+def partial_aggregate(key, aggs, carry_fields, func, rcds):
+    """Aggregates records in a worker process
+
+    Returns:
+        list: (key, group) pairs to be merged by `GroupTable.merge`
+    """
+    table = GroupTable(key, aggs, carry_fields)
+    table.add_many(map(func, rcds))
+    return table.partial()
+
+
+class GroupBy(IterNode):
+    """Groups records by keys and aggregates values of each group
+
+    Aggregated records are generated after all the incoming records are
+    aggregated. Records from AsyncEdge are aggregated as they arrive, so
+    that they are not held in the memory.
+
+    Example::
+
+        GroupBy(["type", "year"], [
+            ("total", "sum", "value"),
+            ("count", "count", None),
+            ("ids", "uniq", "id")
+        ])
+
+    Built-in reducers are ``sum``, ``count``, ``min``, ``max``, ``mean``,
+    ``first``, ``last``, ``list``, ``uniq`` and ``update``. ``sum``,
+    ``count``, ``min``, ``max`` and ``mean`` ignore None values. Custom
+    reducers can be given as `Reducer` objects.
+
+    In the parallel mode, chunks of the incoming records (and the function
+    of the incoming FuncEdge) are partially aggregated in worker processes
+    and merged in order of the chunks.
+
+    Args:
+        key (str or list): group key. A list of keys is regarded as a
+            composite key.
+        aggs (list): list of (output key, reducer, value key) tuples. The
+            reducer is a `Reducer` or a name of the built-in reducer. If the
+            value key is None, the record itself is the value.
+        carry_fields (bool): if True, aggregated records are copies of the
+            first record of each group without value fields of ``aggs``.
+            Otherwise, aggregated records have only the key fields and the
+            output fields.
+        parallel (bool): if True, records are aggregated in worker processes
+        chunksize (int): number of records per worker task
+        pool (flashflood.core.workerpool.WorkerPool): worker pool
+            (default: shared pool)
+        max_groups (int): maximum number of groups held in the memory. Groups
+            are spilled to temporary files beyond it, and generated in order
+            of hash partitions instead of their appearance.
+            If None, all groups are held in the memory.
+        partitions (int): number of spill partitions
+        tmpdir (str): directory of temporary files
+        **kwargs: kwargs
+
+    Raises:
+        ValueError: reducers without ``merge`` are used in the parallel mode
+            or the spill mode
+    """
+    def __init__(self, key, aggs, carry_fields=False, parallel=False,
+                 chunksize=10000, pool=None, max_groups=None, partitions=16,
+                 tmpdir=None, **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.aggs = list(aggs)
+        self.carry_fields = carry_fields
+        self.parallel = parallel
+        self.chunksize = chunksize
+        self.pool = pool
+        self._table = GroupTable(
+            key, self.aggs, carry_fields, max_groups, partitions, tmpdir)
+        if parallel or max_groups is not None:
+            for _, red in self._table.specs:
+                if red.merge is None:
+                    raise ValueError(
+                        "Reducers should have merge function to be used in "
+                        "the parallel mode or the spill mode")
+
+    @gen.coroutine
+    def run(self, on_finish, on_abort):
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            self.synchronizer()
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        self._out_edge.send(self.processor(*self.input_records()))
+        on_finish()
+
+    def input_records(self):
+        """Returns the incoming records and the function to be applied"""
+        if self.edge_type(self._in_edge) == "IterEdge":
+            return self._in_edge.records, functional.identity
+        elif self.edge_type(self._in_edge) == "FuncEdge":
+            return self._in_edge.records, self._in_edge.func
+        # Records from AsyncEdge are already aggregated
+        return (), functional.identity
+
+    @gen.coroutine
+    def synchronizer(self):
+        while 1:
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self._table.add_many(in_)
+            self._in_edge.task_done(len(in_))
+
+    def processor(self, rcds, func=functional.identity):
+        if self.parallel:
+            self._aggregate_parallel(rcds, func)
+        else:
+            self._table.add_many(map(func, rcds))
+        for k, first, values in self._table.groups():
+            yield self.make_record(k, first, values)
+
+    def _aggregate_parallel(self, rcds, func):
+        pool = self.pool or workerpool.shared_pool()
+        window = []
+        try:
+            for chunk in functional.chunked(rcds, self.chunksize):
+                window.append(pool.submit(
+                    partial_aggregate, self.key, self.aggs,
+                    self.carry_fields, func, chunk))
+                if len(window) >= pool.processes:
+                    self._table.merge(window.pop(0).result())
+            for future in window:
+                self._table.merge(future.result())
+        except BaseException:
+            self._table.close()
+            raise
+
+    def make_record(self, key, first, values):
+        """Returns the aggregated record of the group
+
+        Args:
+            key: group key (tuple of values if the key is composite)
+            first (dict): the first record of the group (None if
+                ``carry_fields`` is False)
+            values (list): aggregated values in order of ``aggs``
+        """
+        if first is not None:
+            rcd = first.copy()
+            for _, _, vkey in self.aggs:
+                rcd.pop(vkey, None)
+        elif isinstance(self.key, (list, tuple)):
+            rcd = dict(zip(self.key, key))
+        else:
+            rcd = {self.key: key}
+        for (okey, _, _), v in zip(self.aggs, values):
+            rcd[okey] = v
+        return rcd
+
+
+class AsyncGroupBy(GroupBy):
+    """`GroupBy` which has AsyncEdge as the outgoing edge
+
+    Args:
+        key (str or list): group key
+        aggs (list): list of (output key, reducer, value key) tuples
+        sampler (flashflood.core.container.Sampler): record sampler
+        capacity (int): queue capacity of the outgoing AsyncEdge
+        **kwargs: kwargs (see `GroupBy`)
+    """
+    def __init__(self, key, aggs, sampler=None, capacity=None, **kwargs):
+        super().__init__(key, aggs, **kwargs)
+        self._out_edge = AsyncEdge(sampler, capacity)
+        self._interrupted = False
+
+    @gen.coroutine
+    def run(self, on_finish, on_abort):
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            self.synchronizer()
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        rcds = self.processor(*self.input_records())
+        try:
+            for rcd in rcds:
+                if self._interrupted:
+                    yield self._out_edge.abort()
+                    on_abort()
+                    return
+                yield self._out_edge.put(rcd)
+        finally:
+            rcds.close()
+        yield self._out_edge.done()
+        on_finish()
+
+    def interrupt(self):
+        self._interrupted = True
@@ -4,29 +4,18 @@
 # http://opensource.org/licenses/MIT
 #
 
-from flashflood.core.node import IterNode
+from flashflood.node.aggregate.groupby import GroupBy
 
 
-class AggList(IterNode):
+class AggList(GroupBy):
+    """Collects values of each group into a list
+
+    Aggregated records are copies of the first record of each group which
+    have the list instead of the value field (see `GroupBy`).
+    """
     def __init__(self, key, value_key, list_key="list", **kwargs):
-        super().__init__(**kwargs)
-        self.key = key
+        super().__init__(
+            key, [(list_key, "list", value_key)], carry_fields=True,
+            **kwargs)
         self.value_key = value_key
         self.list_key = list_key
-        self._seen = set()
-        self._mapping = {}
-
-    def processor(self, rcds):
-        for r in rcds:
-            rcd = r.copy()
-            k = rcd[self.key]
-            v = rcd[self.value_key]
-            if k in self._seen:
-                self._mapping[k][self.list_key].append(v)
-                continue
-            self._seen.add(k)
-            self._mapping[k] = rcd
-            rcd[self.list_key] = [v]
-            del rcd[self.value_key]
-        for v in self._mapping.values():
-            yield v
@@ -4,28 +4,76 @@
 # http://opensource.org/licenses/MIT
 #
 
-from flashflood.core.node import IterNode
+from flashflood.core import batch
+from flashflood.core.node import BatchNode
+from flashflood.node.aggregate.groupby import GroupBy
 
+if batch.NUMPY_AVAILABLE:
+    import numpy
 
-class AggSum(IterNode):
 
+class AggSum(GroupBy):
+    """Sums values of each group
+
+    Aggregated records are copies of the first record of each group which
+    have the sum instead of the value field (see `GroupBy`).
+    """
+    def __init__(self, key, value_key, sum_key="sum", **kwargs):
+        super().__init__(
+            key, [(sum_key, "sum", value_key)], carry_fields=True, **kwargs)
+        self.value_key = value_key
+        self.sum_key = sum_key
+
+
+class BatchAggSum(BatchNode):
+    """Vectorized `AggSum` which works on record batches
+
+    All incoming batches are aggregated into one batch. Groups are in order
+    of their first appearance, and have field values of the first record.
+    """
     def __init__(self, key, value_key, sum_key="sum", **kwargs):
         super().__init__(**kwargs)
         self.key = key
         self.value_key = value_key
         self.sum_key = sum_key
-        self._seen = set()
-        self._mapping = {}
-
-    def processor(self, rcds):
-        for r in rcds:
-            rcd = r.copy()
-            k = rcd[self.key]
-            if k in self._seen:
-                self._mapping[k][self.sum_key] += rcd[self.value_key]
+
+    def processor(self, batches):
+        rb = batch.concat(batches)
+        if not len(rb):
+            return
+        keys = rb.column(self.key)
+        values = rb.column(self.value_key)
+        grouped = None
+        if batch.NUMPY_AVAILABLE:
+            grouped = self._group_numpy(keys, values)
+        if grouped is None:
+            grouped = self._group(keys, values)
+        indices, sums = grouped
+        yield rb.select(indices).drop([self.value_key]).assign(
+            self.sum_key, sums)
+
+    def _group(self, keys, values):
+        positions = {}
+        indices = []
+        sums = []
+        for i, (k, v) in enumerate(zip(keys, values)):
+            if k in positions:
+                sums[positions[k]] += v
                 continue
-            self._seen.add(k)
-            self._mapping[k] = rcd
-            rcd[self.sum_key] = rcd[self.value_key]
-            del rcd[self.value_key]
-            yield rcd
+            positions[k] = len(indices)
+            indices.append(i)
+            sums.append(v)
+        return indices, sums
+
+    def _group_numpy(self, keys, values):
+        """Returns None if the columns are not suitable for numpy"""
+        karr = numpy.asarray(keys)
+        varr = numpy.asarray(values)
+        if karr.dtype.kind not in "biuUS" or varr.dtype.kind not in "iuf":
+            return
+        uniq, first, inv = numpy.unique(
+            karr, return_index=True, return_inverse=True)
+        sums = numpy.zeros(len(uniq), dtype=varr.dtype)
+        numpy.add.at(sums, inv.ravel(), varr)
+        order = numpy.argsort(first, kind="stable")
+        return first[order], sums[order]
@@ -4,30 +4,19 @@
 # http://opensource.org/licenses/MIT
 #
 
-from flashflood.core.node import IterNode
+from flashflood.node.aggregate.groupby import GroupBy
 
 
-class AggUniqList(IterNode):
+class AggUniqList(GroupBy):
+    """Collects unique values of each group into a list
+
+    Aggregated records are copies of the first record of each group which
+    have the list (in order of appearance) instead of the value field
+    (see `GroupBy`).
+    """
     def __init__(self, key, value_key, list_key="list", **kwargs):
-        super().__init__(**kwargs)
-        self.key = key
+        super().__init__(
+            key, [(list_key, "uniq", value_key)], carry_fields=True,
+            **kwargs)
         self.value_key = value_key
         self.list_key = list_key
-        self._seen = set()
-        self._mapping = {}
-
-    def processor(self, rcds):
-        for r in rcds:
-            rcd = r.copy()
-            k = rcd[self.key]
-            v = rcd[self.value_key]
-            if k in self._seen:
-                self._mapping[k][self.list_key].add(v)
-                continue
-            self._seen.add(k)
-            self._mapping[k] = rcd
-            rcd[self.list_key] = {v}
-            del rcd[self.value_key]
-        for v in self._mapping.values():
-            v[self.list_key] = list(v[self.list_key])
-            yield v
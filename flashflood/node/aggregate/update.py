@@ -4,22 +4,18 @@
 # http://opensource.org/licenses/MIT
 #
 
-from flashflood.core.node import IterNode
+from flashflood.node.aggregate.groupby import GroupBy
 
 
-class AggUpdate(IterNode):
+class AggUpdate(GroupBy):
+    """Merges records of each group
+
+    Aggregated records are copies of the first record of each group updated
+    by the following records (see `GroupBy`). Incoming records are not
+    modified.
+    """
     def __init__(self, key, **kwargs):
-        super().__init__(**kwargs)
-        self.key = key
-        self._seen = set()
-        self._mapping = {}
+        super().__init__(key, [(None, "update", None)], **kwargs)
 
-    def processor(self, rcds):
-        for r in rcds:
-            k = r[self.key]
-            if k in self._seen:
-                self._mapping[k].update(r)
-                continue
-            self._seen.add(k)
-            self._mapping[k] = r
-            yield r
+    def make_record(self, key, first, values):
+        return values[0]
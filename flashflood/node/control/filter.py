@@ -32,11 +32,15 @@ class AsyncFilter(AsyncNode):
     @gen.coroutine
     def async_loop(self):
         while 1:
-            in_ = yield self._in_edge.get()
-            if self.pred(in_):
-                yield self._out_edge.put(in_)
-            elif self.residue_counter is not None:
-                self.residue_counter.value += 1
+            in_ = yield self._in_edge.get_many(task_done=False)
+            passed = []
+            for r in in_:
+                if self.pred(r):
+                    passed.append(r)
+                elif self.residue_counter is not None:
+                    self.residue_counter.value += 1
+            yield self._out_edge.put_many(passed)
+            self._in_edge.task_done(len(in_))
 
     @gen.coroutine
     def asynchronizer(self):
@@ -4,17 +4,109 @@
 # http://opensource.org/licenses/MIT
 #
 
+import collections
+
 from tornado import gen
 
-from flashflood.core.edge import IterEdge
+from flashflood.core.edge import IterEdge, AsyncEdge
 from flashflood.core.node import Node
 from flashflood.core.task import InvalidOperationError
+from flashflood.spill import SpillFile
+
+
+class Tee(object):
+    """Splits an iterable into independent iterators
+
+    Like itertools.tee, the source is consumed only once and records are
+    shared by the iterators (not copied). Records which a lagging iterator
+    has not read yet are buffered, and spilled to temporary files if the
+    buffer of the iterator exceeds ``spill_threshold`` records (spilled
+    records are read back as copies).
+
+    Args:
+        source (iterable): source records
+        n (int): number of iterators
+        spill_threshold (int): maximum number of buffered records of each
+            iterator. If None, records are never spilled.
+        tmpdir (str): directory of temporary files
+
+    Attributes:
+        iterators (list): iterators
+    """
+    def __init__(self, source, n, spill_threshold=None, tmpdir=None):
+        self.spill_threshold = spill_threshold
+        self.tmpdir = tmpdir
+        self._source = iter(source)
+        self._buffers = [collections.deque() for _ in range(n)]
+        self._spills = [collections.deque() for _ in range(n)]
+        self._reading = [False] * n
+        self._active = [True] * n
+        self.iterators = [self._iter(i) for i in range(n)]
+
+    def _iter(self, i):
+        buffer = self._buffers[i]
+        spills = self._spills[i]
+        try:
+            while 1:
+                if spills:
+                    self._reading[i] = True
+                    yield from spills[0].read()
+                    self._reading[i] = False
+                    spills.popleft().close()
+                elif buffer:
+                    yield buffer.popleft()
+                else:
+                    try:
+                        rcd = next(self._source)
+                    except StopIteration:
+                        return
+                    self._put(rcd, i)
+                    yield rcd
+        finally:
+            self._active[i] = False
+            buffer.clear()
+            while spills:
+                spills.popleft().close()
+
+    def _put(self, rcd, reader):
+        """Buffers the record for iterators other than the reader"""
+        for i, buffer in enumerate(self._buffers):
+            if i == reader or not self._active[i]:
+                continue
+            buffer.append(rcd)
+            if self.spill_threshold is not None and \
+                    len(buffer) > self.spill_threshold:
+                self._spill(i)
+
+    def _spill(self, i):
+        spills = self._spills[i]
+        # The spill file being read cannot be appended
+        if not spills or (len(spills) == 1 and self._reading[i]):
+            spills.append(SpillFile(dir=self.tmpdir))
+        spills[-1].write_many(self._buffers[i])
+        self._buffers[i].clear()
 
 
 class Replicate(Node):
-    def __init__(self, n, **kwargs):
+    """Sends the incoming records to multiple downstream nodes
+
+    Records from IterEdge and FuncEdge are split by `Tee`, so that the
+    upstream function is applied only once and records are buffered only
+    as far as the slowest branch lags behind.
+
+    Args:
+        n (int): number of outgoing edges
+        spill_threshold (int): maximum number of records buffered for a
+            lagging branch before they are spilled to temporary files.
+            If None, records are never spilled.
+        tmpdir (str): directory of temporary files
+        **kwargs: kwargs
+    """
+    def __init__(self, n, spill_threshold=None, tmpdir=None, **kwargs):
         super().__init__(**kwargs)
         self.n = n
+        self.spill_threshold = spill_threshold
+        self.tmpdir = tmpdir
         self._in_edge = None
         self._out_edges = [IterEdge() for _ in range(n)]
         self._rcds_tmp = None
@@ -23,32 +115,30 @@ class Replicate(Node):
     def run(self, on_finish, on_abort):
         if self.edge_type(self._in_edge) == "AsyncEdge":
             self.synchronizer()
-        while 1:
-            if self._in_edge.status == "aborted":
-                for o in self._out_edges:
-                    yield o.abort()
-                on_abort()
-                break
-            if self._in_edge.status == "done":
-                if self.edge_type(self._in_edge) == "IterEdge":
-                    rcds = list(self._in_edge.records)
-                    for o in self._out_edges:
-                        o.send(self.processor(rcds[:]))
-                elif self.edge_type(self._in_edge) == "FuncEdge":
-                    rcds = list(self._in_edge.records)
-                    for o in self._out_edges:
-                        o.send(self.processor(
-                            map(self._in_edge.func, rcds[:])
-                        ))
-                else:
-                    for o in self._out_edges:
-                        o.send(self.processor(self._rcds_tmp[:]))
-                on_finish()
-                break
-            yield gen.sleep(self.interval)
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            for o in self._out_edges:
+                yield o.abort()
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "IterEdge":
+            tee = Tee(self._in_edge.records, self.n,
+                      self.spill_threshold, self.tmpdir)
+            for o, it in zip(self._out_edges, tee.iterators):
+                o.send(self.processor(it))
+        elif self.edge_type(self._in_edge) == "FuncEdge":
+            tee = Tee(map(self._in_edge.func, self._in_edge.records),
+                      self.n, self.spill_threshold, self.tmpdir)
+            for o, it in zip(self._out_edges, tee.iterators):
+                o.send(self.processor(it))
+        else:
+            # Synchronized records are already in the memory
+            for o in self._out_edges:
+                o.send(self.processor(iter(self._rcds_tmp)))
+        on_finish()
 
     def out_edge(self, port):
-        if port > self.n:
+        if port >= self.n:
             raise InvalidOperationError("invalid port")
         return self._out_edges[port]
 
@@ -66,9 +156,70 @@ class Replicate(Node):
     def synchronizer(self):
         self._rcds_tmp = []
         while 1:
-            in_ = yield self._in_edge.get()
-            self._rcds_tmp.append(in_)
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self._rcds_tmp.extend(in_)
+            self._in_edge.task_done(len(in_))
 
     def processor(self, rcds):
         for r in rcds:
             yield r
+
+
+class AsyncReplicate(Replicate):
+    """Sends the incoming records to multiple downstream nodes
+    asynchronously
+
+    AsyncReplicate has AsyncEdges as outgoing edges. Each record is put to
+    all the outgoing edges, so the upstream waits for the slowest branch
+    when its queue is full and no more records are buffered than the queue
+    capacities.
+
+    Note that branches which are merged again by a node which consumes one
+    of them to the end first (ex. the right input of Join) may block each
+    other. Use Replicate in such workflows.
+
+    Args:
+        n (int): number of outgoing edges
+        capacity (int): queue capacity of the outgoing AsyncEdges
+        **kwargs: kwargs
+    """
+    def __init__(self, n, capacity=None, **kwargs):
+        super().__init__(n, **kwargs)
+        self._out_edges = [AsyncEdge(capacity=capacity) for _ in range(n)]
+        self._interrupted = False
+
+    @gen.coroutine
+    def run(self, on_finish, on_abort):
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            self.async_loop()
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            yield [o.abort() for o in self._out_edges]
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            yield [o.done() for o in self._out_edges]
+            on_finish()
+            return
+        if self.edge_type(self._in_edge) == "IterEdge":
+            rcds = self._in_edge.records
+        else:
+            rcds = map(self._in_edge.func, self._in_edge.records)
+        for rcd in rcds:
+            if self._interrupted:
+                yield [o.abort() for o in self._out_edges]
+                on_abort()
+                return
+            yield [o.put(rcd) for o in self._out_edges]
+        yield [o.done() for o in self._out_edges]
+        on_finish()
+
+    def interrupt(self):
+        self._interrupted = True
+
+    @gen.coroutine
+    def async_loop(self):
+        while 1:
+            in_ = yield self._in_edge.get_many(task_done=False)
+            yield [o.put_many(in_) for o in self._out_edges]
+            self._in_edge.task_done(len(in_))
@@ -6,15 +6,22 @@
 
 import functools
 
+from flashflood import functional
 from flashflood.core.node import FuncNode
 
 
-def concat(old_keys, new_key, separator, row):
-    new_row = row.copy()
-    new_row[new_key] = separator.join(row[k] for k in old_keys)
+def concat_inplace(old_keys, new_key, separator, row):
+    row[new_key] = separator.join(row[k] for k in old_keys)
     for k in old_keys:
-        del new_row[k]
-    return new_row
+        del row[k]
+    return row
+
+
+def concat(old_keys, new_key, separator, row):
+    return concat_inplace(old_keys, new_key, separator, row.copy())
+
+
+functional.register_inplace(concat, concat_inplace)
 
 
 class ConcatFields(FuncNode):
@@ -6,13 +6,20 @@
 
 import functools
 
-from flashflood.core.node import FuncNode, AsyncNode
+from flashflood import functional
+from flashflood.core.node import FuncNode, AsyncNode, BatchNode
+
+
+def constant_inplace(key, value, rcd):
+    rcd[key] = value
+    return rcd
 
 
 def constant(key, value, rcd):
-    new_rcd = rcd.copy()
-    new_rcd[key] = value
-    return new_rcd
+    return constant_inplace(key, value, rcd.copy())
+
+
+functional.register_inplace(constant, constant_inplace)
 
 
 class ConstantField(FuncNode):
@@ -28,3 +35,14 @@ class AsyncConstantField(AsyncNode):
 
     def process_record(self, rcd):
         return self.func(rcd)
+
+
+class BatchConstantField(BatchNode):
+    """Vectorized `ConstantField` which works on record batches"""
+    def __init__(self, key, value, **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.value = value
+
+    def process_batch(self, batch):
+        return batch.assign(self.key, [self.value] * len(batch))
@@ -10,16 +10,22 @@ from flashflood import functional
 from flashflood.core.node import FuncNode, AsyncNode
 
 
-def extend(key, source_key, func, in_place, fill, row):
-    new_row = row.copy()
+def extend_inplace(key, source_key, func, in_place, fill, row):
     try:
-        new_row[key] = func(row[source_key])
+        row[key] = func(row[source_key])
     except KeyError:
-        new_row[key] = fill
+        row[key] = fill
     else:
         if in_place and key != source_key:
-            del new_row[source_key]
-    return new_row
+            del row[source_key]
+    return row
+
+
+def extend(key, source_key, func, in_place, fill, row):
+    return extend_inplace(key, source_key, func, in_place, fill, row.copy())
+
+
+functional.register_inplace(extend, extend_inplace)
 
 
 class Extend(FuncNode):
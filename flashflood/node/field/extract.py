@@ -6,11 +6,12 @@
 
 import functools
 
+from flashflood import functional
 from flashflood.core.node import FuncNode, AsyncNode
 
 
-def extract(key, attrs, in_place, default, row):
-    new_row = row.copy()
+def extract_inplace(key, attrs, in_place, default, row):
+    values = []
     for attr in attrs:
         try:
             v = row[key]
@@ -19,10 +20,19 @@ def extract(key, attrs, in_place, default, row):
                 v = v[n]
         except KeyError:
             v = default
-        new_row[attr] = v
+        values.append(v)
+    # Assign after all values are extracted from the original row[key]
+    row.update(zip(attrs, values))
     if in_place and key not in attrs:
-        del new_row[key]
-    return new_row
+        del row[key]
+    return row
+
+
+def extract(key, attrs, in_place, default, row):
+    return extract_inplace(key, attrs, in_place, default, row.copy())
+
+
+functional.register_inplace(extract, extract_inplace)
 
 
 # TODO: rename to Unnest
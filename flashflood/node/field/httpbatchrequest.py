@@ -4,18 +4,83 @@
 # http://opensource.org/licenses/MIT
 #
 
+import traceback
+
 from tornado import gen
 from tornado import httpclient
+from tornado.ioloop import IOLoop
+from tornado.locks import Semaphore
 
 from flashflood import functional
 from flashflood.core.node import AsyncNode
 
+try:
+    from tornado.curl_httpclient import CurlAsyncHTTPClient
+    CURL_AVAILABLE = True
+except ImportError:
+    CURL_AVAILABLE = False
+
+
+class TokenBucket(object):
+    """Token bucket rate limiter
+
+    Args:
+        rate (float): tokens added per second
+        burst (int): bucket size (maximum number of tokens)
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = None
+
+    @gen.coroutine
+    def acquire(self):
+        """Waits until a token is available and consumes it"""
+        while 1:
+            now = IOLoop.current().time()
+            if self._last is not None:
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            yield gen.sleep((1 - self._tokens) / self.rate)
+
 
 class AsyncHttpBatchRequest(AsyncNode):
+    """Fetches URLs of the records without blocking the IOLoop
+
+    Up to ``max_in_flight`` requests are sent concurrently and the response
+    records are sent to the downstream in the order of completion.
+    Connections are kept alive and reused if pycurl is available
+    (CurlAsyncHTTPClient).
+
+    Args:
+        key (str): key of the response field
+        url_key (str): key of the URL field
+        response_parser (callable): function that takes a response body text
+            and returns a record. If it raises an exception, the request is
+            regarded as failed.
+        fetch_interval (float): mean interval of requests in seconds. Request
+            rate is limited by a token bucket, so that up to ``burst``
+            requests can be sent at once. 0 or None means no rate limit.
+        in_place (bool): if True, the URL field will be removed
+        response_failed (callable): function that returns a record to be
+            sent when a request failed
+        response_headers (dict): request headers
+        max_in_flight (int): maximum number of concurrent requests
+        burst (int): token bucket size
+        request_timeout (float): timeout of each request in seconds
+        connect_timeout (float): timeout of initial connection in seconds
+        **kwargs: kwargs
+    """
     def __init__(self, key, url_key, response_parser=functional.identity,
                  fetch_interval=0.1, in_place=False,
                  response_failed=lambda: None, response_headers=None,
-                 **kwargs):
+                 max_in_flight=4, burst=1, request_timeout=20.0,
+                 connect_timeout=20.0, **kwargs):
         super().__init__(**kwargs)
         self.key = key
         self.url_key = url_key
@@ -23,9 +88,17 @@ class AsyncHttpBatchRequest(AsyncNode):
         self.failed = response_failed
         self.headers = response_headers
         self.fetch_interval = fetch_interval
+        self.max_in_flight = max_in_flight
+        self.burst = burst
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
         self.old_key = None
         if in_place and key != url_key:
             self.old_key = url_key
+        self.http_client = None
+        self._slots = None
+        self._bucket = None
+        self._in_flight = set()
 
     def merge_fields(self):
         super().merge_fields()
@@ -35,9 +108,9 @@ class AsyncHttpBatchRequest(AsyncNode):
     @gen.coroutine
     def async_loop(self):
         while 1:
-            in_ = yield self._in_edge.get()
-            yield self._out_edge.put(self.process_record(in_))
-            yield gen.sleep(self.fetch_interval)
+            in_ = yield self._in_edge.get_many(task_done=False)
+            for rcd in in_:
+                yield self.dispatch(rcd, ack=True)
 
     @gen.coroutine
     def asynchronizer(self, on_finish, on_abort):
@@ -47,26 +120,73 @@ class AsyncHttpBatchRequest(AsyncNode):
             rcds = map(self._in_edge.func, self._in_edge.records)
         for in_ in rcds:
             if self._interrupted:
+                yield list(self._in_flight)
                 yield self._out_edge.abort()
                 on_abort()
                 return
-            yield self._out_edge.put(self.process_record(in_))
-            yield gen.sleep(self.fetch_interval)
+            yield self.dispatch(in_)
+        yield list(self._in_flight)
         yield self._out_edge.done()
         on_finish()
 
+    @gen.coroutine
+    def dispatch(self, rcd, ack=False):
+        """Waits for a free slot and a rate limit token, and then starts
+        fetching without waiting for the response.
+
+        Args:
+            rcd (dict): record
+            ack (bool): if True, mark the record of the upstream AsyncEdge as
+                processed after the result was sent to the downstream
+        """
+        yield self._slots.acquire()
+        if self._bucket is not None:
+            yield self._bucket.acquire()
+        future = self.fetch(rcd, ack)
+        self._in_flight.add(future)
+        IOLoop.current().add_future(future, self._on_fetched)
+
+    @gen.coroutine
+    def fetch(self, rcd, ack=False):
+        try:
+            res = yield self.process_record(rcd)
+            yield self._out_edge.put(res)
+        finally:
+            # The upstream waits for all the records to be acknowledged
+            if ack:
+                self._in_edge.task_done()
+
+    def _on_fetched(self, future):
+        self._in_flight.discard(future)
+        self._slots.release()
+        future.result()  # raise errors if any
+
+    @gen.coroutine
     def process_record(self, rcd):
-        request = httpclient.HTTPRequest(rcd[self.url_key])
-        request.headers = self.headers
+        request = httpclient.HTTPRequest(
+            rcd[self.url_key], headers=self.headers,
+            request_timeout=self.request_timeout,
+            connect_timeout=self.connect_timeout)
+        try:
+            res = yield self.http_client.fetch(request)
+        except (httpclient.HTTPError, OSError):
+            return self.failed()
         try:
-            res = self.http_client.fetch(request)
-            rcd = self.parser(res.body.decode("utf-8"))
-        except httpclient.HTTPError:
-            rcd = self.failed()
-        return rcd
+            return self.parser(res.body.decode("utf-8"))
+        except Exception:
+            print(traceback.format_exc())
+            return self.failed()
 
     def on_start(self):
-        self.http_client = httpclient.HTTPClient()
+        if CURL_AVAILABLE:
+            self.http_client = CurlAsyncHTTPClient(
+                force_instance=True, max_clients=self.max_in_flight)
+        else:
+            self.http_client = httpclient.AsyncHTTPClient(
+                force_instance=True, max_clients=self.max_in_flight)
+        self._slots = Semaphore(self.max_in_flight)
+        if self.fetch_interval:
+            self._bucket = TokenBucket(1 / self.fetch_interval, self.burst)
 
     def on_finish(self):
         self.http_client.close()
@@ -6,13 +6,20 @@
 
 import functools
 
-from flashflood.core.node import FuncNode
+from flashflood import functional
+from flashflood.core.node import FuncNode, BatchNode
+
+
+def remove_inplace(key, row):
+    del row[key]
+    return row
 
 
 def remove(key, row):
-    new_row = row.copy()
-    del new_row[key]
-    return new_row
+    return remove_inplace(key, row.copy())
+
+
+functional.register_inplace(remove, remove_inplace)
 
 
 class RemoveField(FuncNode):
@@ -25,11 +32,17 @@ class RemoveField(FuncNode):
         self._out_edge.fields.delete("key", self.key)
 
 
-def remove_many(keys, row):
-    new_row = row.copy()
+def remove_many_inplace(keys, row):
     for k in keys:
-        del new_row[k]
-    return new_row
+        del row[k]
+    return row
+
+
+def remove_many(keys, row):
+    return remove_many_inplace(keys, row.copy())
+
+
+functional.register_inplace(remove_many, remove_many_inplace)
 
 
 class RemoveFields(FuncNode):
@@ -43,6 +56,21 @@ class RemoveFields(FuncNode):
             self._out_edge.fields.delete("key", k)
 
 
+class BatchRemoveFields(BatchNode):
+    """Vectorized `RemoveFields` which works on record batches"""
+    def __init__(self, keys, **kwargs):
+        super().__init__(**kwargs)
+        self.keys = keys
+
+    def merge_fields(self):
+        super().merge_fields()
+        for k in self.keys:
+            self._out_edge.fields.delete("key", k)
+
+    def process_batch(self, batch):
+        return batch.drop(self.keys)
+
+
 def retain(keys, row):
     new_row = {}
     for k in keys:
@@ -50,6 +78,9 @@ def retain(keys, row):
     return new_row
 
 
+functional.register_builder(retain)
+
+
 class RetainFields(FuncNode):
     def __init__(self, keys, **kwargs):
         super().__init__(functools.partial(retain, keys), **kwargs)
@@ -7,17 +7,24 @@
 import functools
 import itertools
 
+from flashflood import functional
 from flashflood.core.node import FuncNode
 
 
-def split(old_key, new_keys, separator, fill, row):
-    new_row = row.copy()
+def split_inplace(old_key, new_keys, separator, fill, row):
     values = itertools.chain(
         row[old_key].split(separator), itertools.repeat(fill))
     for k in new_keys:
-        new_row[k] = next(values)
-    del new_row[old_key]
-    return new_row
+        row[k] = next(values)
+    del row[old_key]
+    return row
+
+
+def split(old_key, new_keys, separator, fill, row):
+    return split_inplace(old_key, new_keys, separator, fill, row.copy())
+
+
+functional.register_inplace(split, split_inplace)
 
 
 class SplitField(FuncNode):
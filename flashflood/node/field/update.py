@@ -6,7 +6,8 @@
 
 import functools
 
-from flashflood.core.node import FuncNode, AsyncNode
+from flashflood import functional
+from flashflood.core.node import FuncNode, AsyncNode, BatchNode
 
 
 def rename(updates, row):
@@ -19,6 +20,9 @@ def rename(updates, row):
     return new_row
 
 
+functional.register_builder(rename)
+
+
 class UpdateFields(FuncNode):
     def __init__(self, updates, **kwargs):
         super().__init__(functools.partial(rename, updates), **kwargs)
@@ -47,3 +51,20 @@ class AsyncUpdateFields(AsyncNode):
 
     def process_record(self, rcd):
         return self.func(rcd)
+
+
+class BatchUpdateFields(BatchNode):
+    """Vectorized `UpdateFields` which works on record batches"""
+    def __init__(self, updates, **kwargs):
+        super().__init__(**kwargs)
+        self.updates = updates
+
+    def merge_fields(self):
+        super().merge_fields()
+        for field in self._out_edge.fields:
+            if field["key"] in self.updates:
+                field["key"] = self.updates[field["key"]]
+        self._out_edge.fields.reduce()
+
+    def process_batch(self, batch):
+        return batch.rename(self.updates)
@@ -4,10 +4,14 @@
 # http://opensource.org/licenses/MIT
 #
 
+import codecs
 import json
 
+from tornado import gen
 from tornado import httpclient
+from tornado.locks import Condition
 
+from flashflood.core.edge import AsyncEdge
 from flashflood.node.reader.readerbase import ReaderBase
 
 
@@ -34,3 +38,184 @@ class HttpFetchInput(ReaderBase):
             http_client.close()
         self._out_edge.send(rcds)
         on_finish()
+
+
+class NDJSONStreamParser(object):
+    """Incremental parser of newline delimited JSON (NDJSON)"""
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Parses a chunk of the response body
+
+        Args:
+            chunk (bytes): body chunk
+
+        Returns:
+            list: records completed in the chunk
+        """
+        self._buffer += self._decoder.decode(chunk)
+        *lines, self._buffer = self._buffer.split("\n")
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def close(self):
+        """Parses the remaining data and returns records"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        rest, self._buffer = self._buffer, ""
+        return [json.loads(rest)] if rest.strip() else []
+
+
+class JSONArrayStreamParser(object):
+    """Incremental parser of a JSON array of records"""
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+
+    def feed(self, chunk):
+        """Parses a chunk of the response body
+
+        Args:
+            chunk (bytes): body chunk
+
+        Returns:
+            list: array elements completed in the chunk
+        """
+        self._buffer += self._decoder.decode(chunk)
+        rcds = []
+        pos = 0
+        buf = self._buffer
+        while not self._finished:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                break
+            if not self._started:
+                if buf[pos] != "[":
+                    raise ValueError("JSON array is expected")
+                self._started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                self._finished = True
+                pos += 1
+                break
+            try:
+                rcd, end = self._json.raw_decode(buf, pos)
+            except ValueError:
+                break  # incomplete element
+            if end == len(buf):
+                break  # element may continue (ex. numbers)
+            rcds.append(rcd)
+            pos = end
+        self._buffer = buf[pos:]
+        return rcds
+
+    def close(self):
+        """Parses the remaining data and returns elements"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        rcds = self.feed(b"")
+        if not self._finished:
+            raise ValueError("Incomplete JSON array")
+        return rcds
+
+
+class AsyncHttpFetchInput(ReaderBase):
+    """Fetches records from the URL and streams them to the AsyncEdge
+
+    The response body is parsed incrementally while it is being received,
+    so that downstream nodes can start processing without waiting for the
+    whole payload. Parsed records are held in a local buffer until the
+    outgoing queue accepts them.
+
+    Args:
+        url (str): URL
+        headers (dict): request headers
+        response_format (str): ``json`` (JSON array of records) or
+            ``ndjson`` (newline delimited JSON)
+        response_failed (callable): function that returns records to be sent
+            when the request failed (they follow the records already sent)
+        request_timeout (float): timeout of the request in seconds
+        sampler (flashflood.core.container.Sampler): record sampler
+        capacity (int): queue capacity of the outgoing AsyncEdge
+        **kwargs: kwargs
+    """
+    PARSERS = {
+        "json": JSONArrayStreamParser,
+        "ndjson": NDJSONStreamParser
+    }
+
+    def __init__(self, url, headers=None, response_format="json",
+                 response_failed=lambda: [], request_timeout=None,
+                 sampler=None, capacity=None, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.headers = headers or {}
+        self.parser = self.PARSERS[response_format]()
+        self.failed = response_failed
+        self.request_timeout = request_timeout
+        self._out_edge = AsyncEdge(sampler, capacity)
+        self._buffer = []
+        self._received = Condition()
+        self._status_code = None
+        self._error = None
+        self._interrupted = False
+
+    @gen.coroutine
+    def run(self, on_finish, on_abort):
+        http_client = httpclient.AsyncHTTPClient(force_instance=True)
+        request = httpclient.HTTPRequest(
+            self.url, headers=self.headers,
+            header_callback=self.on_header,
+            streaming_callback=self.on_chunk,
+            request_timeout=self.request_timeout)
+        fetched = http_client.fetch(request)
+        fetched.add_done_callback(lambda f: self._received.notify())
+        while not fetched.done() or self._buffer:
+            if self._interrupted:
+                break
+            if not self._buffer:
+                yield self._received.wait()
+                continue
+            rcds, self._buffer = self._buffer, []
+            yield self._out_edge.put_many(rcds)
+        if self._interrupted:
+            fetched.add_done_callback(lambda f: http_client.close())
+            yield self._out_edge.abort()
+            on_abort()
+            return
+        try:
+            yield fetched
+            if self._error is not None:
+                raise self._error
+            rcds = self.parser.close()
+        except (httpclient.HTTPError, OSError, ValueError):
+            rcds = self.failed()
+        finally:
+            http_client.close()
+        yield self._out_edge.put_many(rcds)
+        yield self._out_edge.done()
+        on_finish()
+
+    def on_header(self, line):
+        # The status line of each response (including redirects) comes first
+        if line.startswith("HTTP/"):
+            self._status_code = int(line.split(" ", 2)[1])
+
+    def on_chunk(self, chunk):
+        if self._error is not None or self._interrupted:
+            return
+        if not 200 <= self._status_code < 300:
+            return  # error page
+        try:
+            self._buffer.extend(self.parser.feed(chunk))
+        except ValueError as e:
+            self._error = e
+        self._received.notify()
+
+    def interrupt(self):
+        self._interrupted = True
+        self._received.notify()
@@ -4,14 +4,63 @@
 # http://opensource.org/licenses/MIT
 #
 
+import functools
+
 from chorus import v2000reader
 from chorus import molutil
 from chorus.draw import calc2dcoords
 
 from flashflood import static
+from flashflood.core.edge import FuncEdge
+from flashflood.interface import sdfile
 from flashflood.node.reader.readerbase import ReaderBase
 
 
+def mol_to_record(sdf_options, implicit_hydrogen, recalc_coords, mol):
+    """Returns the record of the molecule"""
+    row = {}
+    if implicit_hydrogen:
+        mol = molutil.make_Hs_implicit(mol)
+    if recalc_coords:
+        calc2dcoords.calc2dcoords(mol)
+    for op in sdf_options:
+        row[op] = mol.data.get(op, "")
+    mol.data.clear()
+    row["__molobj"] = mol
+    return row
+
+
+def range_to_record(path, sdf_options, implicit_hydrogen, recalc_coords,
+                    byte_range):
+    """Parses the molecule in the byte range of the SDFile into a record
+
+    This is the function of `SDFileRangeInput` to be applied in worker
+    processes.
+    """
+    mol = next(sdfile.mols_from_range(path, *byte_range), None)
+    if mol is None:
+        mol = molutil.null_molecule()
+    return mol_to_record(sdf_options, implicit_hydrogen, recalc_coords, mol)
+
+
+def _selected(rows, count):
+    """Returns record indices selected by the slice or the list
+
+    Raises:
+        IndexError: if any index in the list is out of range
+    """
+    if rows is None:
+        return range(count)
+    if isinstance(rows, slice):
+        return range(*rows.indices(count))
+    indices = []
+    for i in rows:
+        if not -count <= i < count:
+            raise IndexError("record index out of range")
+        indices.append(i + count if i < 0 else i)
+    return indices
+
+
 class SDFileReaderBase(ReaderBase):
     def __init__(self, sdf_options=(), implicit_hydrogen=False,
                  recalc_coords=False, **kwargs):
@@ -30,16 +79,9 @@ class SDFileReaderBase(ReaderBase):
 
     def records_iter(self):
         for mol in self.contents:
-            row = {}
-            if self.implicit_hydrogen:
-                mol = molutil.make_Hs_implicit(mol)
-            if self.recalc_coords:
-                calc2dcoords.calc2dcoords(mol)
-            for op in self.sdf_options:
-                row[op] = mol.data.get(op, "")
-            mol.data.clear()
-            row["__molobj"] = mol
-            yield row
+            yield mol_to_record(
+                self.sdf_options, self.implicit_hydrogen, self.recalc_coords,
+                mol)
 
 
 class SDFileReader(SDFileReaderBase):
@@ -52,3 +94,84 @@ class SDFileLinesInput(SDFileReaderBase):
     def __init__(self, lines, **kwargs):
         super().__init__(**kwargs)
         self.contents = v2000reader.mols_from_text(lines)
+
+
+class SDFileIndexReader(SDFileReaderBase):
+    """SDFile reader which seeks records by the offset index
+
+    The file is memory-mapped and records are located by
+    `flashflood.interface.sdfile.SDFileIndex`, so that only the selected
+    records are parsed. The index is built on the first run and persisted as
+    a sidecar file.
+
+    Args:
+        in_file (str): SDFile path
+        rows (slice or list): indices of the records to be read
+            (default: all records)
+        index_path (str): sidecar index file path
+            (default: ``<in_file>.idx``)
+        persist_index (bool): if False, the index is not persisted
+        **kwargs: kwargs
+    """
+    def __init__(self, in_file, rows=None, index_path=None,
+                 persist_index=True, **kwargs):
+        super().__init__(**kwargs)
+        self.in_file = in_file
+        self.rows = rows
+        self.index_path = index_path
+        self.persist_index = persist_index
+
+    @property
+    def contents(self):
+        with sdfile.SDFileIndex(
+                self.in_file, self.index_path, self.persist_index) as index:
+            for i in _selected(self.rows, len(index)):
+                text = index[i]
+                mol = next(v2000reader.mols_from_text(text), None)
+                yield molutil.null_molecule() if mol is None else mol
+
+
+class SDFileRangeInput(SDFileReaderBase):
+    """Sends byte ranges of SDFile records with the parser function
+
+    SDFileRangeInput has FuncEdge as the outgoing edge, so that the records
+    are parsed by downstream nodes. With ConcurrentNode, consecutive
+    records are parsed in worker processes in shards of ``chunksize``
+    records, and workers read only their byte ranges of the memory-mapped
+    file.
+
+    Example::
+
+        wf.append(SDFileRangeInput("large.sdf", sdf_options=["ID"]))
+        wf.append(ConcurrentNode(chunksize=100, ordered=True))
+
+    Args:
+        in_file (str): SDFile path
+        rows (slice or list): indices of the records to be read
+            (default: all records)
+        index_path (str): sidecar index file path
+            (default: ``<in_file>.idx``)
+        persist_index (bool): if False, the index is not persisted
+        sampler (flashflood.core.container.Sampler): record sampler
+        **kwargs: kwargs
+    """
+    def __init__(self, in_file, rows=None, index_path=None,
+                 persist_index=True, sampler=None, **kwargs):
+        super().__init__(**kwargs)
+        self._out_edge = FuncEdge(sampler)
+        self.in_file = in_file
+        self.rows = rows
+        self.index_path = index_path
+        self.persist_index = persist_index
+
+    def run(self, on_finish, on_abort):
+        with sdfile.SDFileIndex(
+                self.in_file, self.index_path, self.persist_index) as index:
+            offsets = index.offsets
+            indices = _selected(self.rows, len(index))
+        func = functools.partial(
+            range_to_record, self.in_file, self.sdf_options,
+            self.implicit_hydrogen, self.recalc_coords)
+        self._out_edge.send(
+            func, ((offsets[i], offsets[i + 1]) for i in indices))
+        on_finish()
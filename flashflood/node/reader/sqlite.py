@@ -19,7 +19,7 @@ class SQLiteReader(ReaderBase):
     def run(self, on_finish, on_abort):
         rcds = []
         for file_, table in self.tables:
-            conn = sqlite.Connection(file_)
+            conn = sqlite.Connection(file_, sqlite.shared_pool())
             rcds.append(conn.rows_iter(table))
             if self.counter is not None:
                 self.counter.value += conn.rows_count(table)
@@ -34,20 +34,22 @@ class SQLiteReaderSearch(SQLiteReader):
         self.values = values
 
     def run(self, on_finish, on_abort):
-        rcds = []
-        for v in self.values:
-            for file_, table in self.tables:
-                conn = sqlite.Connection(file_)
-                if self.key not in conn.columns(table):
-                    continue
-                found = conn.find_first(table, self.key, v)
-                if found:
-                    rcds.append(found)
-                    break
-            else:
-                rcds.append({self.key: v})
+        values = list(self.values)
+        found = {}
+        for file_, table in self.tables:
+            if len(found) == len(values):
+                break
+            conn = sqlite.Connection(file_, sqlite.shared_pool())
+            if self.key not in conn.columns(table):
+                continue
+            # Only values not found in preceding tables are queried
+            rest = [i for i in range(len(values)) if i not in found]
+            res = conn.find_many(table, self.key, [values[i] for i in rest])
+            for pos, row in res:
+                found.setdefault(rest[pos], row)
+        rcds = [found.get(i, {self.key: v}) for i, v in enumerate(values)]
         if self.counter is not None:
-            self.counter.value += len(self.values)
+            self.counter.value += len(values)
         self._out_edge.send(rcds)
         on_finish()
 
@@ -62,7 +64,7 @@ class SQLiteReaderFilter(SQLiteReader):
     def run(self, on_finish, on_abort):
         rcds = []
         for file_, table in self.tables:
-            conn = sqlite.Connection(file_)
+            conn = sqlite.Connection(file_, sqlite.shared_pool())
             if self.key not in conn.columns(table):
                 continue
             found = conn.find_all(table, self.key, self.value, self.operator)
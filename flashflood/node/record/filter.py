@@ -5,6 +5,7 @@
 #
 
 from flashflood import sort
+from flashflood.core.node import BatchNode
 from flashflood.node.control.filter import Filter, AsyncFilter
 
 
@@ -20,3 +21,15 @@ class AsyncFilterRecords(AsyncFilter):
         super().__init__(
             lambda x: sort.op_to_func[op](x[key], value),
             residue_counter=None, fields=None, **kwargs)
+
+
+class BatchFilterRecords(BatchNode):
+    """Vectorized `FilterRecords` which works on record batches"""
+    def __init__(self, key, value, op="=", **kwargs):
+        super().__init__(fields=None, **kwargs)
+        self.key = key
+        self.value = value
+        self.op = op
+
+    def process_batch(self, batch):
+        return batch.take(batch.compare(self.key, self.value, self.op))
@@ -30,19 +30,16 @@ class MergeRecords(Node):
         for edge in self._in_edges:
             if self.edge_type(edge) == "AsyncEdge":
                 self.synchronizer(edge)
-            while 1:
-                if edge.status == "aborted":
-                    on_abort()
-                    return
-                if edge.status == "done":
-                    if self.edge_type(edge) == "IterEdge":
-                        rcds.append(edge.records)
-                    elif self.edge_type(edge) == "FuncEdge":
-                        rcds.append(map(edge.func, edge.records))
-                    elif self.edge_type(edge) == "AsyncEdge":
-                        rcds.append(self._rcds_tmp)
-                    break
-                yield gen.sleep(self.interval)
+            status = yield edge.wait()
+            if status == "aborted":
+                on_abort()
+                return
+            if self.edge_type(edge) == "IterEdge":
+                rcds.append(edge.records)
+            elif self.edge_type(edge) == "FuncEdge":
+                rcds.append(map(edge.func, edge.records))
+            elif self.edge_type(edge) == "AsyncEdge":
+                rcds.append(self._rcds_tmp)
         self._out_edge.send(itertools.chain.from_iterable(rcds))
         on_finish()
 
@@ -65,11 +62,11 @@ class MergeRecords(Node):
 
 
 class AsyncMergeRecords(Node):
-    def __init__(self, sampler=None, **kwargs):
+    def __init__(self, sampler=None, capacity=None, **kwargs):
         super().__init__(**kwargs)
         self._in_edges = []
         self._rcds_tmp = None
-        self._out_edge = AsyncEdge(sampler)
+        self._out_edge = AsyncEdge(sampler, capacity)
         self._interrupted = False
 
     def add_in_edge(self, edge, port):
@@ -82,19 +79,16 @@ class AsyncMergeRecords(Node):
         for edge in self._in_edges:
             if self.edge_type(edge) == "AsyncEdge":
                 self.async_loop(edge)
-            while 1:
-                if edge.status == "aborted":
-                    yield self._out_edge.abort()
-                    on_abort()
-                    return
-                if edge.status == "done":
-                    if self.edge_type(edge) == "AsyncEdge":
-                        yield self._out_edge.done()
-                        on_finish()
-                    else:
-                        yield self.asynchronizer(edge, on_finish, on_abort)
-                    break
-                yield gen.sleep(self.interval)
+            status = yield edge.wait()
+            if status == "aborted":
+                yield self._out_edge.abort()
+                on_abort()
+                return
+            if self.edge_type(edge) == "AsyncEdge":
+                yield self._out_edge.done()
+                on_finish()
+            else:
+                yield self.asynchronizer(edge, on_finish, on_abort)
 
     def interrupt(self):
         self._interrupted = True
@@ -102,8 +96,10 @@ class AsyncMergeRecords(Node):
     @gen.coroutine
     def async_loop(self, edge):
         while 1:
-            in_ = yield edge.get()
-            yield self._out_edge.put(self.process_record(in_))
+            in_ = yield edge.get_many(task_done=False)
+            yield self._out_edge.put_many(
+                [self.process_record(r) for r in in_])
+            edge.task_done(len(in_))
 
     @gen.coroutine
     def asynchronizer(self, edge, on_finish, on_abort):
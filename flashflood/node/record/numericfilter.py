@@ -6,6 +6,7 @@
 
 import functools
 from flashflood import sort
+from flashflood.core.node import BatchNode
 from flashflood.node.control.filter import Filter, AsyncFilter
 
 
@@ -29,3 +30,16 @@ class AsyncNumericFilter(AsyncFilter):
         super().__init__(
             functools.partial(numfilter, key, value, op),
             residue_counter=None, fields=None, **kwargs)
+
+
+class BatchNumericFilter(BatchNode):
+    """Vectorized `NumericFilter` which works on record batches"""
+    def __init__(self, key, value, op="=", **kwargs):
+        super().__init__(fields=None, **kwargs)
+        self.key = key
+        self.value = value
+        self.op = op
+
+    def process_batch(self, batch):
+        return batch.take(
+            batch.numeric_compare(self.key, self.value, self.op))
@@ -4,20 +4,99 @@
 # http://opensource.org/licenses/MIT
 #
 
-from flashflood.sort import sort_key
+import heapq
+
+from flashflood import functional
+from flashflood.sort import argsort, sort_key
+from flashflood.spill import SpillFile
 from flashflood.core.node import IterNode
 
 
+class Descending(object):
+    """Sort key wrapper which reverses the order of the key"""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def composite_key(order, rcd):
+    """Returns the sort key of the record for multiple sort orders
+
+    Sorting by the composite key is equivalent to stable sorts by each
+    order from the last one.
+
+    Args:
+        order (list): list of (field key, ascending) tuples
+        rcd (dict): record
+    """
+    return tuple(sort_key(rcd[k]) if asc else Descending(sort_key(rcd[k]))
+                 for k, asc in order)
+
+
 class NumericSort(IterNode):
-    def __init__(self, order, **kwargs):
+    """Sorts records by fields
+
+    If ``run_size`` is given, records are sorted by external merge sort.
+    Sorted runs of ``run_size`` records are spilled to temporary files and
+    merged at the end, so that the memory usage is bounded regardless of
+    the number of records.
+
+    Args:
+        order (list): list of (field key, ascending) tuples
+        run_size (int): maximum number of records sorted in the memory.
+            If None, all records are sorted in the memory.
+        tmpdir (str): directory of temporary files
+        **kwargs: kwargs
+    """
+    def __init__(self, order, run_size=None, tmpdir=None, **kwargs):
         super().__init__(**kwargs)
         self.order = order
+        self.run_size = run_size
+        self.tmpdir = tmpdir
         self._seen = set()
         self._mapping = {}
 
-    def processor(self, rcds):
-        rcds = list(rcds)
+    def key(self, rcd):
+        return composite_key(self.order, rcd)
+
+    def sort(self, rcds):
+        """Sorts records in place"""
+        # Stable sorts by each key do not need Descending wrappers, and
+        # numeric columns are sorted by numpy if available.
         for key, asc in reversed(self.order):
-            rcds.sort(key=lambda x: sort_key(x[key]), reverse=not asc)
-        for r in rcds:
-            yield r
+            idx = argsort([r[key] for r in rcds], reverse=not asc)
+            rcds[:] = [rcds[i] for i in idx]
+
+    def processor(self, rcds):
+        if self.run_size is None:
+            rcds = list(rcds)
+            self.sort(rcds)
+            yield from rcds
+            return
+        runs = []
+        try:
+            for chunk in functional.chunked(rcds, self.run_size):
+                self.sort(chunk)
+                if not runs and len(chunk) < self.run_size:
+                    # Fits in the memory
+                    yield from chunk
+                    return
+                run = SpillFile(
+                    block_size=min(1000, self.run_size), dir=self.tmpdir)
+                runs.append(run)
+                run.write_many(chunk)
+                run.flush()
+                del chunk
+            # heapq.merge is stable (ties are resolved in order of runs)
+            yield from heapq.merge(
+                *[r.read() for r in runs], key=self.key)
+        finally:
+            for run in runs:
+                run.close()
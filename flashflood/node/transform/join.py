@@ -4,31 +4,159 @@
 # http://opensource.org/licenses/MIT
 #
 
+import itertools
+
 from tornado import gen
 
+from flashflood.core import workerpool
 from flashflood.core.edge import IterEdge, FuncEdge, AsyncEdge
 from flashflood.core.node import Node
+from flashflood.spill import SpillFile
 
 
-class LeftJoin(Node):
-    """Left join
+JOIN_TYPES = ("inner", "left", "full", "anti")
+
+# Partitions larger than the memory budget are partitioned again up to
+# this depth (partitions of skewed keys cannot be split anyway).
+MAX_PARTITION_DEPTH = 3
+
+
+def _key_func(key):
+    if isinstance(key, (list, tuple)):
+        keys = tuple(key)
+        return lambda r: tuple(r[k] for k in keys)
+    return lambda r: r[key]
+
+
+def hash_join(left_key, right_key, how, right_unique, left, right):
+    """Joins records by a hash table of the right records
+
+    Args:
+        left_key (str or list): join key(s) of the left records
+        right_key (str or list): join key(s) of the right records
+        how (str): ``inner``, ``left``, ``full`` or ``anti``
+        right_unique (bool): if True, only the last right record of each
+            key is joined
+        left (iterable): left records
+        right (iterable): right records
+
+    Returns:
+        iterable: joined records. Records of the full join which do not
+        match any left record follow the left records.
+    """
+    lkey = _key_func(left_key)
+    rkey = _key_func(right_key)
+    table = {}
+    if right_unique:
+        for r in right:
+            table[rkey(r)] = [r]
+    else:
+        for r in right:
+            table.setdefault(rkey(r), []).append(r)
+    matched = set()
+    for r in left:
+        k = lkey(r)
+        found = table.get(k)
+        if found is None:
+            if how == "anti":
+                yield r
+            elif how in ("left", "full"):
+                yield r.copy()
+            continue
+        if how == "anti":
+            continue
+        if how == "full":
+            matched.add(k)
+        for f in found:
+            new_row = r.copy()
+            new_row.update(f)
+            yield new_row
+    if how == "full":
+        for k, found in table.items():
+            if k not in matched:
+                for f in found:
+                    yield f.copy()
+
+
+def join_partition(left_key, right_key, how, right_unique, left, right):
+    """`hash_join` for worker processes (returns a list)"""
+    return list(hash_join(left_key, right_key, how, right_unique, left, right))
+
+
+def _drain(spill):
+    """Generates records of the SpillFile and closes it afterwards"""
+    try:
+        yield from spill.read()
+    finally:
+        spill.close()
+
+
+class Join(Node):
+    """Hash join
         edge 0: left records edge
         edge 1: right records edge
 
         1. synchronize the right edge
-        2. generate mapping from the right edge
-        3. apply mapping to the left edge
+        2. generate hash table from the right edge
+        3. probe the hash table by the left edge
 
+    If the number of right records exceeds ``memory_budget``, both inputs
+    are hash-partitioned into temporary files and each pair of partitions
+    is joined separately (grace hash join), so that only a partition of the
+    right records is held in memory. Partitions which still exceed the
+    budget are partitioned again. In the partitioned mode, records are
+    emitted in order of partitions and partitions can be joined in worker
+    processes in parallel.
+
+    Args:
+        left_key (str or list): join key of the left records. A list of keys
+            is regarded as a composite key.
+        right_key (str or list): join key of the right records
+        how (str): join type
+
+            * inner: joined records of matched keys
+            * left: all left records joined with the right record if matched
+            * full: left join and right records which are not matched
+            * anti: left records which do not match any right record
+
+        right_unique (bool): if True, only the last right record of each key
+            is joined. Otherwise, left records are joined with all the right
+            records of the key.
+        memory_budget (int): maximum number of right records held in memory.
+            If None, all right records are held in memory.
+        partitions (int): number of partitions of the grace hash join
+        parallel (bool): if True, partitions are joined in worker processes
+            without blocking the IOLoop, and joined records are spilled to a
+            temporary file before they are sent to the downstream
+        pool (flashflood.core.workerpool.WorkerPool): worker pool
+            (default: shared pool)
+        tmpdir (str): directory of temporary files
+        sampler (flashflood.core.container.Sampler): record sampler
+        capacity (int): queue capacity of the outgoing AsyncEdge
+        **kwargs: kwargs
     """
-    def __init__(self, left_key, right_key, sampler=None, **kwargs):
+    def __init__(self, left_key, right_key, how="left", right_unique=False,
+                 memory_budget=None, partitions=16, parallel=False,
+                 pool=None, tmpdir=None, sampler=None, capacity=None,
+                 **kwargs):
         super().__init__(**kwargs)
+        if how not in JOIN_TYPES:
+            raise ValueError("Unknown join type {}".format(how))
         self._left_in = None
         self._right_in = None
         self.left_key = left_key
         self.right_key = right_key
+        self.how = how
+        self.right_unique = right_unique
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self.parallel = parallel
+        self.pool = pool
+        self.tmpdir = tmpdir
         self._left_tmp = None
         self._right_tmp = None
         self.sampler = sampler
+        self.capacity = capacity
 
     def add_in_edge(self, edge, port):
         if port == 0:
@@ -44,13 +172,14 @@ class LeftJoin(Node):
         elif self.edge_type(self._left_in) == "FuncEdge":
             self._out_edge = FuncEdge(self.sampler)
         elif self.edge_type(self._left_in) == "AsyncEdge":
-            self._out_edge = AsyncEdge(self.sampler)
+            self._out_edge = AsyncEdge(self.sampler, self.capacity)
         self.merge_fields()
         self.update_params()
 
     def merge_fields(self):
         self._out_edge.fields.merge(self._left_in.fields)
-        self._out_edge.fields.merge(self._right_in.fields)
+        if self.how != "anti":
+            self._out_edge.fields.merge(self._right_in.fields)
         self._out_edge.fields.merge(self.fields)
 
     def update_params(self):
@@ -63,58 +192,166 @@ class LeftJoin(Node):
         yield self.sync_right_in(on_abort)
         if self.edge_type(self._left_in) == "AsyncEdge":
             self.synchronizer()
-        while 1:
-            if self._left_in.status == "aborted":
+        status = yield self._left_in.wait()
+        if status == "aborted":
+            if self.edge_type(self._left_in) == "AsyncEdge":
+                yield self._out_edge.abort()
+            else:
                 self._out_edge.status = "aborted"
-                on_abort()
-                break
-            if self._left_in.status == "done":
-                if self.edge_type(self._left_in) == "IterEdge":
-                    self._out_edge.send(self.processor(self._left_in.records))
-                elif self.edge_type(self._left_in) == "FuncEdge":
-                    self._out_edge.send(self.processor(
-                        map(self._left_in.func, self._left_in.records)))
-                else:
-                    self._out_edge.send(self.processor(self._left_tmp))
-                on_finish()
-                break
-            yield gen.sleep(self.interval)
+            on_abort()
+            return
+        if self.edge_type(self._left_in) == "IterEdge":
+            left = self._left_in.records
+        elif self.edge_type(self._left_in) == "FuncEdge":
+            left = map(self._left_in.func, self._left_in.records)
+        else:
+            left = self._left_tmp
+        if self.parallel and self.memory_budget is not None:
+            joined = yield self.join_parallel(left)
+        else:
+            joined = self.processor(left)
+        if self.edge_type(self._left_in) == "AsyncEdge":
+            yield self._out_edge.put_many(joined)
+            yield self._out_edge.done()
+        else:
+            self._out_edge.send(joined)
+        on_finish()
 
     @gen.coroutine
     def synchronizer(self):
         self._left_tmp = []
         while 1:
-            in_ = yield self._left_in.get()
-            self._left_tmp.append(in_)
+            in_ = yield self._left_in.get_many(task_done=False)
+            self._left_tmp.extend(in_)
+            self._left_in.task_done(len(in_))
 
     @gen.coroutine
     def sync_right_in(self, on_abort):
         """Synchronize right edge"""
         if self.edge_type(self._right_in) == "AsyncEdge":
             self.right_sync()
-        while 1:
-            if self._right_in.status == "aborted":
-                on_abort()
-                return
-            if self._right_in.status == "done":
-                if self.edge_type(self._right_in) == "IterEdge":
-                    self._right_tmp = self._right_in.records
-                elif self.edge_type(self._in_edge) == "FuncEdge":
-                    self._right_tmp = map(
-                        self._right_in.func, self._right_in.records)
-                break
-            yield gen.sleep(self.interval)
+        status = yield self._right_in.wait()
+        if status == "aborted":
+            on_abort()
+            return
+        if self.edge_type(self._right_in) == "IterEdge":
+            self._right_tmp = self._right_in.records
+        elif self.edge_type(self._right_in) == "FuncEdge":
+            self._right_tmp = map(
+                self._right_in.func, self._right_in.records)
 
     @gen.coroutine
     def right_sync(self):
         self._right_tmp = []
         while 1:
-            in_ = yield self._right_in.get()
-            self._right_tmp.append(in_)
+            in_ = yield self._right_in.get_many(task_done=False)
+            self._right_tmp.extend(in_)
+            self._right_in.task_done(len(in_))
 
     def processor(self, rcds):
-        mapping = {r[self.right_key]: r for r in self._right_tmp}
-        for r in rcds:
-            new_row = r.copy()
-            new_row.update(mapping.get(r[self.left_key], {}))
-            yield new_row
+        yield from self._join(rcds, iter(self._right_tmp), 0)
+
+    def _join(self, left, right, depth):
+        if self.memory_budget is None:
+            yield from hash_join(
+                self.left_key, self.right_key, self.how, self.right_unique,
+                left, right)
+            return
+        buffered = list(itertools.islice(right, self.memory_budget + 1))
+        if len(buffered) <= self.memory_budget:
+            yield from hash_join(
+                self.left_key, self.right_key, self.how, self.right_unique,
+                left, buffered)
+            return
+        if depth >= MAX_PARTITION_DEPTH:
+            buffered.extend(right)
+            yield from hash_join(
+                self.left_key, self.right_key, self.how, self.right_unique,
+                left, buffered)
+            return
+        right_parts = self.partition(
+            itertools.chain(buffered, right), self.right_key, depth)
+        del buffered
+        left_parts = []
+        try:
+            left_parts = self.partition(left, self.left_key, depth)
+            for lp, rp in zip(left_parts, right_parts):
+                yield from self._join(lp.read(), rp.read(), depth + 1)
+        finally:
+            for part in itertools.chain(left_parts, right_parts):
+                part.close()
+
+    def partition(self, rcds, key, depth):
+        """Hash-partitions records into temporary files
+
+        Returns:
+            list: `flashflood.spill.SpillFile` of each partition
+        """
+        keyf = _key_func(key)
+        parts = [SpillFile(dir=self.tmpdir) for _ in range(self.partitions)]
+        try:
+            for r in rcds:
+                # The depth is hashed together to split skewed partitions
+                parts[hash((depth, keyf(r))) % self.partitions].write(r)
+        except BaseException:
+            for part in parts:
+                part.close()
+            raise
+        return parts
+
+    @gen.coroutine
+    def join_parallel(self, left):
+        """Joins partitions in worker processes
+
+        The IOLoop is not blocked while the workers join the partitions.
+        Joined records are spilled to a temporary file.
+
+        Returns:
+            iterable: joined records
+        """
+        right = iter(self._right_tmp)
+        buffered = list(itertools.islice(right, self.memory_budget + 1))
+        if len(buffered) <= self.memory_budget:
+            return hash_join(
+                self.left_key, self.right_key, self.how, self.right_unique,
+                left, buffered)
+        right_parts = self.partition(
+            itertools.chain(buffered, right), self.right_key, 0)
+        del buffered
+        left_parts = []
+        joined = SpillFile(dir=self.tmpdir)
+        try:
+            left_parts = self.partition(left, self.left_key, 0)
+            pool = self.pool or workerpool.shared_pool()
+            window = []
+            for lp, rp in zip(left_parts, right_parts):
+                window.append(pool.submit(
+                    join_partition, self.left_key, self.right_key,
+                    self.how, self.right_unique, list(lp.read()),
+                    list(rp.read())))
+                if len(window) >= pool.processes:
+                    res = yield window.pop(0)
+                    joined.write_many(res)
+            for future in window:
+                res = yield future
+                joined.write_many(res)
+        except BaseException:
+            joined.close()
+            raise
+        finally:
+            for part in itertools.chain(left_parts, right_parts):
+                part.close()
+        return _drain(joined)
+
+
+class LeftJoin(Join):
+    """Left join
+        edge 0: left records edge
+        edge 1: right records edge
+
+    Only the last right record of each key is joined by default
+    (see `Join` for options).
+    """
+    def __init__(self, left_key, right_key, right_unique=True, **kwargs):
+        super().__init__(left_key, right_key, how="left",
+                         right_unique=right_unique, **kwargs)
@@ -30,22 +30,20 @@ class ContainerWriter(Node):
     def run(self, on_finish, on_abort):
         if self.edge_type(self._in_edge) == "AsyncEdge":
             self.synchronizer()
-        while 1:
-            if self._in_edge.status == "aborted":
-                on_abort()
-                break
-            if self._in_edge.status == "done":
-                if self.edge_type(self._in_edge) == "IterEdge":
-                    self.container.records = list(self._in_edge.records)
-                elif self.edge_type(self._in_edge) == "FuncEdge":
-                    self.container.records = list(
-                        map(self._in_edge.func, self._in_edge.records))
-                on_finish()
-                break
-            yield gen.sleep(self.interval)
+        status = yield self._in_edge.wait()
+        if status == "aborted":
+            on_abort()
+            return
+        if self.edge_type(self._in_edge) == "IterEdge":
+            self.container.records = list(self._in_edge.records)
+        elif self.edge_type(self._in_edge) == "FuncEdge":
+            self.container.records = list(
+                map(self._in_edge.func, self._in_edge.records))
+        on_finish()
 
     @gen.coroutine
     def synchronizer(self):
         while 1:
-            in_ = yield self._in_edge.get()
-            self.container.records.append(in_)
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self.container.records.extend(in_)
+            self._in_edge.task_done(len(in_))
@@ -12,18 +12,42 @@ import warnings
 
 from tornado import gen
 
+from flashflood import functional
 from flashflood import static
 from flashflood.core.node import Node
 from flashflood.core.task import (
     InvalidOperationError, UnexpectedOperationWarning)
 from flashflood.lod import ListOfDict
-from flashflood import debug
 
 
 class SQLiteWriter(Node):
+    """SQLite database writer
+
+    Records are inserted by executemany with a statement prepared per table.
+    Columns are the fields of the incoming edge. Records which have keys
+    that are not in the fields abort the load.
+    If a batch contains rows which violate constraints, the batch will be
+    inserted row by row and the invalid rows will be skipped. Indexes are
+    created after all records are inserted.
+
+    Args:
+        dest_path (str): destination file path
+        primary_key (str): primary key field
+        create_index (list): fields to be indexed
+        schema_file (bool): if True, write schema YAML file
+        allow_overwrite (bool): if False, raise error if the file exists
+        notice_per_records (int): progress notice interval (in records)
+        batch_size (int): number of records per executemany
+        pragmas (dict): PRAGMA settings applied during the load
+            (ex. ``{"journal_mode": "MEMORY", "synchronous": "OFF",
+            "cache_size": -1000000}``). ``journal_mode`` OFF is replaced
+            with MEMORY, as invalid rows cannot be skipped without rollback.
+        vacuum (bool): if True, run VACUUM after the load
+    """
     def __init__(self, dest_path, primary_key=None, create_index=None,
                  schema_file=True, allow_overwrite=True,
-                 notice_per_records=10000, **kwargs):
+                 notice_per_records=10000, batch_size=10000, pragmas=None,
+                 vacuum=True, **kwargs):
         super().__init__(**kwargs)
         self._in_edges = []
         self.dest_path = dest_path
@@ -32,6 +56,16 @@ class SQLiteWriter(Node):
         self.schema_file = schema_file
         self.allow_overwrite = allow_overwrite
         self.notice_per_records = notice_per_records
+        self.batch_size = batch_size
+        self.pragmas = dict(pragmas or {})
+        for k, v in self.pragmas.items():
+            if k.lower() == "journal_mode" and str(v).upper() == "OFF":
+                # ROLLBACK TO does nothing without the rollback journal
+                warnings.warn(
+                    "SQLiteWriter: journal_mode OFF is replaced with MEMORY",
+                    UnexpectedOperationWarning)
+                self.pragmas[k] = "MEMORY"
+        self.vacuum = vacuum
         self.conn = None
         self._rcds_tmp = None
         self._results = None
@@ -52,19 +86,16 @@ class SQLiteWriter(Node):
             result = {"fields": edge.fields, "params": edge.params}
             if self.edge_type(edge) == "AsyncEdge":
                 self.synchronizer(edge)
-            while 1:
-                if edge.status == "aborted":
-                    on_abort()
-                    return
-                if edge.status == "done":
-                    if self.edge_type(edge) == "IterEdge":
-                        result["records"] = edge.records
-                    elif self.edge_type(edge) == "FuncEdge":
-                        result["records"] = map(edge.func, edge.records)
-                    elif self.edge_type(edge) == "AsyncEdge":
-                        result["records"] = self._rcds_tmp
-                    break
-                yield gen.sleep(self.interval)
+            status = yield edge.wait()
+            if status == "aborted":
+                on_abort()
+                return
+            if self.edge_type(edge) == "IterEdge":
+                result["records"] = edge.records
+            elif self.edge_type(edge) == "FuncEdge":
+                result["records"] = map(edge.func, edge.records)
+            elif self.edge_type(edge) == "AsyncEdge":
+                result["records"] = self._rcds_tmp
             self._results.append(result)
         self.write(on_finish, on_abort)
 
@@ -89,15 +120,17 @@ class SQLiteWriter(Node):
     def synchronizer(self, edge):
         self._rcds_tmp = []
         while 1:
-            in_ = yield edge.get()
-            self._rcds_tmp.append(in_)
+            in_ = yield edge.get_many(task_done=False)
+            self._rcds_tmp.extend(in_)
+            edge.task_done(len(in_))
 
-    @debug.profile
     def write(self, on_finish, on_abort):
         self.conn = sqlite3.connect(self.dest_path)
         self.conn.isolation_level = None
         cur = self.conn.cursor()
         cur.execute("PRAGMA page_size = 4096")
+        for k, v in self.pragmas.items():
+            cur.execute("PRAGMA {} = {}".format(k, v))
         cur.execute("BEGIN")
         try:
             # Truncate tables should be done in the transaction.
@@ -132,18 +165,27 @@ class SQLiteWriter(Node):
                 sql = "CREATE TABLE {}({})".format(table_name, fielddef)
                 cur.execute(sql)
                 # Insert records
-                for i, rcd in enumerate(result["records"]):
-                    fieldkeys = ", ".join(rcd.keys())
-                    sql = "INSERT INTO {}({})".format(table_name, fieldkeys)
-                    placeholders = ", ".join(["?"] * len(rcd))
-                    sql += " VALUES({})".format(placeholders)
-                    values = [rcd[c] for c in rcd.keys()]
-                    try:
-                        cur.execute(sql, values)
-                    except sqlite3.IntegrityError as e:
-                        print("skip #{}: {}".format(i, e))
-                    if i and not i % self.notice_per_records:
-                        print("{} rows processed...".format(i))
+                keys = [field["key"] for field in result["fields"]]
+                keyset = set(keys)
+                sql = "INSERT INTO {}({}) VALUES({})".format(
+                    table_name, ", ".join(keys), ", ".join(["?"] * len(keys)))
+                cnt = 0
+                for chunk in functional.chunked(
+                        result["records"], self.batch_size):
+                    for rcd in chunk:
+                        if not keyset.issuperset(rcd):
+                            # Same error as inserting the unknown column
+                            raise sqlite3.OperationalError(
+                                "table {} has no column named {}".format(
+                                    table_name,
+                                    next(k for k in rcd if k not in keyset)))
+                    values = [[rcd.get(k) for k in keys] for rcd in chunk]
+                    self.insert_many(cur, sql, values, cnt)
+                    if cnt // self.notice_per_records != \
+                            (cnt + len(values)) // self.notice_per_records:
+                        print("{} rows processed...".format(
+                            cnt + len(values)))
+                    cnt += len(values)
                 cnt = cur.execute("SELECT COUNT(*) FROM {}".format(table_name))
                 print("{} rows -> {}".format(cnt.fetchone()[0], table_name))
                 # Create index
@@ -174,7 +216,30 @@ class SQLiteWriter(Node):
                 with open(dest, "w") as f:
                     yaml.dump(schema, f)
             self.conn.commit()
-            print("Cleaning up...")
-            cur.execute("VACUUM")
+            if self.vacuum:
+                print("Cleaning up...")
+                cur.execute("VACUUM")
             self.conn.close()
             on_finish()
+
+    def insert_many(self, cur, sql, values, offset):
+        """Inserts a batch of rows
+
+        Args:
+            cur (sqlite3.Cursor): cursor
+            sql (str): prepared INSERT statement
+            values (list): list of row values
+            offset (int): row number of the first row (for notice)
+        """
+        cur.execute("SAVEPOINT batch")
+        try:
+            cur.executemany(sql, values)
+        except sqlite3.IntegrityError:
+            # Retry row by row to skip invalid rows
+            cur.execute("ROLLBACK TO batch")
+            for i, v in enumerate(values, offset):
+                try:
+                    cur.execute(sql, v)
+                except sqlite3.IntegrityError as e:
+                    print("skip #{}: {}".format(i, e))
+        cur.execute("RELEASE batch")
@@ -0,0 +1,90 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+
+from tornado import gen
+
+from flashflood.core.node import Node
+from flashflood.core.task import InvalidOperationError
+
+
+class FileWriterBase(Node):
+    """Streaming file writer base class
+
+    Records are written to the file as they arrive, so the whole records are
+    never stored in memory. Records from IterEdge or FuncEdge are written
+    after the upstream is done, and records from AsyncEdge are written
+    batch by batch while the upstream is running. The file will be removed
+    if the upstream is aborted.
+
+    Subclasses should implement `FileWriterBase.write_records`.
+
+    Args:
+        dest_path (str): destination file path
+        allow_overwrite (bool): if False, raise error if the file exists
+        buffer_size (int): file buffer size (in bytes)
+        **kwargs: kwargs
+    """
+    def __init__(self, dest_path, allow_overwrite=True, buffer_size=2 ** 20,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.dest_path = dest_path
+        self.allow_overwrite = allow_overwrite
+        self.buffer_size = buffer_size
+
+    @gen.coroutine
+    def run(self, on_finish, on_abort):
+        if self.edge_type(self._in_edge) == "AsyncEdge":
+            with self.open_file() as f:
+                self.write_header(f)
+                self.consumer(f)
+                status = yield self._in_edge.wait()
+        else:
+            status = yield self._in_edge.wait()
+            if status == "done":
+                if self.edge_type(self._in_edge) == "IterEdge":
+                    rcds = self._in_edge.records
+                else:
+                    rcds = map(self._in_edge.func, self._in_edge.records)
+                with self.open_file() as f:
+                    self.write_header(f)
+                    self.write_records(f, rcds)
+        if status == "aborted":
+            if os.path.exists(self.dest_path):
+                os.remove(self.dest_path)
+            on_abort()
+            return
+        on_finish()
+
+    def out_edge(self, port):
+        raise InvalidOperationError("Output node cannot have downstream edges")
+
+    def on_submit(self):
+        if os.path.exists(self.dest_path) and not self.allow_overwrite:
+            raise InvalidOperationError("The file already exists.")
+
+    @gen.coroutine
+    def consumer(self, f):
+        while 1:
+            in_ = yield self._in_edge.get_many(task_done=False)
+            self.write_records(f, in_)
+            self._in_edge.task_done(len(in_))
+
+    def open_file(self):
+        return open(self.dest_path, "w", buffering=self.buffer_size)
+
+    def write_header(self, f):
+        pass
+
+    def write_records(self, f, rcds):
+        """Writes records to the file
+
+        Args:
+            f (file): file object
+            rcds (iterable): records
+        """
+        raise NotImplementedError()
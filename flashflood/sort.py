@@ -4,7 +4,51 @@
 # http://opensource.org/licenses/MIT
 #
 
-import functools
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# First characters of strings which float() may accept
+FLOAT_INITIALS = frozenset("0123456789+-.iInN")
+
+
+def _maybe_float(text):
+    """Cheap check to avoid exceptions of float() for most text values"""
+    head = text.lstrip()[:1]
+    return head in FLOAT_INITIALS or head.isdigit()
+
+
+def sort_key(value):
+    """Numeric sort key
+
+    Numbers (and values which can be converted into float like ``"1.5"``)
+    come first in numeric order, then NaN, then other values in case-folded
+    text order of ``str(value)``. The key is a tuple, so that comparison of
+    keys does not need any Python-level function call.
+
+    Args:
+        value: value to sort
+
+    Returns:
+        tuple: sort key
+    """
+    if isinstance(value, (int, float)):
+        num = value
+    elif value is None:
+        return (2, "none")
+    elif isinstance(value, str) and not _maybe_float(value):
+        return (2, value.casefold())
+    else:
+        try:
+            num = float(value)
+        except (TypeError, ValueError, OverflowError):
+            return (2, str(value).casefold())
+    if num != num:  # NaN
+        return (1,)
+    return (0, num)
 
 
 def sort_cmp(a, b):
@@ -13,34 +57,39 @@ def sort_cmp(a, b):
     Args:
         a, b: values to compare
 
-    Note:
-        Text sort would be slower with this function
-        so use sorted(values, key=str.lower) instead.
+    Returns:
+        int: -1, 0 or 1 in the order of `sort_key`
     """
-    try:
-        return a - b
-    except TypeError:
-        try:
-            float(a)
-        except (TypeError, ValueError):
-            pass
-        else:
-            return -1
-        try:
-            float(b)
-        except (TypeError, ValueError):
-            pass
-        else:
-            return 1
-        if str(a).lower() > str(b).lower():
-            return 1
-        elif str(a).lower() < str(b).lower():
-            return -1
-        else:
-            return 0
+    ka, kb = sort_key(a), sort_key(b)
+    return (ka > kb) - (ka < kb)
+
+
+def argsort(values, reverse=False):
+    """Returns indices which stably sort the values by `sort_key`
+
+    If all values are numbers (not NaN) and numpy is available, the values
+    are sorted by numpy.
+
+    Args:
+        values (list): values to sort
+        reverse (bool): descending order (equal values keep their order)
+
+    Returns:
+        list: indices of the values
+    """
+    if NUMPY_AVAILABLE and values:
+        arr = numpy.asarray(values)
+        if arr.dtype.kind in "iu" or (
+                arr.dtype.kind == "f" and not numpy.isnan(arr).any()):
+            if not reverse:
+                return numpy.argsort(arr, kind="stable").tolist()
+            rev = numpy.argsort(arr[::-1], kind="stable")[::-1]
+            return (len(arr) - 1 - rev).tolist()
+    keys = [sort_key(v) for v in values]
+    return sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
 
 
-sort_key = functools.cmp_to_key(sort_cmp)
+NUMBERS = (int, float)
 
 
 def eq(a, b):
@@ -48,19 +97,27 @@ def eq(a, b):
 
 
 def lt(a, b):
-    return sort_cmp(a, b) < 0
+    if type(a) in NUMBERS and type(b) in NUMBERS:
+        return a < b
+    return sort_key(a) < sort_key(b)
 
 
 def le(a, b):
-    return sort_cmp(a, b) <= 0
+    if type(a) in NUMBERS and type(b) in NUMBERS:
+        return a <= b
+    return sort_key(a) <= sort_key(b)
 
 
 def gt(a, b):
-    return sort_cmp(a, b) > 0
+    if type(a) in NUMBERS and type(b) in NUMBERS:
+        return a > b
+    return sort_key(a) > sort_key(b)
 
 
 def ge(a, b):
-    return sort_cmp(a, b) >= 0
+    if type(a) in NUMBERS and type(b) in NUMBERS:
+        return a >= b
+    return sort_key(a) >= sort_key(b)
 
 
 op_to_func = {
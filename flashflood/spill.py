@@ -0,0 +1,74 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import pickle
+import tempfile
+
+
+class SpillFile(object):
+    """Temporary file which stores records spilled from the memory
+
+    Records are pickled in blocks of ``block_size`` records, so that they
+    can be read back sequentially without loading the whole file. The file
+    is removed when it is closed.
+
+    Args:
+        block_size (int): number of records pickled at once
+        dir (str): directory of the temporary file (default: system temp dir)
+
+    Attributes:
+        count (int): number of records written
+    """
+    def __init__(self, block_size=1000, dir=None):
+        self.block_size = block_size
+        self.count = 0
+        self._file = tempfile.TemporaryFile(dir=dir)
+        self._buffer = []
+
+    def write(self, record):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.block_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        if self._buffer:
+            pickle.dump(self._buffer, self._file, pickle.HIGHEST_PROTOCOL)
+            self._buffer = []
+
+    def size(self):
+        """Returns the size of the file in bytes"""
+        self.flush()
+        return self._file.tell()
+
+    def read(self):
+        """Generates records in order of writing
+
+        Records should not be written while reading.
+        """
+        self.flush()
+        self._file.seek(0)
+        while 1:
+            try:
+                block = pickle.load(self._file)
+            except EOFError:
+                break
+            yield from block
+        self._file.seek(0, 2)
+
+    def close(self):
+        self._buffer = []
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
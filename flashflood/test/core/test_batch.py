@@ -0,0 +1,125 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import unittest
+from unittest import mock
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core import batch
+from flashflood.core.batch import RecordBatch
+from flashflood.core.container import Container, Sampler
+from flashflood.core.node import BatchNode
+from flashflood.core.task import Task
+from flashflood.core.workflow import Workflow
+from flashflood.node.field.constant import BatchConstantField
+from flashflood.node.field.remove import BatchRemoveFields
+from flashflood.node.field.update import BatchUpdateFields
+from flashflood.node.record.filter import BatchFilterRecords
+from flashflood.node.record.numericfilter import BatchNumericFilter
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.container import ContainerWriter
+
+
+RECORDS = [
+    {"id": 1, "name": "a", "value": "1.5"},
+    {"id": 2, "name": "b", "value": 20},
+    {"id": 3, "name": "c", "value": "NA"},
+    {"id": 4, "name": "d"},
+    {"id": 5, "name": "e", "value": 3.0}
+]
+
+
+class TestRecordBatch(unittest.TestCase):
+    def check_batch(self):
+        rb = RecordBatch.from_records(RECORDS)
+        self.assertEqual(len(rb), 5)
+        self.assertEqual(rb.keys(), ["id", "name", "value"])
+        self.assertEqual(rb.column("value")[3], None)
+        mask = rb.numeric_compare("value", 2, ">=")
+        self.assertEqual(list(mask), [False, True, False, False, True])
+        mask = rb.compare("id", 3, "<")
+        self.assertEqual(list(mask), [True, True, False, False, False])
+        mask = rb.compare("name", "c", ">")
+        self.assertEqual(list(mask), [False, False, False, True, True])
+        sel = rb.take(rb.compare("id", 3, "<")).drop(["value"])
+        self.assertEqual(list(sel.records()),
+                         [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+        renamed = rb.select([4, 0]).rename({"name": "label"})
+        self.assertEqual(renamed.keys(), ["id", "label", "value"])
+        self.assertEqual(renamed.column("id"), [5, 1])
+        self.assertEqual(rb.keys(), ["id", "name", "value"])  # not modified
+        cat = batch.concat(batch.batched(RECORDS, 2))
+        self.assertEqual(len(cat), 5)
+        self.assertEqual(list(cat.records()), RECORDS)
+        # Records keep their fields through operations
+        self.assertEqual(list(batch.unbatched(batch.batched(RECORDS, 2))),
+                         RECORDS)
+        self.assertEqual(list(rb.select([3, 0]).records()),
+                         [RECORDS[3], RECORDS[0]])
+        self.assertEqual(list(rb.take(rb.compare("id", 3, ">")).records()),
+                         RECORDS[3:])
+        self.assertEqual(list(rb.rename({"value": "v"}).records())[3],
+                         {"id": 4, "name": "d"})
+        self.assertEqual(list(rb.assign("value", [0] * 5).records())[3],
+                         {"id": 4, "name": "d", "value": 0})
+        part = batch.concat([RecordBatch.from_records([{"id": 6}]), rb])
+        self.assertEqual(list(part.records())[0], {"id": 6})
+        self.assertEqual(list(part.records())[1:], RECORDS)
+        rcds = [{"id": 1, "value": None}, {"id": 2}]
+        self.assertEqual(list(RecordBatch.from_records(rcds).records()), rcds)
+        self.assertEqual(len(list(RecordBatch(size=3).records())), 3)
+
+    def test_batch(self):
+        self.check_batch()
+
+    def test_without_numpy(self):
+        with mock.patch.object(batch, "NUMPY_AVAILABLE", False):
+            self.check_batch()
+
+
+class TestBatchNode(AsyncTestCase):
+    @gen_test
+    def test_batch_chain(self):
+        wf = Workflow()
+        result = Container()
+        sampler = Sampler(size=2)
+        rcds = [{"id": i, "value": i % 7, "name": str(i), "tmp": 0}
+                for i in range(100)]
+        wf.append(IterInput(rcds))
+        wf.append(BatchNumericFilter("value", 3, "<", batch_size=16))
+        wf.append(BatchFilterRecords("id", 50, ">="))
+        wf.append(BatchConstantField("type", "x"))
+        wf.append(BatchRemoveFields(["tmp"], sampler=sampler))
+        wf.append(BatchUpdateFields({"name": "label"}))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        expected = [{"id": r["id"], "value": r["value"], "label": r["name"],
+                     "type": "x"} for r in rcds
+                    if r["value"] < 3 and r["id"] >= 50]
+        self.assertEqual(result.records, expected)
+        self.assertEqual(len(sampler.records), 2)
+        metrics = wf.node_metrics()
+        self.assertEqual(metrics[1]["records_out"], 44)
+        self.assertEqual(metrics[-2]["records_out"], len(expected))
+
+    @gen_test
+    def test_from_async(self):
+        from flashflood.core.node import AsyncNode
+        wf = Workflow()
+        result = Container()
+        wf.append(IterInput({"id": i} for i in range(10)))
+        wf.append(AsyncNode())
+        wf.append(BatchNode(batch_size=3))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(result.records, [{"id": i} for i in range(10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.cache import (
+    CachedTask, ResultCache, cache_key, cacheable_outputs)
+from flashflood.core.container import Container
+from flashflood.core.node import FuncNode
+from flashflood.core.workflow import Workflow, SubWorkflow
+from flashflood.node.control.filter import Filter
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.container import ContainerWriter
+from flashflood.node.writer.csv import CsvWriter
+
+
+class FilterWorkflow(Workflow):
+    def __init__(self, records, func, params=None):
+        super().__init__()
+        self.results = Container()
+        self.append(IterInput(records, params=params))
+        self.append(Filter(func))
+        self.append(ContainerWriter(self.results))
+
+
+def odd(x):
+    return x % 2
+
+
+class Threshold(object):
+    def __init__(self, value):
+        self.value = value
+
+    def above(self, x):
+        return x > self.value
+
+
+class TestCache(AsyncTestCase):
+    def test_cache_key(self):
+        key = cache_key(FilterWorkflow(range(10), odd))
+        self.assertEqual(key, cache_key(FilterWorkflow(range(10), odd)))
+        self.assertNotEqual(key, cache_key(FilterWorkflow(range(9), odd)))
+        self.assertNotEqual(key, cache_key(
+            FilterWorkflow(range(10), odd, params={"a": 1})))
+        self.assertNotEqual(
+            cache_key(FilterWorkflow(range(10), lambda x: x > 3)),
+            cache_key(FilterWorkflow(range(10), lambda x: x > 4)))
+        with self.assertRaises(ValueError):
+            cache_key(FilterWorkflow(iter(range(10)), odd))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "input.txt")
+            with open(path, "w") as f:
+                f.write("a")
+            key = cache_key(FilterWorkflow([path], odd))
+            self.assertEqual(key, cache_key(FilterWorkflow([path], odd)))
+            with open(path, "w") as f:
+                f.write("ab")
+            self.assertNotEqual(key, cache_key(FilterWorkflow([path], odd)))
+        # Instance state
+        self.assertEqual(
+            cache_key(FilterWorkflow(range(10), Threshold(3).above)),
+            cache_key(FilterWorkflow(range(10), Threshold(3).above)))
+        self.assertNotEqual(
+            cache_key(FilterWorkflow(range(10), Threshold(3).above)),
+            cache_key(FilterWorkflow(range(10), Threshold(4).above)))
+        self.assertNotEqual(
+            cache_key(FilterWorkflow(range(10), odd, {"t": Threshold(3)})),
+            cache_key(FilterWorkflow(range(10), odd, {"t": Threshold(4)})))
+        with self.assertRaises(ValueError):
+            cache_key(FilterWorkflow(range(10), odd, {"t": object()}))
+
+    @gen_test
+    def test_cached_task(self):
+        cache = ResultCache()
+        wf = FilterWorkflow(range(10), odd, params={"a": 1})
+        task = CachedTask(wf, cache)
+        yield task.execute()
+        self.assertFalse(task.cache_hit)
+        self.assertEqual(wf.results.records, [1, 3, 5, 7, 9])
+        wf.results.records.append(100)  # does not affect the cache
+        wf = FilterWorkflow(range(10), odd, params={"a": 1})
+        task = CachedTask(wf, cache)
+        yield task.execute()
+        self.assertTrue(task.cache_hit)
+        self.assertEqual(task.status, "done")
+        self.assertEqual(wf.results.records, [1, 3, 5, 7, 9])
+        self.assertEqual(wf.results.params, {"a": 1})
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        # Not cacheable
+        wf = FilterWorkflow(iter(range(10)), odd)
+        task = CachedTask(wf, cache)
+        yield task.execute()
+        self.assertEqual(wf.results.records, [1, 3, 5, 7, 9])
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    @gen_test
+    def test_side_effect_sink(self):
+        cache = ResultCache()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "out.csv")
+            for _ in range(2):
+                wf = Workflow()
+                wf.interval = 0.01
+                wf.append(IterInput([{"a": i} for i in range(3)]))
+                wf.append(CsvWriter(path, ["a"]))
+                task = CachedTask(wf, cache)
+                yield task.execute()
+                self.assertFalse(task.cache_hit)
+                self.assertIsNone(task.cache_key)
+                # The file is written again even if removed
+                with open(path) as f:
+                    self.assertEqual(len(f.read().splitlines()), 4)
+                os.remove(path)
+        self.assertEqual(cache.stats()["entries"], 0)
+        # Exits of sub workflows are not sinks
+        sub = SubWorkflow(FuncNode())
+        node = FuncNode(abs)
+        sub.set_entrance(node)
+        sub.set_exit(node)
+        wf = Workflow()
+        wf.append(IterInput(range(10)))
+        wf.append(sub)
+        wf.append(ContainerWriter(Container()))
+        self.assertTrue(cacheable_outputs(wf))
+        wf.connect(sub, CsvWriter("out.csv", ["a"]))
+        self.assertFalse(cacheable_outputs(wf))
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResultCache(max_entries=1, cache_dir=tmpdir)
+            cache.put("a", [([1, 2], [], {})])
+            cache.put("b", [([3], [], {})])
+            self.assertEqual(cache.stats()["evictions"], 1)
+            self.assertEqual(cache.get("a"), [([1, 2], [], {})])
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            self.assertIsNone(cache.get("c"))
+            # Persistent
+            cache = ResultCache(cache_dir=tmpdir)
+            self.assertEqual(cache.get("b"), [([3], [], {})])
+            cache.clear()
+            self.assertIsNone(cache.get("b"))
+
+    def test_disk_budget(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            size = len(pickle.dumps([([1], [], {})], pickle.HIGHEST_PROTOCOL))
+            cache = ResultCache(max_entries=1, cache_dir=tmpdir,
+                                max_disk_bytes=size * 2)
+            cache.put("a", [([1], [], {})])
+            cache.put("b", [([2], [], {})])
+            os.utime(os.path.join(tmpdir, "a.pickle"), ns=(1, 1))
+            os.utime(os.path.join(tmpdir, "b.pickle"), ns=(2, 2))
+            # Loading from the disk marks the file as recently used
+            self.assertEqual(cache.get("a"), [([1], [], {})])
+            cache.put("c", [([3], [], {})])
+            self.assertEqual(sorted(os.listdir(tmpdir)),
+                             ["a.pickle", "c.pickle"])
+            self.assertEqual(cache.stats()["disk_evictions"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
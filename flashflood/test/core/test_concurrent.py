@@ -14,6 +14,7 @@ from flashflood.core.concurrent import ConcurrentNode, ConcurrentFilter
 from flashflood.core.container import Container
 from flashflood.core.node import FuncNode
 from flashflood.core.task import Task, InvalidOperationError
+from flashflood.core.workerpool import WorkerPool
 from flashflood.core.workflow import Workflow, SubWorkflow
 from flashflood.node.reader.iterinput import IterInput
 from flashflood.node.writer.container import ContainerWriter
@@ -64,6 +65,61 @@ class TestConcurrentNode(AsyncTestCase):
         self.assertGreater(len(set(i[1] for i in result.records)), 1)
         self.assertTrue(all(n.status == "done" for n in wf.tasks))
 
+    @gen_test
+    def test_chunksize(self):
+        for chunksize in (3, 20, "auto"):
+            wf = Workflow()
+            result = Container()
+            wf.append(IterInput(range(10)))
+            wf.append(ConcurrentNode(func=twice, chunksize=chunksize))
+            wf.append(ContainerWriter(result))
+            task = Task(wf)
+            yield task.execute()
+            self.assertEqual(len(result.records), 10)
+            self.assertEqual(sum(i[0] for i in result.records), 90)
+        wf = Workflow()
+        result = Container()
+        wf.append(IterInput(range(10)))
+        wf.append(ConcurrentFilter(odd, func=which_process, chunksize=4))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(sum(i[0] for i in result.records), 25)
+
+    def test_invalid_chunksize(self):
+        for chunksize in ("10", "Auto", 0, 2.5, None, True):
+            with self.assertRaises(InvalidOperationError):
+                ConcurrentNode(func=twice, chunksize=chunksize)
+
+    @gen_test
+    def test_ordered(self):
+        wf = Workflow()
+        result = Container()
+        wf.append(IterInput(range(100)))
+        wf.append(ConcurrentNode(
+            func=twice, chunksize=3, ordered=True, window=2))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(
+            [i[0] for i in result.records], list(range(0, 200, 2)))
+
+    @gen_test
+    def test_window(self):
+        pool = WorkerPool(processes=3)
+        for window, maxsize in ((None, 6), (4, 4)):
+            wf = Workflow()
+            result = Container()
+            node = ConcurrentNode(func=twice, pool=pool, window=window)
+            wf.append(IterInput(range(10)))
+            wf.append(node)
+            wf.append(ContainerWriter(result))
+            task = Task(wf)
+            yield task.execute()
+            self.assertEqual(node.queue.maxsize, maxsize)
+            self.assertEqual(len(result.records), 10)
+        pool.shutdown()
+
     @gen_test
     def test_interrupt(self):
         wf = Workflow()
@@ -4,11 +4,13 @@
 # http://opensource.org/licenses/MIT
 #
 
+import itertools
 import unittest
 
 from tornado.testing import AsyncTestCase, gen_test
 
-from flashflood.core.edge import AsyncEdge
+from flashflood.core.container import Sampler
+from flashflood.core.edge import IterEdge, FuncEdge, AsyncEdge
 
 
 class TestEdge(AsyncTestCase):
@@ -22,6 +24,80 @@ class TestEdge(AsyncTestCase):
         yield edge.done()
         self.assertEqual(edge.status, "done")
 
+    @gen_test
+    def test_many(self):
+        edge = AsyncEdge(capacity=3)
+        self.assertEqual(edge.queue.maxsize, 3)
+        edge.put_many(range(5))
+        out = yield edge.get_many()
+        self.assertEqual(out, [0, 1, 2])
+        out = yield edge.get_many(max_size=1)
+        self.assertEqual(out, [3])
+        out = yield edge.get_many()
+        self.assertEqual(out, [4])
+        yield edge.done()
+        self.assertEqual(edge.status, "done")
+        edge = AsyncEdge()
+        self.assertEqual(edge.queue.maxsize, 20)
+        edge.resize(100)
+        self.assertEqual(edge.queue.maxsize, 100)
+        yield edge.put(1)
+        with self.assertRaises(ValueError):
+            edge.resize(10)
+
+    @gen_test
+    def test_wait(self):
+        edge = IterEdge()
+        waiting = edge.wait()
+        self.assertFalse(waiting.done())
+        edge.send(range(10))
+        status = yield waiting
+        self.assertEqual(status, "done")
+        # Already closed
+        status = yield edge.wait()
+        self.assertEqual(status, "done")
+        edge = AsyncEdge()
+        waiting = edge.wait()
+        yield edge.abort()
+        status = yield waiting
+        self.assertEqual(status, "aborted")
+
+    def test_sampler(self):
+        # Records are sampled lazily (infinite iterator)
+        sampler = Sampler(size=3)
+        edge = IterEdge(sampler)
+        edge.send(itertools.count())
+        self.assertEqual(sampler.records, [])
+        self.assertEqual(list(itertools.islice(edge.records, 10)),
+                         list(range(10)))
+        self.assertEqual(sampler.records, [0, 1, 2])
+        self.assertEqual(edge.count, 10)
+        sampler = Sampler(size=3, frequency=2)
+        edge = FuncEdge(sampler)
+        edge.send(lambda x: x * 10, itertools.count())
+        out = list(itertools.islice(map(edge.func, edge.records), 10))
+        self.assertEqual(out, list(range(0, 100, 10)))
+        self.assertEqual(sampler.records, [0, 20, 40])
+
+    def test_reservoir(self):
+        sampler = Sampler(size=5, reservoir=True, seed=1)
+        edge = IterEdge(sampler)
+        edge.send(range(1000))
+        self.assertEqual(sum(1 for _ in edge.records), 1000)
+        self.assertEqual(len(sampler.records), 5)
+        self.assertEqual(len(set(sampler.records)), 5)
+        self.assertNotEqual(sampler.records, list(range(5)))
+        # Each record is sampled with equal probability
+        hits = [0] * 10
+        for seed in range(2000):
+            sampler = Sampler(size=2, reservoir=True, seed=seed)
+            for r in range(10):
+                sampler.put(r)
+            for r in sampler.records:
+                hits[r] += 1
+        for h in hits:
+            self.assertAlmostEqual(h / 2000, 0.2, delta=0.05)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -23,6 +23,18 @@ class EagerNode(Node):
         pass
 
 
+class OrderedNode(EagerNode):
+    """Records execution order"""
+    def __init__(self, name, order, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.order = order
+
+    def run(self, on_finish, on_abort):
+        self.order.append(self.name)
+        on_finish()
+
+
 class LazyNode(Node):
     """For async task test"""
     def __init__(self, **kwargs):
@@ -54,9 +66,9 @@ class TestJobQueue(AsyncTestCase):
         self.assertEqual(len(jq.alive), 3)
         with self.assertRaises(ValueError):
             jq.get("invalidKey")
-        while task3.status != "done":
+        while jq.alive:
             yield gen.sleep(0.01)
-        self.assertEqual(len(jq.alive), 0)
+        self.assertEqual(task3.status, "done")
 
     @gen_test
     def test_queue(self):
@@ -74,9 +86,51 @@ class TestJobQueue(AsyncTestCase):
         while task2.status != "running":
             yield gen.sleep(0.01)
         jq.abort(task2.id)
-        while task2.status != "aborted":
+        while jq.alive:
+            yield gen.sleep(0.01)
+        self.assertEqual(task2.status, "aborted")
+
+    @gen_test
+    def test_slots(self):
+        jq = JobQueue(slots=3, reserved={"interactive": 1})
+        batch = [Task(LazyNode()) for _ in range(3)]
+        for t in batch:
+            yield jq.put(t, priority="batch")
+        while batch[1].status != "running":
+            yield gen.sleep(0.01)
+        yield gen.sleep(0.05)
+        self.assertEqual(batch[2].status, "ready")  # 1 slot is reserved
+        task = Task(LazyNode())
+        yield jq.put(task)
+        while task.status != "running":
+            yield gen.sleep(0.01)
+        self.assertEqual(jq.status()["interactive"]["running"], 1)
+        self.assertEqual(jq.status()["batch"]["queued"], 1)
+        jq.abort(task.id)
+        jq.abort(batch[2].id)  # cancel
+        jq.abort(batch[0].id)
+        jq.abort(batch[1].id)
+        while jq.alive:
+            yield gen.sleep(0.01)
+        self.assertEqual(batch[2].status, "cancelled")
+
+    @gen_test
+    def test_fair(self):
+        jq = JobQueue(maxsize=0, weights={"interactive": 2, "batch": 1})
+        order = []
+        for i in range(3):
+            node = OrderedNode("batch{}".format(i), order)
+            yield jq.put(Task(node), priority="batch")
+        for i in range(6):
+            node = OrderedNode("interactive{}".format(i), order)
+            yield jq.put(Task(node))
+        while jq.alive:
             yield gen.sleep(0.01)
-        self.assertEqual(len(jq.alive), 0)
+        self.assertEqual(order, [
+            "interactive0", "batch0", "interactive1", "interactive2",
+            "batch1", "interactive3", "interactive4", "batch2",
+            "interactive5"
+        ])
 
 
 if __name__ == '__main__':
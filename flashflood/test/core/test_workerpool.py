@@ -0,0 +1,81 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import unittest
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.concurrent import ConcurrentNode
+from flashflood.core.container import Container
+from flashflood.core.task import Task
+from flashflood.core import workerpool
+from flashflood.core.workerpool import WorkerPool
+from flashflood.core.workflow import Workflow
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.container import ContainerWriter
+
+
+def pid(x):
+    return os.getpid()
+
+
+class TestWorkerPool(AsyncTestCase):
+    def test_status(self):
+        pool = WorkerPool(processes=2)
+        pool.start()
+        self.assertEqual(pool.status()["submitted"], 0)
+        fs = [pool.submit(pid, i) for i in range(10)]
+        self.assertEqual(pool.status()["submitted"], 10)
+        self.assertTrue(all(f.result() != os.getpid() for f in fs))
+        pool.shutdown()
+        status = pool.status()
+        self.assertEqual(status["completed"], 10)
+        self.assertEqual(status["queued"], 0)
+        self.assertEqual(status["utilization"], 0)
+
+    def test_recycle(self):
+        pool = WorkerPool(processes=1, max_tasks_per_worker=2)
+        pids = [pool.submit(pid, i).result() for i in range(4)]
+        pool.shutdown()
+        self.assertEqual(pool.recycled, 1)
+        self.assertEqual(len(set(pids)), 2)
+
+    @gen_test
+    def test_reuse(self):
+        pool = WorkerPool(processes=1)
+        pool.start()
+        pids = set()
+        for _ in range(2):
+            wf = Workflow()
+            result = Container()
+            wf.append(IterInput(range(5)))
+            wf.append(ConcurrentNode(func=pid, pool=pool))
+            wf.append(ContainerWriter(result))
+            yield Task(wf).execute()
+            pids.update(result.records)
+        pool.shutdown()
+        self.assertEqual(len(pids), 1)
+        self.assertEqual(pool.status()["completed"], 10)
+
+    def test_shared_pool(self):
+        pool = WorkerPool(processes=1)
+        workerpool.set_shared_pool(pool)
+        try:
+            # Workers are ready before the first task
+            self.assertIsNotNone(pool._executor)
+            self.assertEqual(len(pool._executor._processes), 1)
+            self.assertIs(workerpool.shared_pool(), pool)
+        finally:
+            workerpool.set_shared_pool(None, start=False)
+        self.assertIsNone(pool._executor)
+        shared = workerpool.shared_pool()
+        self.assertEqual(len(shared._executor._processes), shared.processes)
+        workerpool.set_shared_pool(None, start=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
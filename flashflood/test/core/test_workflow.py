@@ -36,6 +36,49 @@ class TestWorkflow(AsyncTestCase):
         self.assertEqual(sum(result.records), 45)
         self.assertTrue(all(n.status == "done" for n in wf.tasks))
 
+    @gen_test
+    def test_queue_capacity(self):
+        wf = Workflow()
+        wf.queue_capacity = 100
+        result = Container()
+        wf.append(IterInput(range(1000)))
+        wf.append(AsyncNode())
+        wf.append(AsyncNode(capacity=5))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(wf.nodes[1].out_edge(0).queue.maxsize, 100)
+        self.assertEqual(wf.nodes[2].out_edge(0).queue.maxsize, 5)
+        self.assertEqual(sum(result.records), 499500)
+
+    @gen_test
+    def test_metrics(self):
+        wf = Workflow()
+        result = Container()
+        wf.append(IterInput(range(1000)))
+        wf.append(FuncNode(twice))
+        wf.append(AsyncNode(capacity=5))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        metrics = task.metrics()
+        self.assertEqual(metrics["status"], "done")
+        nodes = {m["name"]: m for m in metrics["nodes"]}
+        self.assertEqual(nodes["IterInput"]["records_in"], 0)
+        self.assertEqual(nodes["IterInput"]["records_out"], 1000)
+        self.assertEqual(nodes["FuncNode"]["records_out"], 1000)
+        self.assertIsNone(nodes["FuncNode"]["peak_queue"])
+        self.assertEqual(nodes["AsyncNode"]["records_in"], 1000)
+        self.assertEqual(nodes["AsyncNode"]["records_out"], 1000)
+        self.assertLessEqual(nodes["AsyncNode"]["peak_queue"], 5)
+        self.assertGreater(nodes["AsyncNode"]["peak_queue"], 0)
+        self.assertEqual(nodes["ContainerWriter"]["records_in"], 1000)
+        self.assertIsNone(nodes["ContainerWriter"]["records_out"])
+        self.assertGreaterEqual(
+            nodes["ContainerWriter"]["blocked_upstream"], 0)
+        self.assertTrue(all(m["wall_time"] is not None
+                            for m in metrics["nodes"]))
+
     @gen_test
     def test_interrupt(self):
         wf = Workflow()
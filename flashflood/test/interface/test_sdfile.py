@@ -0,0 +1,86 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import tempfile
+import unittest
+
+from chorus.demo import MOL
+
+from flashflood.interface import sdfile
+
+
+NAMES = ["demo", "Phe", "Arg", "Carbidopa", "Docetaxel"]
+
+
+def write_sdf(path, names):
+    with open(path, "w") as f:
+        for name in names:
+            f.write(MOL[name])
+            f.write("> <name>\n{}\n\n$$$$\n".format(name))
+
+
+class TestSDFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "test.sdf")
+        write_sdf(self.path, NAMES)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_scan_offsets(self):
+        self.assertEqual(list(sdfile.scan_offsets(b"")), [0])
+        self.assertEqual(list(sdfile.scan_offsets(b"a\n$$$$\nb\n$$$$")),
+                         [0, 7, 13])
+        self.assertEqual(list(sdfile.scan_offsets(b"a\n$$$$\nb\n")),
+                         [0, 7, 9])
+        self.assertEqual(list(sdfile.scan_offsets(b"a\n$$$$\n\n")), [0, 7])
+
+    def test_random_access(self):
+        with sdfile.SDFileIndex(self.path) as index:
+            self.assertEqual(len(index), 5)
+            self.assertTrue(index[3].startswith(MOL["Carbidopa"].encode()))
+            self.assertTrue(index[-1].endswith(b"Docetaxel\n\n$$$$\n"))
+            self.assertEqual(len(index[1:4]), 3)
+            self.assertEqual(len(index[::2]), 3)
+            with self.assertRaises(IndexError):
+                index[5]
+            begin, end = index.byte_range(1, 3)
+            self.assertEqual(index.offsets[3] - index.offsets[1], end - begin)
+            mols = list(sdfile.mols_from_range(self.path, begin, end))
+            self.assertEqual([m.data["name"] for m in mols], ["Phe", "Arg"])
+
+    def test_persist(self):
+        sdfile.SDFileIndex(self.path).close()
+        idx = self.path + sdfile.INDEX_SUFFIX
+        self.assertTrue(os.path.exists(idx))
+        with sdfile.SDFileIndex(self.path) as index:
+            self.assertEqual(len(index.load()), 6)
+        # Stale index is rebuilt
+        write_sdf(self.path, NAMES[:2])
+        os.utime(self.path, ns=(0, 0))
+        with sdfile.SDFileIndex(self.path) as index:
+            self.assertEqual(len(index), 2)
+        os.remove(idx)
+        with sdfile.SDFileIndex(self.path, persist=False) as index:
+            self.assertEqual(len(index), 2)
+        self.assertFalse(os.path.exists(idx))
+
+    def test_shards(self):
+        with sdfile.SDFileIndex(self.path) as index:
+            shards = index.shards(3)
+            self.assertEqual(len(shards), 3)
+            self.assertEqual(shards[0][0], 0)
+            self.assertEqual(shards[-1][1], os.path.getsize(self.path))
+            counts = [len(list(sdfile.mols_from_range(self.path, *s)))
+                      for s in shards]
+            self.assertEqual(counts, [2, 2, 1])
+            self.assertEqual(len(index.shards(10)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
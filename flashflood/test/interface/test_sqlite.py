@@ -0,0 +1,96 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from flashflood.interface import sqlite
+
+
+def create_db(path, value):
+    con = sqlite3.connect(path)
+    con.execute("CREATE TABLE test (id TEXT, value INTEGER)")
+    con.execute("INSERT INTO test VALUES (?, ?)", ("rcd", value))
+    con.commit()
+    con.close()
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.tmpdir.name, "db{}.sqlite3".format(i))
+            create_db(path, i)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reuse(self):
+        pool = sqlite.ConnectionPool(max_size=2, mmap_size=2**20)
+        con = pool.connect(self.paths[0])
+        self.assertIs(pool.connect(self.paths[0]), con)
+        self.assertEqual(
+            con.execute("PRAGMA mmap_size").fetchone()[0], 2**20)
+        conn = sqlite.Connection(self.paths[0], pool)
+        self.assertEqual(conn.find_first("test", "id", "rcd")["value"], 0)
+        # read-only
+        with self.assertRaises(sqlite3.OperationalError):
+            con.execute("INSERT INTO test VALUES ('a', 1)")
+        # LRU
+        pool.connect(self.paths[1])
+        pool.connect(self.paths[0])
+        pool.connect(self.paths[2])
+        self.assertIs(pool.connect(self.paths[0]), con)
+        self.assertEqual(len(pool._connections()), 2)
+        pool.close_all()
+        self.assertEqual(len(pool._connections()), 0)
+
+    def test_evicted_in_use(self):
+        pool = sqlite.ConnectionPool(max_size=1)
+        conns = [sqlite.Connection(p, pool) for p in self.paths]
+        rows = [conn.rows_iter("test") for conn in conns]
+        self.assertEqual(len(pool._connections()), 1)
+        self.assertEqual([next(r)["value"] for r in rows], [0, 1, 2])
+        pool.close_all()
+        self.assertEqual(conns[0].rows_count("test"), 1)
+
+    def test_replaced(self):
+        pool = sqlite.ConnectionPool()
+        conn = sqlite.Connection(self.paths[0], pool)
+        self.assertEqual(conn.rows_count("test"), 1)
+        rows = conn.rows_iter("test")
+        os.remove(self.paths[0])
+        create_db(self.paths[0], 100)
+        conn = sqlite.Connection(self.paths[0], pool)
+        self.assertEqual(conn.find_first("test", "id", "rcd")["value"], 100)
+        # The replaced connection is still usable
+        self.assertEqual(next(rows)["value"], 0)
+
+    def test_thread(self):
+        pool = sqlite.ConnectionPool()
+        con = pool.connect(self.paths[0])
+        result = {}
+
+        def query():
+            c = pool.connect(self.paths[0])
+            result["same"] = c is con
+            result["value"] = sqlite.Connection(
+                self.paths[0], pool).find_first("test", "id", "rcd")["value"]
+
+        th = threading.Thread(target=query)
+        th.start()
+        th.join()
+        self.assertFalse(result["same"])
+        self.assertEqual(result["value"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import unittest
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.container import Container
+from flashflood.core.node import AsyncNode
+from flashflood.core.task import Task
+from flashflood.core.workerpool import WorkerPool
+from flashflood.core.workflow import Workflow
+from flashflood.node.aggregate.groupby import (
+    GroupBy, AsyncGroupBy, GroupTable, Reducer)
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.container import ContainerWriter
+
+
+RECORDS = [
+    {"id": 1, "type": "a", "year": 2016, "value": 12.4},
+    {"id": 2, "type": "b", "year": 2016, "value": 54.23},
+    {"id": 3, "type": "c", "year": 2017, "value": 111},
+    {"id": 4, "type": "a", "year": 2016, "value": 98.0},
+    {"id": 5, "type": "c", "year": 2017, "value": None},
+    {"id": 6, "type": "a", "year": 2017, "value": 2345},
+    {"id": 7, "type": "c", "year": 2017, "value": 8}
+]
+
+AGGS = [
+    ("sum", "sum", "value"),
+    ("count", "count", "value"),
+    ("rows", "count", None),
+    ("min", "min", "value"),
+    ("max", "max", "value"),
+    ("mean", "mean", "value"),
+    ("first", "first", "id"),
+    ("last", "last", "value"),
+    ("ids", "list", "id"),
+    ("years", "uniq", "year")
+]
+
+
+def product(state, value):
+    return state * value
+
+
+PRODUCT = Reducer(float, product, product)
+
+
+class TestGroupBy(AsyncTestCase):
+    @gen_test
+    def test_reducers(self):
+        wf = Workflow()
+        wf.interval = 0.01
+        result = Container()
+        wf.append(IterInput(RECORDS))
+        wf.append(GroupBy("type", AGGS))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual([r["type"] for r in result.records], ["a", "b", "c"])
+        c = result.records[2]
+        self.assertEqual(c["sum"], 119)
+        self.assertEqual(c["count"], 2)
+        self.assertEqual(c["rows"], 3)
+        self.assertEqual(c["min"], 8)
+        self.assertEqual(c["max"], 111)
+        self.assertEqual(c["mean"], 59.5)
+        self.assertEqual(c["first"], 3)
+        self.assertEqual(c["last"], 8)
+        self.assertEqual(c["ids"], [3, 5, 7])
+        self.assertEqual(result.records[0]["years"], [2016, 2017])
+        self.assertFalse("value" in c)
+
+    @gen_test
+    def test_composite_key(self):
+        wf = Workflow()
+        wf.interval = 0.01
+        result = Container()
+        wf.append(IterInput(RECORDS))
+        wf.append(GroupBy(["type", "year"], [("total", PRODUCT, "value")],
+                          carry_fields=True))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(len(result.records), 4)
+        self.assertEqual(result.records[0]["id"], 1)
+        self.assertEqual(result.records[0]["total"], 1215.2)
+        self.assertFalse("value" in result.records[0])
+
+    @gen_test
+    def test_async(self):
+        wf = Workflow()
+        wf.interval = 0.01
+        result = Container()
+        wf.append(IterInput(RECORDS))
+        wf.append(AsyncNode())
+        wf.append(AsyncGroupBy("type", AGGS))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual([r["type"] for r in result.records], ["a", "b", "c"])
+        self.assertEqual(result.records[0]["sum"], 2455.4)
+
+    @gen_test
+    def test_parallel(self):
+        pool = WorkerPool(processes=2)
+        rcds = [{"k": i % 7, "v": i} for i in range(1000)]
+        wf = Workflow()
+        wf.interval = 0.01
+        result = Container()
+        wf.append(IterInput(rcds))
+        wf.append(GroupBy("k", [("sum", "sum", "v"), ("ids", "list", "v")],
+                          parallel=True, chunksize=30, pool=pool))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        pool.shutdown()
+        self.assertEqual([r["k"] for r in result.records], list(range(7)))
+        self.assertEqual(result.records[3]["sum"],
+                         sum(range(3, 1000, 7)))
+        self.assertEqual(result.records[3]["ids"], list(range(3, 1000, 7)))
+
+    def test_spill(self):
+        rcds = [{"k": i % 50, "v": i} for i in range(1000)]
+        aggs = [("sum", "sum", "v"), ("first", "first", "v")]
+        expected = GroupTable("k", aggs)
+        expected.add_many(rcds)
+        table = GroupTable("k", aggs, max_groups=10, partitions=4)
+        table.add_many(rcds)
+        self.assertIsNotNone(table._parts)
+        self.assertEqual(sorted(table.groups()), sorted(expected.groups()))
+        self.assertIsNone(table._parts)
+
+    def test_update_missing(self):
+        rcds = [{"k": 1}, {"k": 1, "v": {"a": 1}}, {"k": 2},
+                {"k": 1, "v": {"b": 2}}]
+        table = GroupTable("k", [("u", "update", "v")])
+        table.add_many(rcds)
+        states = {k: values[0] for k, _, values in table.groups()}
+        self.assertEqual(states, {1: {"a": 1, "b": 2}, 2: None})
+
+    def test_merge_required(self):
+        with self.assertRaises(ValueError):
+            GroupBy("k", [("p", Reducer(float, product), "v")],
+                    max_groups=10)
+        with self.assertRaises(ValueError):
+            GroupBy("k", [("p", "unknown", "v")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,7 +12,7 @@ from flashflood.lod import ListOfDict
 from flashflood.core.container import Container
 from flashflood.core.task import Task
 from flashflood.core.workflow import Workflow
-from flashflood.node.aggregate.sum import AggSum
+from flashflood.node.aggregate.sum import AggSum, BatchAggSum
 from flashflood.node.reader.iterinput import IterInput
 from flashflood.node.writer.container import ContainerWriter
 
@@ -44,6 +44,23 @@ class TestAggUpdate(AsyncTestCase):
         self.assertEqual(rcds.find("type", "a")["sum"], 2455.4)
         self.assertFalse("value" in rcds.find("type", "a"))
 
+    @gen_test
+    def test_batch_aggsum(self):
+        wf = Workflow()
+        wf.interval = 0.01
+        result = Container()
+        wf.append(IterInput(RECORDS))
+        wf.append(BatchAggSum("type", "value", batch_size=2))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual([r["type"] for r in result.records], ["a", "b", "c"])
+        rcds = ListOfDict(result.records)
+        self.assertEqual(rcds.find("type", "a")["sum"], 2455.4)
+        self.assertEqual(rcds.find("type", "a")["id"], 1)
+        self.assertNotIn("dup", rcds.find("type", "c"))
+        self.assertFalse("value" in rcds.find("type", "a"))
+
 
 if __name__ == '__main__':
     unittest.main()
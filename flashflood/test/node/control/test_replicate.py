@@ -4,6 +4,7 @@
 # http://opensource.org/licenses/MIT
 #
 
+import tempfile
 import unittest
 
 from tornado.testing import AsyncTestCase, gen_test
@@ -12,6 +13,7 @@ from flashflood.core.container import Container
 from flashflood.core.task import Task
 from flashflood.core.workflow import Workflow
 import flashflood.node as nd
+from flashflood.node.control.replicate import Tee
 
 
 RECORDS = [
@@ -52,6 +54,44 @@ class TestReplicate(AsyncTestCase):
         self.assertEqual(sum(r["twiced"] for r in result1.records), 60)
         self.assertEqual(sum(r["halved"] for r in result2.records), 15)
 
+    @gen_test
+    def test_async_replicate(self):
+        wf = Workflow()
+        result1 = Container()
+        result2 = Container()
+        wf.append(nd.IterInput(RECORDS))
+        rep = nd.AsyncReplicate(2, capacity=2)
+        wf.append(rep)
+        wf.connect(rep, nd.AsyncExtend("twiced", "value", func=twice),
+                   up_port=0)
+        wf.append(nd.ContainerWriter(result1))
+        wf.connect(rep, nd.ContainerWriter(result2), up_port=1)
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(sum(r["twiced"] for r in result1.records), 60)
+        self.assertEqual(result2.records, RECORDS)
+
+    def test_tee(self):
+        applied = []
+
+        def func(x):
+            applied.append(x)
+            return {"x": x}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tee = Tee(map(func, range(20)), 3, spill_threshold=3,
+                      tmpdir=tmpdir)
+            a, b, c = tee.iterators
+            self.assertEqual([next(a)["x"] for _ in range(10)],
+                             list(range(10)))
+            self.assertTrue(tee._spills[1])  # spilled
+            self.assertEqual([r["x"] for r in b], list(range(20)))
+            self.assertEqual([r["x"] for r in a], list(range(10, 20)))
+            self.assertEqual([r["x"] for r in c], list(range(20)))
+        self.assertEqual(applied, list(range(20)))  # applied only once
+        # Records are shared
+        tee = Tee([{"x": 1}], 2)
+        self.assertIs(next(tee.iterators[0]), next(tee.iterators[1]))
+
 
 if __name__ == '__main__':
     unittest.main()
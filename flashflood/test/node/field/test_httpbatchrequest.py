@@ -0,0 +1,128 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import json
+import unittest
+
+from tornado import gen
+from tornado import web
+from tornado.ioloop import IOLoop
+from tornado.testing import AsyncHTTPTestCase, gen_test
+
+from flashflood.core.container import Container
+from flashflood.core.node import AsyncNode
+from flashflood.core.task import Task
+from flashflood.core.workflow import Workflow
+from flashflood.node.field.httpbatchrequest import (
+    AsyncHttpBatchRequest, TokenBucket)
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.container import ContainerWriter
+
+
+class ItemHandler(web.RequestHandler):
+    def initialize(self, state):
+        self.state = state
+
+    @gen.coroutine
+    def get(self, id_):
+        self.state["active"] += 1
+        self.state["peak"] = max(self.state["peak"], self.state["active"])
+        yield gen.sleep(float(self.get_argument("wait", 0.02)))
+        self.state["active"] -= 1
+        if id_ == "404":
+            raise web.HTTPError(404)
+        if id_ == "500":
+            self.write("not a JSON")  # parser error
+            return
+        self.write({"id": int(id_)})
+
+
+class TestAsyncHttpBatchRequest(AsyncHTTPTestCase):
+    def get_app(self):
+        self.state = {"active": 0, "peak": 0}
+        return web.Application([
+            (r"/item/(\d+)", ItemHandler, {"state": self.state})
+        ])
+
+    def run_workflow(self, rcds, async_input=False, **kwargs):
+        wf = Workflow()
+        result = Container()
+        wf.append(IterInput(rcds))
+        if async_input:
+            wf.append(AsyncNode())
+        wf.append(AsyncHttpBatchRequest(
+            "id", "url", response_parser=json.loads,
+            response_failed=lambda: {"id": None}, **kwargs))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        return task, result
+
+    @gen_test
+    def test_fetch(self):
+        rcds = [{"url": self.get_url("/item/{}".format(i))}
+                for i in range(20)]
+        rcds.append({"url": self.get_url("/item/404")})
+        rcds.append({"url": self.get_url("/item/1?wait=1")})
+        task, result = self.run_workflow(
+            rcds, fetch_interval=None, max_in_flight=5, request_timeout=0.5)
+        yield task.execute()
+        self.assertEqual(task.status, "done")
+        ids = [r["id"] for r in result.records]
+        self.assertEqual(len(ids), 22)
+        self.assertEqual(sorted(i for i in ids if i is not None),
+                         list(range(20)))
+        self.assertEqual(ids.count(None), 2)  # not found and timeout
+        self.assertLessEqual(self.state["peak"], 5)
+        self.assertGreater(self.state["peak"], 1)
+
+    @gen_test
+    def test_rate_limit(self):
+        rcds = [{"url": self.get_url("/item/{}?wait=0".format(i))}
+                for i in range(6)]
+        task, result = self.run_workflow(rcds, fetch_interval=0.05)
+        start = IOLoop.current().time()
+        yield task.execute()
+        self.assertGreaterEqual(IOLoop.current().time() - start, 0.2)
+        self.assertEqual(len(result.records), 6)
+
+    @gen_test
+    def test_async_input(self):
+        rcds = [{"url": self.get_url("/item/{}".format(i))}
+                for i in range(30)]
+        task, result = self.run_workflow(
+            rcds, async_input=True, fetch_interval=None, max_in_flight=3)
+        yield task.execute()
+        self.assertEqual(task.status, "done")
+        self.assertEqual(sorted(r["id"] for r in result.records),
+                         list(range(30)))
+        self.assertLessEqual(self.state["peak"], 3)
+
+    @gen_test
+    def test_parser_error(self):
+        rcds = [{"url": self.get_url("/item/{}".format(i))}
+                for i in (1, 500, 2)]
+        task, result = self.run_workflow(
+            rcds, async_input=True, fetch_interval=None)
+        yield task.execute()
+        self.assertEqual(task.status, "done")
+        self.assertEqual(sorted(r["id"] for r in result.records
+                                if r["id"] is not None), [1, 2])
+        self.assertEqual(len(result.records), 3)
+
+    @gen_test
+    def test_token_bucket(self):
+        bucket = TokenBucket(100, burst=5)
+        start = IOLoop.current().time()
+        for _ in range(5):
+            yield bucket.acquire()
+        self.assertLess(IOLoop.current().time() - start, 0.03)
+        for _ in range(5):
+            yield bucket.acquire()
+        self.assertGreaterEqual(IOLoop.current().time() - start, 0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,15 +4,22 @@
 # http://opensource.org/licenses/MIT
 #
 
+import json
 import unittest
 import yaml
 
-from tornado.testing import AsyncTestCase, gen_test
+from tornado import gen
+from tornado import web
+from tornado.locks import Event
+from tornado.testing import AsyncTestCase, AsyncHTTPTestCase, gen_test
 
 from flashflood.core.container import Container
 from flashflood.core.task import Task
 from flashflood.core.workflow import Workflow
-from flashflood.node.reader.httpfetch import HttpFetchInput
+from flashflood.node.reader.httpfetch import (
+    HttpFetchInput, AsyncHttpFetchInput, JSONArrayStreamParser,
+    NDJSONStreamParser
+)
 from flashflood.node.writer.container import ContainerWriter
 
 
@@ -35,5 +42,93 @@ class TestHttpFetch(AsyncTestCase):
         self.assertEqual(len(result.records), 4)
 
 
+class TestStreamParser(unittest.TestCase):
+    def feed_bytes(self, parser, data):
+        rcds = []
+        for i in range(len(data)):  # feed byte by byte
+            rcds.extend(parser.feed(data[i:i + 1]))
+        rcds.extend(parser.close())
+        return rcds
+
+    def test_json_array(self):
+        data = [{"id": i, "name": "化合物{}".format(i), "v": [i, 1.5]}
+                for i in range(5)] + [10, "a,]", None]
+        text = json.dumps(data, ensure_ascii=False, indent=1)
+        res = self.feed_bytes(JSONArrayStreamParser(), text.encode("utf-8"))
+        self.assertEqual(res, data)
+        self.assertEqual(self.feed_bytes(JSONArrayStreamParser(), b" []"), [])
+        with self.assertRaises(ValueError):
+            self.feed_bytes(JSONArrayStreamParser(), b'[{"id": 1}, 2')
+        with self.assertRaises(ValueError):
+            self.feed_bytes(JSONArrayStreamParser(), b'{"id": 1}')
+
+    def test_ndjson(self):
+        data = [{"id": i, "name": "化合物{}".format(i)} for i in range(5)]
+        text = "\n".join(json.dumps(d, ensure_ascii=False) for d in data)
+        res = self.feed_bytes(NDJSONStreamParser(), text.encode("utf-8"))
+        self.assertEqual(res, data)
+
+
+class StreamHandler(web.RequestHandler):
+    def initialize(self, release):
+        self.release = release
+
+    @gen.coroutine
+    def get(self, fmt):
+        if fmt == "ndjson":
+            for i in range(100):
+                self.write(json.dumps({"id": i}) + "\n")
+            return
+        self.write('[{"id": 0}, {"id": 1},')
+        yield self.flush()
+        yield self.release.wait()  # rest will be sent after the test got 0
+        self.write(", ".join(json.dumps({"id": i}) for i in range(2, 100)))
+        self.write("]")
+
+
+class TestAsyncHttpFetch(AsyncHTTPTestCase):
+    def get_app(self):
+        self.release = Event()
+        return web.Application([
+            (r"/(json|ndjson)", StreamHandler, {"release": self.release})
+        ])
+
+    def run_workflow(self, url, **kwargs):
+        wf = Workflow()
+        result = Container()
+        wf.append(AsyncHttpFetchInput(url, **kwargs))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        return task, result
+
+    @gen_test
+    def test_stream(self):
+        task, result = self.run_workflow(self.get_url("/json"), capacity=10)
+        executed = task.execute()
+        while not result.records:
+            yield gen.sleep(0.01)
+        self.assertFalse(executed.done())
+        self.release.set()
+        yield executed
+        self.assertEqual(task.status, "done")
+        self.assertEqual([r["id"] for r in result.records], list(range(100)))
+
+    @gen_test
+    def test_ndjson(self):
+        task, result = self.run_workflow(
+            self.get_url("/ndjson"), response_format="ndjson")
+        yield task.execute()
+        self.assertEqual([r["id"] for r in result.records], list(range(100)))
+
+    @gen_test
+    def test_failed(self):
+        task, result = self.run_workflow(
+            self.get_url("/notfound"),
+            response_failed=lambda: [{"id": None}])
+        yield task.execute()
+        self.assertEqual(task.status, "done")
+        self.assertEqual(result.records, [{"id": None}])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import tempfile
+import unittest
+
+from chorus import v2000reader
+from chorus.demo import MOL
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.concurrent import ConcurrentNode
+from flashflood.core.container import Container
+from flashflood.core.task import Task
+from flashflood.core.workerpool import WorkerPool
+from flashflood.core.workflow import Workflow
+from flashflood.node.reader.sdfile import (
+    SDFileReader, SDFileIndexReader, SDFileRangeInput)
+from flashflood.node.writer.container import ContainerWriter
+
+
+NAMES = ["demo", "Phe", "Arg", "Carbidopa", "Docetaxel"]
+
+
+class TestSDFileReader(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "test.sdf")
+        with open(self.path, "w") as f:
+            for name in NAMES:
+                f.write(MOL[name])
+                f.write("> <name>\n{}\n\n$$$$\n".format(name))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    @gen_test
+    def test_sdfile(self):
+        wf = Workflow()
+        result = Container()
+        wf.append(SDFileReader(self.path, sdf_options=["name"]))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual([r["name"] for r in result.records], NAMES)
+
+    @gen_test
+    def test_index_reader(self):
+        wf = Workflow()
+        result = Container()
+        wf.append(SDFileIndexReader(
+            self.path, rows=slice(1, None, 2), sdf_options=["name"]))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual([r["name"] for r in result.records],
+                         ["Phe", "Carbidopa"])
+        self.assertEqual(len(result.records[1]["__molobj"]),
+                         len(v2000reader.mol_from_text(MOL["Carbidopa"])))
+        self.assertTrue(os.path.exists(self.path + ".idx"))
+
+    @gen_test
+    def test_range_input(self):
+        wf = Workflow()
+        result = Container()
+        wf.append(SDFileRangeInput(
+            self.path, rows=[4, -1, 0], sdf_options=["name"]))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual([r["name"] for r in result.records],
+                         ["Docetaxel", "Docetaxel", "demo"])
+
+    def test_rows_out_of_range(self):
+        reader = SDFileIndexReader(self.path, rows=[0, -6])
+        with self.assertRaises(IndexError):
+            list(reader.contents)
+        node = SDFileRangeInput(self.path, rows=[-6])
+        with self.assertRaises(IndexError):
+            node.run(lambda: None, lambda: None)
+        node = SDFileRangeInput(self.path, rows=[5])
+        with self.assertRaises(IndexError):
+            node.run(lambda: None, lambda: None)
+
+    @gen_test
+    def test_concurrent(self):
+        pool = WorkerPool(processes=2)
+        wf = Workflow()
+        result = Container()
+        wf.append(SDFileRangeInput(self.path, sdf_options=["name"]))
+        wf.append(ConcurrentNode(pool=pool, chunksize=2, ordered=True))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        pool.shutdown()
+        self.assertEqual([r["name"] for r in result.records], NAMES)
+
+
+if __name__ == '__main__':
+    unittest.main()
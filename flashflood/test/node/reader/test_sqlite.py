@@ -0,0 +1,101 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.container import Container
+from flashflood.core.task import Task
+from flashflood.core.workflow import Workflow
+from flashflood.interface import sqlite
+from flashflood.node.reader.sqlite import SQLiteReader, SQLiteReaderSearch
+from flashflood.node.writer.container import ContainerWriter
+
+
+def create_db(path, tables):
+    con = sqlite3.connect(path)
+    for table, (cols, rows) in tables.items():
+        con.execute("CREATE TABLE {} ({})".format(table, ", ".join(cols)))
+        con.executemany("INSERT INTO {} VALUES ({})".format(
+            table, ", ".join(["?"] * len(cols))), rows)
+    con.commit()
+    con.close()
+
+
+class TestSQLiteReader(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db1 = os.path.join(self.tmpdir.name, "db1.sqlite3")
+        self.db2 = os.path.join(self.tmpdir.name, "db2.sqlite3")
+        create_db(self.db1, {
+            "t1": (("id TEXT", "value INTEGER"),
+                   [("rcd{}".format(i), i) for i in range(1000)]),
+            "t2": (("name TEXT",), [("rcd1",)])
+        })
+        create_db(self.db2, {
+            "t3": (("id TEXT", "value INTEGER"),
+                   [("rcd1", 100), ("rcd2000", 2000), ("rcd2000", 2001)])
+        })
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def test_find_many(self):
+        conn = sqlite.Connection(self.db1)
+        res = dict(conn.find_many(
+            "t1", "value", ["3", 5, 5000, 999], chunksize=2))
+        self.assertEqual(res[0], {"id": "rcd3", "value": 3})
+        self.assertEqual(res[1]["id"], "rcd5")
+        self.assertNotIn(2, res)
+        self.assertEqual(res[3]["id"], "rcd999")
+
+    @gen_test
+    def test_more_files_than_pool(self):
+        db3 = os.path.join(self.tmpdir.name, "db3.sqlite3")
+        create_db(db3, {"t4": (("id TEXT",), [("rcd3",)])})
+        shared = sqlite.shared_pool()
+        sqlite.set_shared_pool(sqlite.ConnectionPool(max_size=2))
+        try:
+            wf = Workflow()
+            result = Container()
+            wf.append(SQLiteReader(
+                [(self.db1, "t2"), (self.db2, "t3"), (db3, "t4")]))
+            wf.append(ContainerWriter(result))
+            task = Task(wf)
+            yield task.execute()
+        finally:
+            sqlite.set_shared_pool(shared)
+        self.assertEqual(len(result.records), 5)
+        self.assertEqual(result.records[-1], {"id": "rcd3"})
+
+    @gen_test
+    def test_search(self):
+        values = ["rcd2000", "rcd1", "rcd999", "rcd5000", "rcd1"]
+        wf = Workflow()
+        result = Container()
+        wf.append(SQLiteReaderSearch(
+            [(self.db1, "t2"), (self.db1, "t1"), (self.db2, "t3")],
+            "id", values))
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(
+            [r["id"] for r in result.records], values)
+        self.assertIn(result.records[0]["value"], (2000, 2001))
+        self.assertEqual(result.records[1]["value"], 1)  # first table wins
+        self.assertEqual(result.records[2]["value"], 999)
+        self.assertEqual(result.records[3], {"id": "rcd5000"})  # not found
+        self.assertEqual(result.records[4]["value"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,11 +4,14 @@
 # http://opensource.org/licenses/MIT
 #
 
+import random
+import tempfile
 import unittest
 
 from tornado.testing import AsyncTestCase, gen_test
 
 from flashflood.lod import ListOfDict
+from flashflood.sort import sort_key
 from flashflood.core.container import Container
 from flashflood.core.task import Task
 from flashflood.core.workflow import Workflow
@@ -43,6 +46,26 @@ class TestSort(AsyncTestCase):
         self.assertEqual(len(rcds), 7)
         self.assertEqual(rcds[2]["type"], "c")
 
+    @gen_test
+    def test_external_sort(self):
+        rnd = random.Random(0)
+        rcds = [{"id": i, "a": rnd.choice([1, 2.5, "x", "Y", None]),
+                 "b": rnd.randint(0, 5)} for i in range(100)]
+        order = [("a", False), ("b", True)]
+        expected = list(rcds)
+        for key, asc in reversed(order):
+            expected.sort(key=lambda x: sort_key(x[key]), reverse=not asc)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for run_size in (None, 7, 100, 1000):
+                wf = Workflow()
+                result = Container()
+                wf.append(IterInput(rcds))
+                wf.append(NumericSort(order, run_size=run_size, tmpdir=tmpdir))
+                wf.append(ContainerWriter(result))
+                task = Task(wf)
+                yield task.execute()
+                self.assertEqual(result.records, expected)
+
 
 if __name__ == '__main__':
     unittest.main()
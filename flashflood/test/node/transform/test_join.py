@@ -4,16 +4,24 @@
 # http://opensource.org/licenses/MIT
 #
 
+import random
+import tempfile
+import time
 import unittest
+from unittest import mock
 
 from tornado.testing import AsyncTestCase, gen_test
 
 from flashflood.core.container import Container
+from flashflood.core.node import AsyncNode
 from flashflood.core.task import Task
 from flashflood.core.workflow import Workflow
 from flashflood.lod import ListOfDict
 from flashflood.node.reader.iterinput import IterInput
-from flashflood.node.transform.join import LeftJoin
+from flashflood.core.workerpool import WorkerPool
+from flashflood.node.transform import join as join_module
+from flashflood.node.transform.join import (
+    Join, LeftJoin, hash_join, join_partition)
 from flashflood.node.writer.container import ContainerWriter
 
 
@@ -34,6 +42,11 @@ TO_BE_JOINED = [
 ]
 
 
+def slow_join_partition(*args):
+    time.sleep(0.05)
+    return join_partition(*args)
+
+
 class TestJoin(AsyncTestCase):
     @gen_test
     def test_join(self):
@@ -53,6 +66,88 @@ class TestJoin(AsyncTestCase):
         self.assertEqual(rcds.find("id", 4)["deadline"], "12/2/2017")
         self.assertEqual(len(rcds.find("id", 5)), 4)
 
+    @gen_test
+    def test_async(self):
+        wf = Workflow()
+        result = Container()
+        left = AsyncNode()
+        right = AsyncNode()
+        join = LeftJoin("id", "id", capacity=2)
+        wf.connect(IterInput(RECORDS), left)
+        wf.connect(IterInput(TO_BE_JOINED), right)
+        wf.connect(left, join, down_port=0)
+        wf.connect(right, join, down_port=1)
+        wf.connect(join, AsyncNode())
+        wf.append(ContainerWriter(result))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(task.status, "done")
+        rcds = ListOfDict(result.records)
+        self.assertEqual(len(rcds), 5)
+        self.assertEqual(rcds.find("id", 4)["deadline"], "12/2/2017")
+
+    def test_join_types(self):
+        left = [{"id": 1, "v": "a"}, {"id": 2, "v": "b"}, {"id": 3, "v": "c"}]
+        right = [{"id": 1, "w": 1}, {"id": 1, "w": 2}, {"id": 4, "w": 4}]
+
+        def join(how, unique=False):
+            return list(hash_join("id", "id", how, unique, left, right))
+        self.assertEqual(join("inner"), [
+            {"id": 1, "v": "a", "w": 1}, {"id": 1, "v": "a", "w": 2}])
+        self.assertEqual(join("inner", True), [{"id": 1, "v": "a", "w": 2}])
+        self.assertEqual(len(join("left")), 4)
+        self.assertEqual(join("full")[-1], {"id": 4, "w": 4})
+        self.assertEqual(len(join("full")), 5)
+        self.assertEqual(join("anti"), left[1:])
+        # Composite key
+        res = list(hash_join(
+            ["id", "v"], ["id", "w"], "inner", False,
+            [{"id": 1, "v": 2}, {"id": 1, "v": 3}],
+            [{"id": 1, "w": 3, "x": 0}]))
+        self.assertEqual(res, [{"id": 1, "v": 3, "w": 3, "x": 0}])
+
+    @gen_test
+    def test_grace_join(self):
+        rnd = random.Random(0)
+        left = [{"id": rnd.randint(0, 50), "l": i} for i in range(200)]
+        right = [{"id": rnd.randint(0, 60), "r": i} for i in range(100)]
+
+        def key(r):
+            return (r.get("l", -1), r.get("r", -1))
+        pool = WorkerPool(processes=2)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for how in ("inner", "left", "full", "anti"):
+                expected = sorted(
+                    hash_join("id", "id", how, False, left, right), key=key)
+                for parallel in (False, True):
+                    wf = Workflow()
+                    result = Container()
+                    join = Join("id", "id", how=how, memory_budget=10,
+                                partitions=4, parallel=parallel, pool=pool,
+                                tmpdir=tmpdir)
+                    wf.connect(IterInput(left), join, down_port=0)
+                    wf.connect(IterInput(right), join, down_port=1)
+                    wf.connect(join, ContainerWriter(result))
+                    task = Task(wf)
+                    yield task.execute()
+                    self.assertEqual(
+                        sorted(result.records, key=key), expected)
+            # The IOLoop is not blocked by the workers
+            join = Join("id", "id", how="inner", memory_budget=10,
+                        partitions=4, parallel=True, pool=pool,
+                        tmpdir=tmpdir)
+            join._right_tmp = right
+            with mock.patch.object(join_module, "join_partition",
+                                   slow_join_partition):
+                future = join.join_parallel(left)
+                self.assertFalse(future.done())
+                res = yield future
+            self.assertEqual(
+                sorted(res, key=key),
+                sorted(hash_join("id", "id", "inner", False, left, right),
+                       key=key))
+        pool.shutdown()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,75 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import csv
+import os
+import tempfile
+import unittest
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.node import AsyncNode
+from flashflood.core.task import Task
+from flashflood.core.workflow import Workflow
+from flashflood.node.field.constant import ConstantField
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.csv import CsvWriter
+
+
+class TestCsvWriter(AsyncTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self.tmpdir.name, "out.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        super().tearDown()
+
+    def read(self):
+        with open(self.dest, newline="") as f:
+            return list(csv.DictReader(f))
+
+    @gen_test
+    def test_funcedge(self):
+        wf = Workflow()
+        wf.append(IterInput({"id": i} for i in range(100)))
+        wf.append(ConstantField("type", "a"))
+        wf.append(CsvWriter(self.dest, ["id", "type"]))
+        task = Task(wf)
+        yield task.execute()
+        rows = self.read()
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(rows[99], {"id": "99", "type": "a"})
+
+    @gen_test
+    def test_asyncedge(self):
+        wf = Workflow()
+        wf.append(IterInput({"id": i} for i in range(1000)))
+        wf.append(AsyncNode(capacity=10))
+        wf.append(CsvWriter(self.dest, ["id"]))
+        task = Task(wf)
+        yield task.execute()
+        self.assertEqual(task.status, "done")
+        rows = self.read()
+        self.assertEqual(sum(int(r["id"]) for r in rows), 499500)
+
+    @gen_test
+    def test_interrupt(self):
+        wf = Workflow()
+        wf.append(IterInput({"id": i} for i in range(100000)))
+        wf.append(AsyncNode())
+        wf.append(CsvWriter(self.dest, ["id"]))
+        task = Task(wf)
+        task.execute()
+        task.interrupt()
+        yield task.wait()
+        self.assertEqual(task.status, "aborted")
+        self.assertFalse(os.path.exists(self.dest))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import os
+import tempfile
+import unittest
+
+from chorus.demo import MOL
+from chorus import v2000reader as reader
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.task import Task
+from flashflood.core.workflow import Workflow
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.sdfile import SDFileWriter
+
+
+class TestSDFileWriter(AsyncTestCase):
+    @gen_test
+    def test_sdfile(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, "out.sdf")
+            wf = Workflow()
+            wf.append(IterInput(
+                {"id": i, "__molobj": reader.mol_from_text(MOL["demo"])}
+                for i in range(3)))
+            wf.append(SDFileWriter(dest, ["id"]))
+            task = Task(wf)
+            yield task.execute()
+            mols = list(reader.mols_from_file(dest))
+        self.assertEqual(len(mols), 3)
+        self.assertEqual(mols[2].data["id"], "2")
+        self.assertEqual(len(mols[2]), 37)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from tornado.testing import AsyncTestCase, gen_test
+
+from flashflood.core.task import Task, UnexpectedOperationWarning
+from flashflood.core.workflow import Workflow
+from flashflood.interface import sqlite
+from flashflood.node.reader.iterinput import IterInput
+from flashflood.node.writer.sqlite import SQLiteWriter
+
+
+FIELDS = [
+    {"key": "id", "name": "ID", "format": "text"},
+    {"key": "value", "name": "Value", "format": "numeric"}
+]
+
+
+class TestSQLiteWriter(AsyncTestCase):
+    @gen_test
+    def test_sqlite(self):
+        rcds = [{"id": "rcd{}".format(i), "value": i} for i in range(25)]
+        rcds.append({"id": "rcd3", "value": 100})  # duplicate
+        rcds.append({"id": "rcd25"})  # missing value
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, "test.sqlite3")
+            wf = Workflow()
+            wf.append(IterInput(
+                rcds, fields=FIELDS,
+                params={"sqlite_schema": {"table": "test"}}))
+            with self.assertWarns(UnexpectedOperationWarning):
+                writer = SQLiteWriter(
+                    dest, primary_key="id", create_index=["value"],
+                    batch_size=10, vacuum=False,
+                    pragmas={"journal_mode": "OFF", "synchronous": "OFF",
+                             "cache_size": -1000000})
+            wf.append(writer)
+            task = Task(wf)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                yield task.execute()
+            self.assertEqual(task.status, "done")
+            # Only the duplicate row is skipped in the row by row retry
+            skipped = [line for line in out.getvalue().splitlines()
+                       if line.startswith("skip")]
+            self.assertEqual(len(skipped), 1)
+            self.assertTrue(skipped[0].startswith("skip #25:"))
+            self.assertTrue(os.path.exists(dest.replace(".sqlite3", ".yaml")))
+            conn = sqlite.Connection(dest)
+            self.assertEqual(conn.rows_count("test"), 26)
+            self.assertEqual(conn.find_first("test", "id", "rcd3")["value"], 3)
+            self.assertIsNone(conn.find_first("test", "id", "rcd25")["value"])
+            idx = conn.fetch_one(
+                "SELECT name FROM sqlite_master WHERE type='index' "
+                "AND tbl_name='test' AND sql IS NOT NULL")
+            self.assertEqual(idx["name"], "test_value")
+
+    @gen_test
+    def test_unknown_key(self):
+        rcds = [{"id": "rcd1", "value": 1}, {"id": "rcd2", "extra": 2}]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dest = os.path.join(tmpdir, "test.sqlite3")
+            wf = Workflow()
+            wf.append(IterInput(
+                rcds, fields=FIELDS,
+                params={"sqlite_schema": {"table": "test"}}))
+            wf.append(SQLiteWriter(dest, vacuum=False))
+            task = Task(wf)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                yield task.execute()
+            self.assertEqual(wf.tasks[-1].status, "aborted")
+            self.assertIn("table test has no column named extra",
+                          out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
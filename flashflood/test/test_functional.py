@@ -4,10 +4,16 @@
 # http://opensource.org/licenses/MIT
 #
 
+import functools
 import pickle
 import unittest
 
-from flashflood.functional import compose
+from flashflood.functional import chunked, compose, fuse
+from flashflood.node.field.constant import constant
+from flashflood.node.field.extend import extend
+from flashflood.node.field.remove import remove_many
+from flashflood.node.field.split import split
+from flashflood.node.field.update import rename
 
 
 def f(x):
@@ -22,6 +28,10 @@ def h(x):
     return x + 1
 
 
+def twice_field(x):
+    return x * 2
+
+
 class TestFunctional(unittest.TestCase):
     def test_compose(self):
         composed = compose(f, g, h)
@@ -30,6 +40,37 @@ class TestFunctional(unittest.TestCase):
         # f(g(h(x))
         self.assertEqual(composed(2), 36)
 
+    def test_fuse(self):
+        funcs = [
+            functools.partial(remove_many, ["tmp"]),
+            functools.partial(constant, "c", 1),
+            functools.partial(split, "ab", ["a", "b"], "-", None),
+            functools.partial(extend, "x2", "x", twice_field, False, None)
+        ]
+        row = {"x": 2, "ab": "a-b", "tmp": 0}
+        fused = fuse(*funcs)
+        expected = {"x": 2, "x2": 4, "a": "a", "b": "b", "c": 1}
+        self.assertEqual(fused(row), expected)
+        self.assertEqual(row, {"x": 2, "ab": "a-b", "tmp": 0})  # unchanged
+        self.assertEqual(compose(*funcs)(row), expected)
+        self.assertEqual(fused.args[0].count(dict.copy), 1)
+        pickle.dumps(fused)
+        # Nested fusion (ex. FuncNode chain)
+        fused = fuse(funcs[0], fuse(*funcs[1:]))
+        self.assertEqual(fused(row), expected)
+        self.assertEqual(fused.args[0].count(dict.copy), 1)
+        # Records built by rename are not copied again
+        fused = fuse(funcs[1], functools.partial(rename, {"x": "y"}))
+        self.assertEqual(fused.args[0].count(dict.copy), 0)
+        self.assertEqual(fused(row), {"y": 2, "ab": "a-b", "tmp": 0, "c": 1})
+        # Unknown functions may return the input record
+        fused = fuse(funcs[1], f, funcs[1])
+        self.assertEqual(fused.args[0].count(dict.copy), 2)
+
+    def test_chunked(self):
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunked([], 2)), [])
+
 
 if __name__ == '__main__':
     unittest.main()
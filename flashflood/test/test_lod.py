@@ -7,7 +7,7 @@
 import pickle
 import unittest
 
-from flashflood.lod import ListOfDict
+from flashflood.lod import ListOfDict, IndexedListOfDict
 
 records1 = [
     {"a": 12, "b": 24, "c": True, "d": "Alice"},
@@ -36,6 +36,25 @@ class TestListOfDict(unittest.TestCase):
         data.unique("b")
         self.assertEqual(len(data), 3)
 
+    def test_merge_duplicated(self):
+        data = ListOfDict([{"key": 1, "v": 1}])
+        data.merge([{"key": 2, "v": 2}, {"key": 2, "v": 3}, {"key": 1}],
+                   dupkey="update")
+        self.assertEqual(data, [{"key": 1, "v": 1}, {"key": 2, "v": 3}])
+        data = ListOfDict([{"key": 1, "v": 1}, {"key": 1, "v": 2}])
+        data.reduce()
+        self.assertEqual(data, [{"key": 1, "v": 2}])
+
+    def test_merge_unhashable(self):
+        data = ListOfDict([{"key": [1, 2], "v": 1}, {"key": 3, "v": 1}])
+        data.merge([{"key": [1, 2], "v": 2}, {"key": {"a": 1}, "v": 3},
+                    {"key": 3, "v": 4}], dupkey="update")
+        self.assertEqual(data, [{"key": [1, 2], "v": 2},
+                                {"key": 3, "v": 4}, {"key": {"a": 1}, "v": 3}])
+        data = ListOfDict([{"key": [1], "v": 1}, {"key": [1], "v": 2}])
+        data.reduce()
+        self.assertEqual(data, [{"key": [1], "v": 2}])
+
     def test_merge(self):
         data = ListOfDict(pickle.loads(pickle.dumps(records1)))
         records = [{"a": 12, "b": 16, "d": "Eliza"}]
@@ -88,5 +107,46 @@ class TestListOfDict(unittest.TestCase):
         self.assertEqual(len(data), 2)
 
 
+class TestIndexedListOfDict(unittest.TestCase):
+    def test_find(self):
+        data = IndexedListOfDict(
+            pickle.loads(pickle.dumps(records1)), key="a")
+        self.assertEqual(data.find("a", 14)["d"], "Charley")
+        self.assertIsNone(data.find("a", 16))
+        self.assertEqual(data.find("b", 22)["d"], "Beth")
+        self.assertEqual(data.index_of(15), 3)
+        # should be picklable
+        data = pickle.loads(pickle.dumps(data))
+        self.assertEqual(data.find("a", 15)["d"], "Diana")
+
+    def test_add(self):
+        data = IndexedListOfDict(
+            pickle.loads(pickle.dumps(records1)), key="a")
+        data.add({"a": 12, "d": "Eliza"}, dupkey="update")
+        self.assertEqual(data[0]["b"], 24)
+        self.assertEqual(data[0]["d"], "Eliza")
+        data.merge([{"a": 16, "d": "Fay"}, {"a": 16, "d": "Gina"}])
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data.find("a", 16)["d"], "Gina")
+        data.append({"a": 17})
+        self.assertEqual(data.index_of(17), 5)
+
+    def test_list_operations(self):
+        data = IndexedListOfDict(
+            pickle.loads(pickle.dumps(records1)), key="a")
+        self.assertEqual(data.pick("a", 13)["d"], "Beth")
+        self.assertEqual(data.find("a", 14)["d"], "Charley")
+        self.assertEqual(data.index_of(15), 2)
+        data.delete("a", 12)
+        self.assertIsNone(data.find("a", 12))
+        self.assertEqual(data.index_of(15), 1)
+        data[0] = {"a": 20, "b": 22}
+        self.assertEqual(data.index_of(20), 0)
+        data.sort(key=lambda x: -x["a"])
+        self.assertEqual(data.index_of(15), 1)
+        data.unique("b")
+        self.assertEqual(data, [{"a": 20, "b": 22}])
+
+
 if __name__ == '__main__':
     unittest.main()
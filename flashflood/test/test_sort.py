@@ -6,7 +6,8 @@
 
 import unittest
 
-from flashflood.sort import sort_cmp, sort_key
+from flashflood import sort
+from flashflood.sort import argsort, sort_cmp, sort_key
 
 
 class TestSort(unittest.TestCase):
@@ -23,6 +24,24 @@ class TestSort(unittest.TestCase):
         self.assertTrue(sort_key(1) < sort_key(2))
         self.assertTrue(sort_key('fuga') < sort_key('hoge'))
 
+    def test_sort_key(self):
+        values = ["b", 10, "A", None, "2.5", float("nan"), -1, "a", True]
+        res = sorted(values, key=sort_key)
+        self.assertEqual(res[:4], [-1, True, "2.5", 10])
+        self.assertEqual(res[5:], ["A", "a", "b", None])
+        self.assertEqual(sort_key(10 ** 400), (0, 10 ** 400))
+        self.assertTrue(sort.lt(2, "10"))
+        self.assertTrue(sort.ge("fuga", 1e10))
+        self.assertTrue(sort.le("Hoge", "hoge"))
+
+    def test_argsort(self):
+        for values in ([3, 1, 2, 1, 3], [0.5, 0.1, 0.5], [3, "a", 1, None, 1]):
+            for reverse in (False, True):
+                expected = sorted(range(len(values)), reverse=reverse,
+                                  key=lambda i: sort_key(values[i]))
+                self.assertEqual(argsort(values, reverse), expected)
+        self.assertEqual(argsort([]), [])
+
 
 if __name__ == '__main__':
     unittest.main()
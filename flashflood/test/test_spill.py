@@ -0,0 +1,28 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import unittest
+
+from flashflood.spill import SpillFile
+
+
+class TestSpill(unittest.TestCase):
+    def test_spill(self):
+        rcds = [{"id": i, "value": "rcd{}".format(i)} for i in range(25)]
+        with SpillFile(block_size=10) as f:
+            f.write_many(rcds)
+            self.assertEqual(f.count, 25)
+            self.assertGreater(f.size(), 0)
+            self.assertEqual(list(f.read()), rcds)
+            # Readable again and appendable after reading
+            f.write({"id": 25})
+            self.assertEqual(list(f.read()), rcds + [{"id": 25}])
+        with SpillFile() as f:
+            self.assertEqual(list(f.read()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()